@@ -0,0 +1,201 @@
+# api_v1.py
+import hashlib
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+from sqlalchemy.orm import joinedload, load_only
+
+from category_tree import get_category_tree
+from models import User, Video
+from pagination import InvalidCursor, keyset_paginate
+
+api_v1 = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# field -> Video columns it reads (beyond the ones every ETag needs)
+FIELDS = {
+    "video_id": (),
+    "title": (Video.title,),
+    "description": (Video.description,),
+    "category": (Video.category_id,),
+    "uploader": (Video.uploaded_by,),
+    "views": (),
+    "likes": (),
+    "date_added": (Video.date_added,),
+    "thumbnail": (),
+    "url": (),
+}
+LIST_FIELDS = ("video_id", "title", "category", "views", "likes", "date_added", "thumbnail")
+TAG_COLUMNS = (Video.id, Video.video_id, Video.version, Video.views, Video.likes_count)
+
+
+class ApiError(ValueError):
+    pass
+
+
+@api_v1.errorhandler(ApiError)
+def _bad_request(e):
+    return jsonify({"success": False, "message": str(e)}), 400
+
+
+# =====================================================
+# SERIALIZATION
+# =====================================================
+def _fields(default):
+    """Fields named in ?fields=a,b (video_id is always included)."""
+    value = request.args.get("fields", "").strip()
+    if not value:
+        return default
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(FIELDS)}.")
+    return tuple(dict.fromkeys(["video_id"] + names))
+
+
+def _video_query(fields):
+    """Video query loading only the columns `fields` need, with the
+    uploader joined in when asked for."""
+    columns = list(TAG_COLUMNS)
+    for name in fields:
+        columns.extend(FIELDS[name])
+    query = Video.query.options(load_only(*columns))
+    if "uploader" in fields:
+        query = query.options(joinedload(Video.uploader).load_only(User.id, User.username))
+    return query
+
+
+def _serialize(video, fields, tree):
+    data = {}
+    for name in fields:
+        if name == "video_id":
+            data[name] = video.video_id
+        elif name == "title":
+            data[name] = video.title
+        elif name == "description":
+            data[name] = video.description or ""
+        elif name == "category":
+            category = tree.get(video.category_id)
+            data[name] = {"slug": category.slug, "name": category.name} if category else None
+        elif name == "uploader":
+            data[name] = video.uploader.username if video.uploader else None
+        elif name == "views":
+            data[name] = video.views
+        elif name == "likes":
+            data[name] = video.likes_count or 0
+        elif name == "date_added":
+            data[name] = video.date_added.isoformat() if video.date_added else None
+        elif name == "thumbnail":
+            data[name] = url_for("main.thumbnail", video_id=video.video_id, width=480, _external=True)
+        elif name == "url":
+            data[name] = url_for("main.video_page", video_id=video.video_id, _external=True)
+    return data
+
+
+def _category(node):
+    return {
+        "slug": node.slug,
+        "name": node.name,
+        "children": [_category(child) for child in node.children],
+    }
+
+
+# =====================================================
+# CACHING
+# =====================================================
+def _row_tags(videos):
+    # Counters are written with Core UPDATEs that leave `version` alone,
+    # so they are part of the tag too. Views are the stored count, not
+    # this worker's pending ones, so every worker agrees on body and tag.
+    return [(v.id, v.version, v.views, v.likes_count or 0) for v in videos]
+
+
+def _respond(tag_parts, build):
+    """JSON from `build()` with a strong ETag over `tag_parts`, or a bare
+    304 when the client already has that version."""
+    etag = hashlib.blake2b(repr(tag_parts).encode(), digest_size=16).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["API_MAX_AGE"]
+    return response
+
+
+# =====================================================
+# ROUTES
+# =====================================================
+@api_v1.route("/categories")
+def categories():
+    tree = get_category_tree()
+    return _respond(("categories", tree.version), lambda: {
+        "categories": [_category(node) for node in tree.roots],
+    })
+
+
+@api_v1.route("/categories/<slug>/videos")
+def category_videos(slug):
+    tree = get_category_tree()
+    category = tree.by_slug.get(slug)
+    if category is None:
+        return jsonify({"success": False, "message": "Unknown category."}), 404
+    fields = _fields(LIST_FIELDS)
+    try:
+        limit = max(1, min(int(request.args.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+
+    ids = [category.id] + [c.id for c in category.descendants]
+    query = _video_query(fields + ("date_added",)).filter(Video.category_id.in_(ids))
+    try:
+        page = keyset_paginate(query, (Video.date_added, Video.id), per_page=limit,
+                               cursor=request.args.get("cursor"))
+    except InvalidCursor:
+        raise ApiError("Invalid cursor.")
+
+    tags = ("category", slug, tree.version, fields, page.next_cursor, page.prev_cursor,
+            _row_tags(page.items))
+    return _respond(tags, lambda: {
+        "category": {"slug": category.slug, "name": category.name},
+        "videos": [_serialize(v, fields, tree) for v in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    })
+
+
+@api_v1.route("/videos/<video_id>")
+def video(video_id):
+    fields = _fields(tuple(FIELDS))
+    video = _video_query(fields).filter(Video.video_id == video_id).first()
+    if video is None:
+        return jsonify({"success": False, "message": "Unknown video."}), 404
+
+    tree = get_category_tree()
+    tags = ("video", tree.version, fields, _row_tags([video]))
+    return _respond(tags, lambda: _serialize(video, fields, tree))
+
+
+@api_v1.route("/videos")
+def videos():
+    """Batch lookup: ?ids=a,b,c (YouTube ids, at most API_BATCH_LIMIT) in
+    one query. Videos come back in request order; unknown ids are listed
+    under "missing"."""
+    ids = list(dict.fromkeys(i.strip() for i in request.args.get("ids", "").split(",") if i.strip()))
+    if not ids:
+        raise ApiError("Pass the video ids as ?ids=a,b,c.")
+    limit = current_app.config["API_BATCH_LIMIT"]
+    if len(ids) > limit:
+        raise ApiError(f"At most {limit} ids per request.")
+    fields = _fields(LIST_FIELDS)
+
+    found = {v.video_id: v for v in _video_query(fields).filter(Video.video_id.in_(ids))}
+    ordered = [found[i] for i in ids if i in found]
+    tree = get_category_tree()
+    tags = ("videos", ids, tree.version, fields, _row_tags(ordered))
+    return _respond(tags, lambda: {
+        "videos": [_serialize(v, fields, tree) for v in ordered],
+        "missing": [i for i in ids if i not in found],
+    })
@@ -3,80 +3,190 @@
 # ==============================
 import os
 import re
+import click
 from datetime import datetime
-from typing import Optional
-from urllib.parse import urlparse, parse_qs
 from functools import wraps
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_mail import Mail, Message
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, session, flash, jsonify, abort
+from flask_mail import Mail
+from sqlalchemy.orm import joinedload
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
+from db_routing import ReplicaRouter
 from models import db, User, Video, Comment, Category, Subscriber
+from homepage import build_homepage_data, build_category_page_data
+from category_tree import get_category_tree, mark_categories_changed
+import search as search_index
+from view_counter import ViewCounter
+from likes import add_like, current_liker, liked_video_ids
+from comments import ORDERS as COMMENT_ORDERS, add_comment, comment_page, comment_to_dict, forget_comments
+from outbox import Outbox
+from digests import FREQUENCIES, run_digests, set_frequency
+from page_cache import PageCache, mark_catalog_changed
+from leaderboards import Leaderboards
+from related import RelatedVideos
+from thumbnails import Thumbnails
+from assets import Assets
+from compression import Compressor
+from unique_viewers import UniqueViewers
+from visitors import drop_legacy_view_flags, viewer_key
+from request_profiler import RequestProfiler
+from rate_limit import RateLimiter, limit as rate_limit
+from pagination import InvalidCursor, approximate_count, decode_cursor, keyset_paginate, table_estimate
+from video_admin import SORTS as VIDEO_SORTS, VideoListing, video_to_dict
+from video_import import FORMATS, detect_format, extract_video_id, import_videos, open_text
+from warmup import warm_up, warm_up_in_background
+from streaming import stream_page
+from templating import Templating
+from api_v1 import api_v1
 
 
 # ==============================
 # APP CONFIGURATION
 # ==============================
-app = Flask(__name__)
-app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_pre_ping": True,
-    "pool_recycle": 280
-}
-# Database configuration
-database_url = os.environ.get("DATABASE_URL")
-if database_url and database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-
-app.config["SQLALCHEMY_DATABASE_URI"] = database_url or "sqlite:///gospeltube.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# Flask-Mail configuration
-app.config["MAIL_SERVER"] = "smtp.gmail.com"
-app.config["MAIL_PORT"] = 587
-app.config["MAIL_USE_TLS"] = True
-app.config["MAIL_USE_SSL"] = False
-app.config["MAIL_USERNAME"] = os.environ.get("MAIL_USERNAME")
-app.config["MAIL_PASSWORD"] = os.environ.get("MAIL_PASSWORD")
-app.config["MAIL_DEFAULT_SENDER"] = ("GospelTube", os.environ.get("MAIL_USERNAME"))
+def _database_url(name):
+    url = os.environ.get(name)
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+def _int_env(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+def default_config() -> dict:
+    """Settings read from the environment; `create_app(config)` overrides them."""
+    return {
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "dev-secret"),
+        # The session only changes when it has to (see visitors.py); don't re-send it on every response.
+        "SESSION_REFRESH_EACH_REQUEST": False,
+        "SQLALCHEMY_ENGINE_OPTIONS": {
+            "pool_pre_ping": True,
+            "pool_recycle": 280
+        },
+        # Database configuration
+        "SQLALCHEMY_DATABASE_URI": _database_url("DATABASE_URL") or "sqlite:///gospeltube.db",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "DATABASE_REPLICA_URL": _database_url("DATABASE_REPLICA_URL"),
+        "DB_POOL_SIZE": _int_env("DB_POOL_SIZE"),
+        "DB_MAX_OVERFLOW": _int_env("DB_MAX_OVERFLOW"),
+        "REPLICA_POOL_SIZE": _int_env("REPLICA_POOL_SIZE"),
+        "REPLICA_MAX_OVERFLOW": _int_env("REPLICA_MAX_OVERFLOW"),
+
+        # Flask-Mail configuration
+        "MAIL_SERVER": os.environ.get("MAIL_SERVER", "smtp.gmail.com"),
+        "MAIL_PORT": int(os.environ.get("MAIL_PORT", 587)),
+        "MAIL_USE_TLS": os.environ.get("MAIL_USE_TLS", "true").lower() == "true",
+        "MAIL_USE_SSL": False,
+        "MAIL_USERNAME": os.environ.get("MAIL_USERNAME"),
+        "MAIL_PASSWORD": os.environ.get("MAIL_PASSWORD"),
+        "MAIL_DEFAULT_SENDER": ("GospelTube", os.environ.get("MAIL_USERNAME")),
+
+        # Subscriber digests
+        "SITE_URL": os.environ.get("SITE_URL", "http://localhost:5000"),
+        "DIGEST_MAX_VIDEOS": 20,
+        "DIGEST_BATCH_SIZE": 500,
+
+        # Write admission control (rate_limit.py)
+        "RATE_LIMIT_BACKEND": os.environ.get("RATE_LIMIT_BACKEND", "memory"),
+
+        # Read-only JSON API (api_v1.py)
+        "API_MAX_AGE": 60,
+        "API_BATCH_LIMIT": 200,
+
+        # Response compression and template compilation (compression.py, templating.py)
+        "COMPRESS_ENABLED": os.environ.get("COMPRESS_ENABLED", "true").lower() == "true",
+        "HTML_COLLAPSE_WHITESPACE": os.environ.get("HTML_COLLAPSE_WHITESPACE", "false").lower() == "true",
+
+        # Prime caches and compile templates in a background thread of each new app
+        "WARM_UP_ON_START": os.environ.get("WARM_UP_ON_START", "false").lower() == "true",
+    }
 
 # ==============================
-# EXTENSIONS INITIALIZATION
+# EXTENSIONS (one set per app, built by create_app)
 # ==============================
+main = Blueprint("main", __name__, cli_group=None)
 
-db.init_app(app)
 
-# initialize extensions
-migrate = Migrate(app, db)
-mail = Mail(app)
+def _extension(name):
+    """The current app's extension `name`, for the routes below."""
+    return LocalProxy(lambda: current_app.extensions[name])
+
+
+request_profiler = _extension("request_profiler")
+rate_limiter = _extension("rate_limiter")
+view_counter = _extension("view_counter")
+outbox = _extension("outbox")
+page_cache = _extension("page_cache")
+leaderboards = _extension("leaderboards")
+related_videos = _extension("related_videos")
+thumbnails = _extension("thumbnails")
+assets = _extension("assets")
+unique_viewers = _extension("unique_viewers")
+
+
+def queue_digests():
+    run_digests(outbox)
 
-# create tables automatically
-with app.app_context():
-    db.create_all()  # creates all tables
+
+# ==============================
+# APPLICATION FACTORY
+# ==============================
+def create_app(config=None):
+    """Build the application. Nothing here touches the database: the
+    schema belongs to `flask db upgrade` and caches fill on first use (or
+    from warm_up with WARM_UP_ON_START)."""
+    app = Flask(__name__)
+    app.config.from_mapping(default_config())
+    app.config.update(config or {})
+
+    ReplicaRouter(app)  # sets the binds db.init_app creates engines from
+    db.init_app(app)
+    Templating(app)  # before anything compiles a template
+    RequestProfiler(app)
+    RateLimiter(app)
+    if click.get_current_context(silent=True) is not None:
+        # Only `flask ...` commands need Flask-Migrate, which imports Alembic.
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    counter = ViewCounter(app)
+    Outbox(app, Mail(app)).add_periodic_task(queue_digests)
+    PageCache(app)
+    Leaderboards(app, counter)
+    RelatedVideos(app, counter)
+    Thumbnails(app)
+    Assets(app)
+    Compressor(app)
+    UniqueViewers(app, counter)
+
+    app.register_blueprint(main)
+    app.register_blueprint(api_v1)
+    if app.config["WARM_UP_ON_START"]:
+        warm_up_in_background(app)
+    return app
+
+
+def __getattr__(name):
+    """`app` for `gunicorn app:app` and `flask --app app`, built from the
+    environment on first access instead of at import."""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ==============================
 # CONTEXT PROCESSORS
 # ==============================
-@app.context_processor
+@main.app_context_processor
 def inject_globals():
     """Provide global variables to templates."""
-    return dict(datetime=datetime)
+    return dict(datetime=datetime, view_count=view_counter.view_count)
 
 # =====================================================
 # HELPERS
 # =====================================================
-def extract_video_id(url: str) -> Optional[str]:
-    if not url:
-        return None
-    match = re.match(r"(https?://)?(www\.)?youtu\.be/([^?&/]+)", url)
-    if match:
-        return match.group(3)
-
-    parsed = urlparse(url)
-    if parsed.hostname in ("www.youtube.com", "youtube.com", "m.youtube.com"):
-        return parse_qs(parsed.query).get("v", [None])[0]
-    return None
+def count_all_videos() -> int:
+    """Cached (and on PostgreSQL, estimated) size of the catalog."""
+    return approximate_count("videos", lambda: table_estimate(db.session, "videos", Video.query.count))
 
 def slugify(name: str) -> str:
     return re.sub(r"\s+", "-", name.strip().lower())
@@ -86,104 +196,125 @@ def admin_required(func):
     def wrapper(*args, **kwargs):
         if session.get("role") != "admin":
             flash("Admin access required.", "danger")
-            return redirect(url_for("admin_login"))
+            return redirect(url_for("main.admin_login"))
         return func(*args, **kwargs)
     return wrapper
 
-def get_related_videos(video, limit=6):
-    if not video.category:
-        return []
-
-    category_ids = [video.category_id]
-    if video.category.parent_id:
-        siblings = Category.query.filter_by(parent_id=video.category.parent_id).all()
-        category_ids = [c.id for c in siblings]
-    else:
-        children = Category.query.filter_by(parent_id=video.category_id).all()
-        category_ids.extend([c.id for c in children])
-
-    return Video.query.filter(
-        Video.category_id.in_(category_ids),
-        Video.id != video.id
-    ).order_by(Video.date_added.desc()).limit(limit).all()
-
 def uploader_or_admin_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         if session.get("role") not in ["admin", "uploader"]:
             flash("Login required.", "danger")
-            return redirect(url_for("admin_login"))
+            return redirect(url_for("main.admin_login"))
         return func(*args, **kwargs)
     return wrapper
 def create_admin_user():
-    with app.app_context():
-        admin = User.query.filter_by(role="admin").first()
-
-        if not admin:
-            admin = User(
-                username="admin",
-                email="admin@gospeltube.com",
-                password=generate_password_hash("admin123"),
-                role="admin"
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("✅ Admin user created successfully.")
-        else:
-            print("ℹ Admin user already exists.")
+    admin = User.query.filter_by(role="admin").first()
+
+    if not admin:
+        admin = User(
+            username="admin",
+            email="admin@gospeltube.com",
+            password=generate_password_hash("admin123"),
+            role="admin"
+        )
+        db.session.add(admin)
+        db.session.commit()
+        print("✅ Admin user created successfully.")
+    else:
+        print("ℹ Admin user already exists.")
 # =====================================================
 # FRONTEND ROUTES
 # =====================================================
-@app.route("/")
+@main.route("/")
 def index():
-    categories = Category.query.filter_by(parent_id=None).order_by(Category.name.asc()).all()
-    homepage_data = []
-
-    for cat in categories:
-        parent_videos = Video.query.filter_by(category_id=cat.id)\
-                                   .order_by(Video.date_added.desc()).limit(10).all()
-        children_data = []
-        for sub in cat.children:
-            sub_videos = Video.query.filter_by(category_id=sub.id)\
-                                    .order_by(Video.date_added.desc()).limit(10).all()
-            if sub_videos:
-                children_data.append({"category": sub, "videos": sub_videos})
-        if parent_videos or children_data:
-            homepage_data.append({
-                "category": cat,
-                "parent_videos": parent_videos,
-                "children": children_data
-            })
-
-    featured_videos = Video.query.order_by(Video.date_added.desc()).limit(5).all()
-    popular_videos = Video.query.order_by(Video.views.desc()).limit(10).all()
+    def render():
+        homepage_data = build_homepage_data()
+
+        featured_videos = Video.query.order_by(Video.date_added.desc()).limit(5).all()
+
+        return render_template(
+            "index.html",
+            homepage_data=homepage_data,
+            featured_videos=featured_videos,
+            popular_videos=leaderboards.popular(10),
+            trending_videos=leaderboards.trending(10),
+            active_category="All"
+        )
 
-    return render_template(
-        "index.html",
-        homepage_data=homepage_data,
-        featured_videos=featured_videos,
-        popular_videos=popular_videos,
-        active_category="All"
-    )
+    return page_cache.respond(render)
 
-@app.route("/video/<video_id>")
+@main.route("/video/<video_id>")
 def video_page(video_id):
     video = Video.query.filter_by(video_id=video_id).first_or_404()
-    session_key = f"viewed_{video.id}"
-    if not session.get(session_key):
-        video.views += 1
-        video.last_watched = datetime.utcnow()
-        session[session_key] = True
-        db.session.commit()
-
-    return render_template(
-        "video.html",
-        video=video,
-        related_videos=get_related_videos(video),
-        popular_videos=Video.query.order_by(Video.views.desc()).limit(8).all()
-    )
+    # Before viewer_key(): a first-time visitor has no likes to look up.
+    liked = video.id in liked_video_ids([video.id])
+
+    drop_legacy_view_flags()
+    visitor = viewer_key()
+    if unique_viewers.observe(visitor, video.id):
+        view_counter.record(video.id)
+        related_videos.record_view(visitor, video.id)
+
+    def render():
+        return render_template(
+            "video.html",
+            video=video,
+            liked=liked,
+            comments=comment_page(video.id),
+            related_videos=related_videos.for_video(video),
+            popular_videos=leaderboards.popular(8)
+        )
 
-@app.route('/like_video/<video_id>', methods=['POST'])
+    # A new comment changes the count, so it retires the cached page.
+    return page_cache.respond(render, variant=(liked, video.comments_count))
+
+@main.route("/video/<video_id>/comments")
+def video_comments(video_id):
+    """Later pages of a video's comments (and the oldest-first order) as JSON."""
+    order = request.args.get("order", "newest")
+    if order not in COMMENT_ORDERS:
+        return jsonify({"success": False, "message": "order must be newest or oldest."}), 400
+    video_pk = Video.query.with_entities(Video.id).filter_by(video_id=video_id).scalar()
+    if video_pk is None:
+        return jsonify({"success": False, "message": "Video not found"}), 404
+    try:
+        page = comment_page(video_pk, order, request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"success": False, "message": "Invalid cursor."}), 400
+    return jsonify({
+        "success": True,
+        "comments": [comment_to_dict(c) for c in page.items],
+        "next_cursor": page.next_cursor
+    })
+
+@main.route("/video/<video_id>/comments", methods=["POST"])
+@rate_limit("comment", per_minute=6, burst=3)
+def post_comment(video_id):
+    video_pk = Video.query.with_entities(Video.id).filter_by(video_id=video_id).scalar()
+    if video_pk is None:
+        return jsonify({"success": False, "message": "Video not found"}), 404
+    data = request.get_json(silent=True) or request.form
+    try:
+        comment, comments_count = add_comment(video_pk, data.get("content"), data.get("name"))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "comment": comment_to_dict(comment),
+        "comments_count": comments_count
+    })
+
+@main.route("/thumbs/<video_id>/<int:width>")
+def thumbnail(video_id, width):
+    return thumbnails.respond(video_id, width)
+
+@main.route("/static/dist/<path:filename>")
+def asset(filename):
+    return assets.respond(filename)
+
+@main.route('/like_video/<video_id>', methods=['POST'])
+@rate_limit("like", per_minute=30, burst=10)
 def like_video(video_id):
     try:
         video = Video.query.filter_by(video_id=video_id).first()
@@ -194,16 +325,13 @@ def like_video(video_id):
                 "message": "Video not found"
             }), 404
 
-        # ensure likes is not None
-        if video.likes is None:
-            video.likes = 0
-
-        video.likes += 1
-        db.session.commit()
+        column, value = current_liker()
+        _, likes_count = add_like(video.id, column, value)
 
         return jsonify({
             "success": True,
-            "likes": video.likes
+            "liked": True,
+            "likes": likes_count
         })
 
     except Exception as e:
@@ -215,7 +343,8 @@ def like_video(video_id):
 # ==============================
 # SUBSCRIBE ROUTE (AJAX JSON)
 # ==============================
-@app.route("/subscribe", methods=["POST"])
+@main.route("/subscribe", methods=["POST"])
+@rate_limit("subscribe", per_minute=3, burst=5)
 def subscribe():
     try:
         data = request.get_json()
@@ -226,26 +355,31 @@ def subscribe():
         if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
             return jsonify({"status": "error", "message": "Invalid email address."}), 400
 
+        frequency = data.get("frequency")
+        if frequency is not None and frequency not in FREQUENCIES:
+            return jsonify({"status": "error", "message": "Invalid digest frequency."}), 400
+
         # Check if already subscribed
         existing = Subscriber.query.filter_by(email=email).first()
         if existing:
+            if frequency and frequency != existing.digest_frequency:
+                set_frequency(existing, frequency)
+                db.session.commit()
+                return jsonify({"status": "success", "message": "Digest preference updated."}), 200
             return jsonify({"status": "info", "message": "Email already subscribed."}), 200
 
-        # Add subscriber
-        new_sub = Subscriber(email=email)
+        # Add subscriber and queue the welcome email in one transaction
+        new_sub = Subscriber(email=email, last_digest_at=datetime.utcnow())
+        set_frequency(new_sub, frequency or "immediate")
         db.session.add(new_sub)
+        outbox.enqueue(
+            "welcome",
+            subject="Welcome to GospelTube 🙌",
+            body=f"Hello!\n\nThank you for subscribing to GospelTube. Stay tuned for the latest videos and updates.\n\nBlessings,\nGospelTube Team",
+            recipient=email
+        )
         db.session.commit()
-
-        # Send Welcome Email
-        try:
-            msg = Message(
-                subject="Welcome to GospelTube 🙌",
-                recipients=[email],
-                body=f"Hello!\n\nThank you for subscribing to GospelTube. Stay tuned for the latest videos and updates.\n\nBlessings,\nGospelTube Team"
-            )
-            mail.send(msg)
-        except Exception as e:
-            print("Welcome email failed:", e)
+        outbox.wake()
 
         return jsonify({"status": "success", "message": "Subscribed successfully 🙌"}), 200
 
@@ -253,41 +387,52 @@ def subscribe():
         print("Subscribe error:", e)
         return jsonify({"status": "error", "message": "Subscription failed. Try again."}), 500
 
-@app.route("/search")
+@main.route("/search")
 def search():
     q = request.args.get("q", "").strip()
-    videos = Video.query.filter(Video.title.ilike(f"%{q}%")).all() if q else []
-    return render_template("search_results.html", videos=videos, query=q)
+    cursor = request.args.get("cursor")
+    try:
+        search_index.check_cursor(cursor)
+    except InvalidCursor:
+        abort(400)
+    backend = search_index.get_search_backend()
+    return stream_page(
+        "search_results.html",
+        search=lambda: backend.search(q, cursor=cursor) if q else None,
+        query=q
+    )
 
-@app.route("/privacy-policy")
+@main.route("/privacy-policy")
 def privacy_policy():
     return render_template("privacy.html")
 
 # =====================================================
 # CATEGORY PAGES
 # =====================================================
-@app.route("/category-page/<string:category_slug>")
+@main.route("/category-page/<string:category_slug>")
 def category_landing_page(category_slug):
-    main_category = Category.query.filter_by(slug=category_slug).first_or_404()
-    main_videos = Video.query.filter_by(category_id=main_category.id)\
-                             .order_by(Video.date_added.desc()).limit(10).all()
-    subcategory_blocks = []
-    for sub in main_category.children:
-        sub_videos = Video.query.filter_by(category_id=sub.id)\
-                                .order_by(Video.date_added.desc()).limit(10).all()
-        if sub_videos:
-            subcategory_blocks.append({"category": sub, "videos": sub_videos})
-    return render_template(
-        "category_landing_page.html",
-        main_category=main_category,
-        main_videos=main_videos,
-        subcategory_blocks=subcategory_blocks
-    )
+    main_category = get_category_tree().by_slug.get(category_slug)
+    if main_category is None:
+        abort(404)
+
+    def render():
+        block = build_category_page_data(main_category)
+        return render_template(
+            "category_landing_page.html",
+            main_category=main_category,
+            main_videos=block["parent_videos"],
+            subcategory_blocks=block["children"],
+            popular_videos=leaderboards.popular_in_category(
+                [main_category.id] + [c.id for c in main_category.descendants], 10
+            )
+        )
+
+    return page_cache.respond(render)
 
 # =====================================================
 # ADMIN ROUTES
 # =====================================================
-@app.route("/admin/login", methods=["GET", "POST"])
+@main.route("/admin/login", methods=["GET", "POST"])
 def admin_login():
     if request.method == "POST":
         username = request.form.get("username")
@@ -303,15 +448,15 @@ def admin_login():
             flash("Logged in successfully!", "success")
 
             if user.role == "admin":
-                return redirect(url_for("manage_videos"))
+                return redirect(url_for("main.manage_videos"))
             else:
-                return redirect(url_for("uploader_dashboard"))
+                return redirect(url_for("main.uploader_dashboard"))
 
         flash("Invalid credentials.", "danger")
 
     return render_template("admin_login.html")
 
-@app.route("/admin/create-user", methods=["POST"])
+@main.route("/admin/create-user", methods=["POST"])
 @admin_required
 def create_user():
     username = request.form.get("username")
@@ -321,11 +466,11 @@ def create_user():
 
     if not email:
         flash("Email is required.", "danger")
-        return redirect(url_for("manage_videos"))
+        return redirect(url_for("main.manage_videos"))
 
     if User.query.filter_by(username=username).first():
         flash("User already exists.", "warning")
-        return redirect(url_for("manage_videos"))
+        return redirect(url_for("main.manage_videos"))
 
     user = User(
         username=username,
@@ -337,24 +482,61 @@ def create_user():
     db.session.commit()
 
     flash("User created successfully.", "success")
-    return redirect(url_for("manage_videos"))
+    return redirect(url_for("main.manage_videos"))
 
-@app.route("/logout", endpoint="admin_logout")
+@main.route("/logout", endpoint="admin_logout")
 def logout():
     session.clear()
     flash("Logged out successfully.", "success")
-    return redirect(url_for("admin_login"))
+    return redirect(url_for("main.admin_login"))
 
-@app.route("/admin/videos")
+@main.route("/admin/videos")
 @admin_required
 def manage_videos():
+    # The table itself is filled page by page from admin_videos_api.
     return render_template(
         "admin_videos.html",
-        videos=Video.query.order_by(Video.date_added.desc()).all(),
-        categories=Category.query.order_by(Category.name.asc()).all()
+        categories=get_category_tree().by_name,
+        uploaders=User.query.order_by(User.username).all(),
+        sorts=VIDEO_SORTS
     )
 
-@app.route("/admin/videos/add", methods=["GET", "POST"])
+@main.route("/admin/api/videos")
+@admin_required
+def admin_videos_api():
+    try:
+        listing = VideoListing(request.args)
+        page = listing.page(request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"success": False, "message": "Invalid cursor."}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    viewers = unique_viewers.counts([v.id for v in page.items])
+    return jsonify({
+        "success": True,
+        "videos": [video_to_dict(v, view_counter.view_count, viewers[v.id]) for v in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "total": page.total
+    })
+
+@main.route("/admin/videos/import", methods=["POST"])
+@admin_required
+def import_videos_upload():
+    """Bulk-add videos from an uploaded CSV or JSONL file."""
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"success": False, "message": "Choose a CSV or JSONL file."}), 400
+    try:
+        fmt = detect_format(upload.filename, request.form.get("format"))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    report = import_videos(open_text(upload.stream), fmt, session.get("user_id"))
+    return jsonify({"success": True, **report.to_dict()})
+
+@main.route("/admin/videos/add", methods=["GET", "POST"])
 @uploader_or_admin_required
 def add_video():
     if request.method == "POST":
@@ -362,11 +544,11 @@ def add_video():
         video_id = extract_video_id(request.form.get("youtube_link", ""))
         if not video_id:
             flash("Invalid YouTube link.", "danger")
-            return redirect(url_for("manage_videos"))
+            return redirect(url_for("main.manage_videos"))
 
         if Video.query.filter_by(video_id=video_id).first():
             flash("Video already exists.", "warning")
-            return redirect(url_for("manage_videos"))
+            return redirect(url_for("main.manage_videos"))
 
         video = Video(
             title=request.form.get("title"),
@@ -378,32 +560,22 @@ def add_video():
             uploaded_by=session.get("user_id")
         )
 
-        # Save video first
+        # Save video; subscribers hear about it through their next digest
         db.session.add(video)
+        db.session.flush()
+        search_index.index_video(video)
+        related_videos.refresh(video.id)
+        mark_catalog_changed()
         db.session.commit()
+        outbox.wake()
+        thumbnails.warm(video.video_id)
         flash("Video added successfully ✅", "success")
 
-        # =========================
-        # Notify all subscribers
-        # =========================
-        subscribers = Subscriber.query.all()
-        for sub in subscribers:
-            try:
-                msg = Message(
-                    subject=f"New Video Added: {video.title}",
-                    recipients=[sub.email],
-                    body=f"Hello!\n\nA new video '{video.title}' has been added to GospelTube.\nWatch here: {url_for('video_page', video_id=video.video_id, _external=True)}\n\nBlessings,\nGospelTube Team"
-                )
-                mail.send(msg)
-            except Exception as e:
-                print(f"Notification email failed for {sub.email}: {e}")
-
-        return redirect(url_for("manage_videos"))
+        return redirect(url_for("main.manage_videos"))
 
     # ---- GET request → show upload form ----
-    categories = Category.query.order_by(Category.name.asc()).all()
-    return render_template("upload_video.html", categories=categories)
-@app.route("/create-uploader")
+    return render_template("upload_video.html", categories=get_category_tree().by_name)
+@main.route("/create-uploader")
 def create_uploader():
     from werkzeug.security import generate_password_hash
     user = User(username="john_uploader", password=generate_password_hash("Password123"), role="uploader")
@@ -413,19 +585,26 @@ def create_uploader():
 
 from datetime import datetime, timedelta
 
-@app.route("/uploader/dashboard")
+@main.route("/uploader/dashboard")
 def uploader_dashboard():
     if session.get("role") != "uploader":
-        return redirect(url_for("admin_login"))
+        return redirect(url_for("main.admin_login"))
 
-    videos = Video.query.filter_by(
-        uploaded_by=session.get("user_id")
-    ).order_by(Video.date_added.desc()).all()
+    uploader_id = session.get("user_id")
+    mine = Video.query.filter_by(uploaded_by=uploader_id)
+    try:
+        videos_page = keyset_paginate(
+            mine.options(joinedload(Video.category)), (Video.date_added, Video.id), per_page=20,
+            cursor=request.args.get("cursor"),
+            total=approximate_count(("uploader_videos", uploader_id), mine.count)
+        )
+    except InvalidCursor:
+        abort(400)
 
     now = datetime.utcnow()
 
     video_data = []
-    for v in videos:
+    for v in videos_page.items:
         editable = now <= v.date_added + timedelta(hours=48)
         video_data.append({
             "video": v,
@@ -434,13 +613,14 @@ def uploader_dashboard():
 
     return render_template(
         "uploader_dashboard.html",
-        video_data=video_data
+        video_data=video_data,
+        pagination=videos_page
     )
     #======================#
     # Notify all subscribers
     # =========================
     subscribers = Subscriber.query.all()
-@app.route("/admin/videos/<int:video_id>/edit", methods=["GET", "POST"], endpoint="edit_video")
+@main.route("/admin/videos/<int:video_id>/edit", methods=["GET", "POST"], endpoint="edit_video")
 def edit_video(video_id):
     video = Video.query.get_or_404(video_id)
 
@@ -449,14 +629,14 @@ def edit_video(video_id):
         # Check if uploader owns this video
         if video.uploaded_by != session.get("user_id"):
             flash("You cannot edit this video.", "danger")
-            return redirect(url_for("uploader_dashboard"))
+            return redirect(url_for("main.uploader_dashboard"))
 
         # Check if within 48 hours
         if datetime.utcnow() > video.date_added + timedelta(hours=48):
             flash("You can no longer edit this video (48 hours passed).", "warning")
-            return redirect(url_for("uploader_dashboard"))
+            return redirect(url_for("main.uploader_dashboard"))
 
-    categories = Category.query.order_by(Category.name.asc()).all()
+    categories = get_category_tree().by_name
 
     if request.method == "POST":
         video.title = request.form.get("title", video.title)
@@ -464,41 +644,60 @@ def edit_video(video_id):
         video.category_id = request.form.get("category_id") or None
         video.translated_link = request.form.get("drive_link")
         video.download_link = request.form.get("mediafire_link")
+        search_index.index_video(video)
+        related_videos.refresh(video.id)
+        mark_catalog_changed()
         db.session.commit()
         flash("Video updated successfully ✅", "success")
 
         # Redirect depending on role
         if session.get("role") == "admin":
-            return redirect(url_for("manage_videos"))
-        return redirect(url_for("uploader_dashboard"))
+            return redirect(url_for("main.manage_videos"))
+        return redirect(url_for("main.uploader_dashboard"))
 
     return render_template("admin_edit_video.html", video=video, categories=categories)
 
-@app.route("/admin/videos/<int:video_id>/delete", methods=["POST"], endpoint="delete_video")
+@main.route("/admin/videos/<int:video_id>/delete", methods=["POST"], endpoint="delete_video")
 def delete_video(video_id):
     video = Video.query.get_or_404(video_id)
 
     if session.get("role") == "uploader":
         if video.uploaded_by != session.get("user_id"):
             flash("You cannot delete this video.", "danger")
-            return redirect(url_for("uploader_dashboard"))
+            return redirect(url_for("main.uploader_dashboard"))
 
         if datetime.utcnow() > video.date_added + timedelta(hours=48):
             flash("You can no longer delete this video (48 hours passed).", "warning")
-            return redirect(url_for("uploader_dashboard"))
+            return redirect(url_for("main.uploader_dashboard"))
 
+    search_index.remove_video(video.id)
+    related_videos.forget(video.id)
+    forget_comments(video.id)
     db.session.delete(video)
+    mark_catalog_changed()
     db.session.commit()
     flash("Video deleted successfully ✅", "success")
 
     if session.get("role") == "admin":
-        return redirect(url_for("manage_videos"))
-    return redirect(url_for("uploader_dashboard"))
+        return redirect(url_for("main.manage_videos"))
+    return redirect(url_for("main.uploader_dashboard"))
+
+# =====================================================
+# ADMIN PERFORMANCE PAGE
+# =====================================================
+@main.route("/admin/perf")
+@admin_required
+def admin_perf():
+    return render_template(
+        "admin_perf.html",
+        summary=request_profiler.summary(),
+        admission=rate_limiter.summary()
+    )
 
 # =====================================================
 # ADMIN CATEGORY ROUTES
 # =====================================================
-@app.route("/admin/categories", methods=["GET", "POST"])
+@main.route("/admin/categories", methods=["GET", "POST"])
 @admin_required
 def manage_categories():
     if request.method == "POST":
@@ -506,10 +705,10 @@ def manage_categories():
         parent_id = request.form.get("parent_id") or None
         if not name:
             flash("Category name required.", "danger")
-            return redirect(url_for("manage_categories"))
+            return redirect(url_for("main.manage_categories"))
         if Category.query.filter_by(name=name).first():
             flash("Category already exists.", "warning")
-            return redirect(url_for("manage_categories"))
+            return redirect(url_for("main.manage_categories"))
         slug = slugify(name)
         counter = 1
         base_slug = slug
@@ -517,21 +716,24 @@ def manage_categories():
             slug = f"{base_slug}-{counter}"
             counter += 1
         db.session.add(Category(name=name, parent_id=parent_id, slug=slug))
+        mark_categories_changed()
+        mark_catalog_changed()
         db.session.commit()
         flash("Category added successfully.", "success")
-    return render_template("admin_categories.html", categories=Category.query.order_by(Category.name.asc()).all())
+    return render_template("admin_categories.html", categories=get_category_tree().by_name)
 
-@app.route("/admin/categories/<int:category_id>/edit", methods=["GET", "POST"])
+@main.route("/admin/categories/<int:category_id>/edit", methods=["GET", "POST"])
 @admin_required
 def edit_category(category_id):
     category = Category.query.get_or_404(category_id)
-    categories = Category.query.filter(Category.id != category.id).all()
+    categories = [c for c in get_category_tree().by_name if c.id != category.id]
     if request.method == "POST":
         name = request.form.get("name", "").strip()
         parent_id = request.form.get("parent_id") or None
         if not name:
             flash("Category name is required.", "danger")
-            return redirect(url_for("edit_category", category_id=category.id))
+            return redirect(url_for("main.edit_category", category_id=category.id))
+        renamed = name != category.name
         category.name = name
         new_slug = slugify(name)
         if new_slug != category.slug:
@@ -542,43 +744,136 @@ def edit_category(category_id):
                 counter += 1
             category.slug = new_slug
         category.parent_id = parent_id
+        if renamed:
+            search_index.reindex_category(category)
+        mark_categories_changed()
+        mark_catalog_changed()
         db.session.commit()
         flash("Category updated successfully ✅", "success")
-        return redirect(url_for("manage_categories"))
+        return redirect(url_for("main.manage_categories"))
     return render_template("admin_edit_category.html", category=category, categories=categories)
 
-@app.route("/admin/categories/<int:category_id>/delete", methods=["POST"], endpoint="delete_category")
+@main.route("/admin/categories/<int:category_id>/delete", methods=["POST"], endpoint="delete_category")
 @admin_required
 def delete_category(category_id):
     category = Category.query.get_or_404(category_id)
-    if category.videos:
+    if category.videos.first():
         flash("Cannot delete category with videos. Remove videos first.", "danger")
-        return redirect(url_for("manage_categories"))
-    if category.children:
+        return redirect(url_for("main.manage_categories"))
+    if get_category_tree().children_of(category.id):
         flash("Cannot delete category with subcategories.", "warning")
-        return redirect(url_for("manage_categories"))
+        return redirect(url_for("main.manage_categories"))
     db.session.delete(category)
+    mark_categories_changed()
+    mark_catalog_changed()
     db.session.commit()
     flash("Category deleted successfully ✅", "success")
-    return redirect(url_for("manage_categories"))
+    return redirect(url_for("main.manage_categories"))
 
 # =====================================================
 # VIEW ALL VIDEOS
 # =====================================================
-@app.route("/videos")
+@main.route("/videos")
 def view_all_videos():
-    page = request.args.get("page", 1, type=int)
-    per_page = 10
-    videos_pagination = Video.query.order_by(Video.date_added.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    return render_template("view_all.html", videos=videos_pagination.items, pagination=videos_pagination)
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            decode_cursor(cursor, 2)
+        except InvalidCursor:
+            abort(400)
+
+    def render():
+        return stream_page(
+            "view_all.html",
+            listing=lambda: keyset_paginate(
+                Video.query, (Video.date_added, Video.id), per_page=10,
+                cursor=cursor, total=count_all_videos()
+            ),
+            categories=get_category_tree().roots
+        )
+
+    return page_cache.respond(render)
+
+# =====================================================
+# CLI COMMANDS
+# =====================================================
+@main.cli.command("rebuild-search-index")
+def rebuild_search_index():
+    """Create the full-text search table if needed and re-index all videos."""
+    count = search_index.rebuild_index()
+    print(f"✅ Indexed {count} videos ({search_index.get_search_backend().name}).")
+
+@main.cli.command("rebuild-related")
+def rebuild_related():
+    """Recompute the related-videos lists for every video."""
+    print(f"✅ Stored {related_videos.rebuild()} related-video pairs.")
+
+@main.cli.command("warm-thumbnails")
+def warm_thumbnails():
+    """Fetch and resize the thumbnails of every video not cached yet."""
+    ready, failed = thumbnails.warm_catalog()
+    print(f"✅ {ready} thumbnails ready, {failed} could not be fetched.")
+
+@main.cli.command("import-videos")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Default: from the file extension.")
+@click.option("--uploader", default="admin", show_default=True, help="Username the videos are credited to.")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per transaction.")
+def import_videos_command(path, fmt, uploader, batch_size):
+    """Add videos from a CSV or JSONL file of YouTube links (columns:
+    youtube_link, title, description, category slug)."""
+    user = User.query.filter_by(username=uploader).first()
+    if user is None:
+        raise click.ClickException(f"No user named {uploader!r}.")
+    try:
+        fmt = detect_format(path, fmt)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        report = import_videos(fh, fmt, user.id, batch_size)
+    for error in report.errors:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    print(f"✅ Imported {report.imported} videos ({report.duplicates} duplicates, {len(report.errors)} errors).")
+
+@main.cli.command("build-assets")
+def build_assets():
+    """Build the fingerprinted CSS/JS bundles into static/dist."""
+    manifest = assets.build()
+    print(f"✅ Built {len(manifest)} bundles into {current_app.config['ASSETS_OUTPUT_DIR']}.")
+
+@main.cli.command("send-digests")
+def send_digests():
+    """Queue digest emails for every subscriber that is due."""
+    print(f"✅ Queued {run_digests(outbox)} digest emails.")
+
+@main.cli.command("create-admin")
+def create_admin():
+    """Create the default admin account unless an admin exists."""
+    create_admin_user()
+
+@main.cli.command("warm-up")
+def warm_up_command():
+    """Prime this process's caches and report how long each step took."""
+    for step, seconds in warm_up(current_app._get_current_object()).items():
+        print(f"{step:<16} {seconds * 1000:8.1f} ms")
+
+@main.cli.command("outbox-worker")
+@click.option("--once", is_flag=True, help="Send everything that is due, then exit.")
+def outbox_worker(once):
+    """Send queued emails (run with OUTBOX_WORKER=cli)."""
+    if once:
+        print(f"✅ Processed {outbox.run_pending()} outbox messages.")
+    else:
+        outbox.serve_forever()
 
 # =====================================================
 # RUN APP (Render-ready)
 # =====================================================
 if __name__ == "__main__":
+    # The schema comes from `flask --app app db upgrade`.
+    app = create_app()
     with app.app_context():
-        db.create_all()
         create_admin_user()
 
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
-    
\ No newline at end of file
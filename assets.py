@@ -0,0 +1,204 @@
+# assets.py
+import functools
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+# bundle name -> source files (under ASSETS_SOURCE_DIR), concatenated in order
+BUNDLES = {
+    "base.css": ["css/base.css"],
+    "index.css": ["css/index.css"],
+    "search_results.css": ["css/search_results.css"],
+    "category_landing_page.css": ["css/category_landing_page.css"],
+    "category_page.css": ["css/category_page.css"],
+    "category_videos.css": ["css/category_videos.css"],
+    "video.css": ["css/video.css"],
+    "video.js": ["js/video.js"],
+    "view_all.css": ["css/view_all.css"],
+    "view_all.js": ["js/view_all.js"],
+}
+MANIFEST = "manifest.json"
+# Precompressed variants, best first: (Content-Encoding, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@functools.cache
+def brotli():
+    """The optional brotli module, or None (then only .gz files are built)."""
+    try:
+        import brotli as module
+    except ImportError:
+        return None
+    return module
+
+
+# =====================================================
+# MINIFYING
+# =====================================================
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    """Drop indentation, blank lines and whole-line // comments. Line breaks
+    stay, so automatic semicolon insertion still sees the same code."""
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# =====================================================
+# BUILDING
+# =====================================================
+def _write(path, data):
+    if os.path.exists(path):
+        return  # content-addressed: the same name always holds the same bytes
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(source_dir, output_dir, bundles=BUNDLES):
+    """Concatenate and minify every bundle into `output_dir` as
+    ``<name>.<hash>.<ext>`` plus .gz (and .br with brotli installed)
+    variants, then write the manifest. Returns {bundle: built file name}.
+
+    Files from earlier builds are left in place, so pages rendered before
+    a deploy can still load theirs."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+    for name, sources in bundles.items():
+        stem, ext = os.path.splitext(name)
+        text = "\n".join(_read(os.path.join(source_dir, source)) for source in sources)
+        body = MINIFIERS[ext](text).encode()
+        filename = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+        path = os.path.join(output_dir, filename)
+        _write(path, body)
+        _write(path + ".gz", gzip.compress(body, 9, mtime=0))
+        if brotli() is not None:
+            _write(path + ".br", brotli().compress(body))
+        manifest[name] = filename
+
+    tmp = os.path.join(output_dir, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(output_dir, MANIFEST))
+    return manifest
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# =====================================================
+# SERVING
+# =====================================================
+class Assets:
+    """Fingerprinted CSS/JS bundles built from the files in assets/.
+
+    ``static_url('video.css')`` (a template global) gives the URL of the
+    current build, e.g. /static/dist/video.3f2a9c0d1b7e.css. Built files
+    never change, so they are served with a one-year ``immutable``
+    Cache-Control, and from the precompressed .br/.gz variant the client
+    accepts. A front-end server can serve static/dist/ directly (e.g. nginx
+    gzip_static/brotli_static) with the same headers.
+
+    Build with ``flask build-assets`` when deploying. With ASSETS_AUTO_BUILD
+    the first static_url() call builds a missing or outdated manifest, and
+    in debug mode every call rebuilds when a source file changed.
+
+    Config:
+        ASSETS_SOURCE_DIR   bundle sources (default: <root>/assets)
+        ASSETS_OUTPUT_DIR   built files and manifest (default: <static>/dist)
+        ASSETS_AUTO_BUILD   build on first use when needed
+        ASSETS_MAX_AGE      Cache-Control max-age of built files
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._built_at = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ASSETS_SOURCE_DIR", os.path.join(app.root_path, "assets"))
+        app.config.setdefault("ASSETS_OUTPUT_DIR", os.path.join(app.root_path, "static", "dist"))
+        app.config.setdefault("ASSETS_AUTO_BUILD", True)
+        app.config.setdefault("ASSETS_MAX_AGE", 365 * 24 * 3600)
+        app.extensions["assets"] = self
+        self.app = app
+        self._manifest = None
+        app.add_template_global(self.url, "static_url")
+
+    # ---- manifest --------------------------------------------------
+    def _sources_changed_since(self, when):
+        source_dir = self.app.config["ASSETS_SOURCE_DIR"]
+        return any(os.path.getmtime(os.path.join(source_dir, source)) > when
+                   for sources in BUNDLES.values() for source in sources)
+
+    def build(self):
+        config = self.app.config
+        with self._lock:
+            self._manifest = build(config["ASSETS_SOURCE_DIR"], config["ASSETS_OUTPUT_DIR"])
+            self._built_at = os.path.getmtime(os.path.join(config["ASSETS_OUTPUT_DIR"], MANIFEST))
+        return self._manifest
+
+    def manifest(self):
+        """{bundle: built file name}, loaded once per process."""
+        manifest = self._manifest
+        if manifest is not None and not (self.app.debug and self._sources_changed_since(self._built_at)):
+            return manifest
+
+        config = self.app.config
+        path = os.path.join(config["ASSETS_OUTPUT_DIR"], MANIFEST)
+        if config["ASSETS_AUTO_BUILD"] and (
+                not os.path.exists(path) or self._sources_changed_since(os.path.getmtime(path))):
+            return self.build()
+        with self._lock:
+            with open(path) as f:
+                self._manifest = json.load(f)
+            self._built_at = os.path.getmtime(path)
+        return self._manifest
+
+    # ---- template helper -------------------------------------------
+    def url(self, name):
+        return url_for("main.asset", filename=self.manifest()[name])
+
+    # ---- serving ---------------------------------------------------
+    def respond(self, filename):
+        path = safe_join(self.app.config["ASSETS_OUTPUT_DIR"], filename)
+        if path is None or filename == MANIFEST or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.isfile(path + suffix):
+                encoding, path = name, path + suffix
+                break
+
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True,
+                             max_age=self.app.config["ASSETS_MAX_AGE"])
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,250 @@
+let player;
+const relatedVideos = Array.from(document.querySelectorAll(".related-video"), card => ({
+    id: card.dataset.videoId,
+    title: card.dataset.videoTitle
+}));
+let currentIndex = 0;
+
+// Initialize YouTube Player
+function onYouTubeIframeAPIReady() {
+    player = new YT.Player('player', {
+        videoId: document.getElementById("player").dataset.videoId,
+        events: {
+            'onStateChange': onPlayerStateChange
+        }
+    });
+}
+
+// Auto-play next video when current ends
+function onPlayerStateChange(event) {
+    if (event.data === YT.PlayerState.ENDED) {
+        playNextVideo();
+    }
+}
+
+function playNextVideo() {
+    currentIndex++;
+    if(currentIndex >= relatedVideos.length) currentIndex = 0; // loop to first
+    const nextVideo = relatedVideos[currentIndex];
+    player.loadVideoById(nextVideo.id);
+    document.getElementById("mainVideoTitle").textContent = nextVideo.title;
+}
+
+// SHARE + RELATED VIDEOS CLICK & HOVER
+document.addEventListener("DOMContentLoaded", () => {
+
+  const shareBtn = document.getElementById("shareBtn");
+  const modal = document.getElementById("shareModal");
+  const linkInput = document.getElementById("shareLink");
+
+  function isMobile() { return /Android|iPhone|iPad|iPod/i.test(navigator.userAgent); }
+
+  shareBtn.addEventListener("click", async () => {
+      const url = window.location.href;
+      const title = document.title;
+      if (isMobile() && navigator.share) {
+          try { await navigator.share({title, url}); return; } 
+          catch { openShareModal(title, url); }
+      } else { openShareModal(title, url); }
+  });
+
+  function openShareModal(title, url) {
+      linkInput.value = url;
+      modal.style.display = "flex";
+      document.getElementById("wa").href = `https://wa.me/?text=${encodeURIComponent(title + " " + url)}`;
+      document.getElementById("fb").href = `https://www.facebook.com/sharer/sharer.php?u=${encodeURIComponent(url)}`;
+      document.getElementById("tw").href = `https://twitter.com/intent/tweet?text=${encodeURIComponent(title)}&url=${encodeURIComponent(url)}`;
+      document.getElementById("tg").href = `https://t.me/share/url?url=${encodeURIComponent(url)}&text=${encodeURIComponent(title)}`;
+      document.getElementById("em").href = `mailto:?subject=${encodeURIComponent(title)}&body=${encodeURIComponent(url)}`;
+  }
+
+  document.getElementById("closeShare").addEventListener("click", () => { modal.style.display = "none"; });
+  document.getElementById("copyBtn").addEventListener("click", async () => {
+      try { await navigator.clipboard.writeText(linkInput.value); alert("Link copied!"); }
+      catch { linkInput.select(); document.execCommand("copy"); alert("Link copied!"); }
+  });
+
+  const relatedCards = document.querySelectorAll(".related-video");
+  relatedCards.forEach((card, index) => {
+      const videoId = card.dataset.videoId;
+      const videoTitle = card.dataset.videoTitle;
+
+      // Update main video on click
+      card.addEventListener("click", () => {
+          player.loadVideoById(videoId);
+          document.getElementById("mainVideoTitle").textContent = videoTitle;
+          currentIndex = index;
+      });
+
+      // Hover preview
+      let previewIframe;
+      card.addEventListener("mouseenter", () => {
+          if(!previewIframe){
+              previewIframe = document.createElement("iframe");
+              previewIframe.src = `https://www.youtube.com/embed/${videoId}?autoplay=1&mute=1&controls=0&rel=0`;
+              previewIframe.style.position = "absolute";
+              previewIframe.style.top = 0;
+              previewIframe.style.left = 0;
+              previewIframe.style.width = "100%";
+              previewIframe.style.height = "100%";
+              previewIframe.style.borderRadius = "8px";
+              previewIframe.style.pointerEvents = "none";
+              card.appendChild(previewIframe);
+              card.querySelector(".related-thumb").style.display = "none";
+          } else { previewIframe.style.display = "block"; card.querySelector(".related-thumb").style.display = "none"; }
+      });
+
+      card.addEventListener("mouseleave", () => {
+          if(previewIframe) previewIframe.style.display = "none";
+          card.querySelector(".related-thumb").style.display = "block";
+      });
+  });
+
+document.addEventListener("DOMContentLoaded", () => {
+
+    const likeBtn = document.getElementById("likeBtn");
+    const likeCountSpan = document.getElementById("likeCount");
+
+    if (!likeBtn || !likeCountSpan) return;
+
+    const videoId = likeBtn.dataset.videoId;
+
+    likeBtn.addEventListener("click", async () => {
+
+        try {
+
+            const response = await fetch(`/like_video/${videoId}`, {
+                method: "POST"
+            });
+
+            const data = await response.json();
+
+            if (data.success) {
+
+                // update likes number
+                likeCountSpan.textContent = data.likes;
+
+                likeBtn.disabled = true;
+
+            } else {
+                alert("Failed to like the video.");
+            }
+
+        } catch (error) {
+            console.error(error);
+            alert("Server error while liking.");
+        }
+
+    });
+
+});
+  // COMMENTS: later pages and the other order are fetched as JSON
+  const commentBox = document.getElementById("comments");
+  const commentList = document.getElementById("commentList");
+  const moreComments = document.getElementById("moreComments");
+  const commentOrder = document.getElementById("commentOrder");
+  let commentCursor = commentBox.dataset.nextCursor;
+
+  function commentElement(comment) {
+      const item = document.createElement("div");
+      item.className = "comment";
+      const author = document.createElement("span");
+      author.className = "comment-author";
+      author.textContent = comment.author;
+      const time = document.createElement("span");
+      time.className = "comment-time";
+      time.textContent = comment.timestamp.slice(0, 16).replace("T", " ");
+      const content = document.createElement("div");
+      content.className = "comment-content";
+      content.textContent = comment.content;
+      item.append(author, time, content);
+      return item;
+  }
+
+  async function loadComments(reset) {
+      const params = new URLSearchParams({ order: commentOrder.value });
+      if (!reset && commentCursor) params.set("cursor", commentCursor);
+      try {
+          const response = await fetch(`${commentBox.dataset.url}?${params}`);
+          const data = await response.json();
+          if (!data.success) return;
+          if (reset) commentList.replaceChildren();
+          data.comments.forEach(comment => commentList.append(commentElement(comment)));
+          commentCursor = data.next_cursor;
+          moreComments.hidden = !commentCursor;
+      } catch (err) {
+          console.error(err);
+      }
+  }
+
+  moreComments.addEventListener("click", () => loadComments(false));
+  commentOrder.addEventListener("change", () => loadComments(true));
+
+  document.getElementById("commentForm").addEventListener("submit", async (event) => {
+      event.preventDefault();
+      const content = document.getElementById("commentContent");
+      const name = document.getElementById("commentName");
+      try {
+          const response = await fetch(commentBox.dataset.url, {
+              method: "POST",
+              headers: {"Content-Type": "application/json"},
+              body: JSON.stringify({ content: content.value, name: name ? name.value : "" })
+          });
+          const data = await response.json();
+          if (!data.success) {
+              alert(data.message || "Could not post the comment.");
+              return;
+          }
+          if (commentOrder.value === "newest") commentList.prepend(commentElement(data.comment));
+          document.getElementById("commentCount").textContent = data.comments_count;
+          content.value = "";
+      } catch (err) {
+          console.error(err);
+          alert("Error occurred. Please try again.");
+      }
+  });
+
+  // SUBSCRIBE BUTTON FUNCTIONALITY
+  const subscribeBtn = document.getElementById("subscribeBtn");
+  const subscribeModal = document.getElementById("subscribeModal");
+  const closeSubscribe = document.getElementById("closeSubscribe");
+  const subscribeConfirmBtn = document.getElementById("subscribeConfirmBtn");
+  const subscriberEmailInput = document.getElementById("subscriberEmail");
+
+  subscribeBtn.addEventListener("click", () => {
+      subscribeModal.style.display = "flex";
+  });
+
+  closeSubscribe.addEventListener("click", () => {
+      subscribeModal.style.display = "none";
+  });
+
+  subscribeConfirmBtn.addEventListener("click", async () => {
+      const email = subscriberEmailInput.value.trim();
+      if (!email || !/\S+@\S+\.\S+/.test(email)) {
+          alert("Please enter a valid email.");
+          return;
+      }
+
+      try {
+          const response = await fetch("/subscribe", {
+              method: "POST",
+              headers: {"Content-Type": "application/json"},
+              body: JSON.stringify({ email })
+          });
+
+          if (response.ok) {
+              alert("Thank you for subscribing!");
+              subscriberEmailInput.value = "";
+              subscribeModal.style.display = "none";
+          } else {
+              const data = await response.json();
+              alert(data.message || "Subscription failed. Try again.");
+          }
+      } catch (err) {
+          console.error(err);
+          alert("Error occurred. Please try again.");
+      }
+  });
+
+});
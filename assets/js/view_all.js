@@ -0,0 +1,7 @@
+function scrollRow(button, distance) {
+    const row = button.closest('.section-header').nextElementSibling;
+    row.scrollBy({
+        left: distance,
+        behavior: 'smooth'
+    });
+}
@@ -0,0 +1,7 @@
+"""Synthetic catalog generator and per-route benchmark for app.py.
+
+    python -m benchmarks                         # seed a temp SQLite db and report JSON
+    python -m benchmarks --database-url postgresql://... --reset
+    python -m benchmarks --check                 # fail on routes over benchmarks/budgets.json
+    python -m benchmarks --update-budgets        # re-record budgets after an intended change
+"""
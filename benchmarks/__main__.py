@@ -0,0 +1,129 @@
+# benchmarks/__main__.py
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import click
+
+DEFAULT_CATALOG = {"categories": 40, "videos": 5000, "uploaders": 20, "subscribers": 2000, "seed": 1234}
+DEFAULT_BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+
+
+def _print_table(results, stream):
+    header = f"{'route':<24} {'method':<6} {'status':<9} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'rows':>8}"
+    click.echo(header, file=stream)
+    click.echo("-" * len(header), file=stream)
+    for name, r in results.items():
+        status = ",".join(str(s) for s in r["statuses"])
+        click.echo(f"{name:<24} {r['method']:<6} {status:<9} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                   f"{r['queries']:>8} {r['rows']:>8}", file=stream)
+
+
+@click.command()
+@click.option("--database-url", help="Target database (default: a fresh SQLite file in a temp dir).")
+@click.option("--reset", is_flag=True, help="Drop and recreate every table before seeding.")
+@click.option("--categories", type=int, help="Categories to generate (two-level tree).")
+@click.option("--videos", type=int, help="Videos to generate.")
+@click.option("--uploaders", type=int, help="Uploader accounts to generate.")
+@click.option("--subscribers", type=int, help="Subscribers to generate.")
+@click.option("--seed", type=int, help="Random seed for the catalog.")
+@click.option("--iterations", default=20, show_default=True, help="Measured requests per route.")
+@click.option("--warmup", default=2, show_default=True, help="Unmeasured requests per route.")
+@click.option("--route", "routes", multiple=True, help="Only run these scenarios (repeatable).")
+@click.option("--page-cache/--no-page-cache", default=False, show_default=True,
+              help="Serve anonymous pages from the page cache while measuring.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the JSON report here instead of stdout.")
+@click.option("--budgets", "budgets_path", default=DEFAULT_BUDGETS, show_default=True,
+              type=click.Path(dir_okay=False), help="Budget file used by --check / --update-budgets.")
+@click.option("--check", is_flag=True, help="Exit 1 if any route exceeds its budget.")
+@click.option("--update-budgets", is_flag=True, help="Rewrite the budget file from this run.")
+@click.option("--no-latency-budget", is_flag=True, help="With --check, only enforce query and row budgets.")
+def main(database_url, reset, categories, videos, uploaders, subscribers, seed, iterations, warmup,
+         routes, page_cache, output, budgets_path, check, update_budgets, no_latency_budget):
+    """Seed a synthetic catalog and measure every route of app.py."""
+    budgets = None
+    if check:
+        from benchmarks.runner import load_budgets
+        budgets = load_budgets(budgets_path)
+
+    # Sizes default to the budget file's catalog so that checks compare like with like.
+    catalog_args = dict(DEFAULT_CATALOG, **(budgets or {}).get("catalog", {}))
+    for name, value in (("categories", categories), ("videos", videos), ("uploaders", uploaders),
+                        ("subscribers", subscribers), ("seed", seed)):
+        if value is not None:
+            catalog_args[name] = value
+    catalog_args = {k: catalog_args[k] for k in DEFAULT_CATALOG}
+
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="gospeltube-bench-"), "bench.db")
+    from app import create_app
+    from benchmarks.catalog import generate_catalog, sample_thumbnail
+    from benchmarks.runner import budgets_from, check_budgets, run_all, uncovered_endpoints
+    from models import db, Video
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_url, "PAGE_CACHE_ENABLED": page_cache,
+        "OUTBOX_WORKER": "cli", "MAIL_SUPPRESS_SEND": True,
+        "THUMBNAIL_DIR": tempfile.mkdtemp(prefix="gospeltube-thumbs-"), "THUMBNAIL_WORKER": "inline",
+        "ASSETS_OUTPUT_DIR": tempfile.mkdtemp(prefix="gospeltube-assets-"),
+        "JINJA_BYTECODE_CACHE_DIR": tempfile.mkdtemp(prefix="gospeltube-jinja-"),
+        # Every scenario comes from one address; the limiter would answer 429 after a few.
+        "RATE_LIMIT_ENABLED": False,
+    })
+    app.extensions["thumbnails"].fetcher = sample_thumbnail
+    # The report already has per-route numbers; keep the slow-request log quiet.
+    logging.getLogger("gospeltube.perf").setLevel(logging.ERROR)
+
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        db.create_all()  # scratch databases skip the migrations
+        if db.session.query(Video.id).first() is None:
+            click.echo(f"Seeding {catalog_args} into {db.engine.url.render_as_string()}", err=True)
+            catalog = generate_catalog(**catalog_args)
+        else:
+            click.echo("Database already has videos; measuring the existing data.", err=True)
+            catalog = {"reused": True, "videos": Video.query.count()}
+        dialect = db.engine.dialect.name
+
+    results = run_all(app, iterations=iterations, warmup=warmup, only=set(routes))
+    report = {
+        "meta": {
+            "database": dialect,
+            "catalog": catalog,
+            "iterations": iterations,
+            "warmup": warmup,
+            "page_cache": page_cache,
+            "python": sys.version.split()[0],
+            "uncovered_endpoints": uncovered_endpoints(app, results) if not routes else [],
+        },
+        "routes": results,
+    }
+
+    _print_table(results, sys.stderr)
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        click.echo(payload)
+
+    if update_budgets:
+        with open(budgets_path, "w") as fh:
+            json.dump(budgets_from(results, catalog_args), fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        click.echo(f"Budgets written to {budgets_path}", err=True)
+
+    if check:
+        failures = check_budgets(results, budgets, check_latency=not no_latency_budget)
+        for failure in failures:
+            click.echo(f"BUDGET EXCEEDED  {failure}", err=True)
+        if failures:
+            sys.exit(1)
+        click.echo("All routes within budget.", err=True)
+
+
+if __name__ == "__main__":
+    main()
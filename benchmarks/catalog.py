@@ -0,0 +1,150 @@
+# benchmarks/catalog.py
+import io
+import random
+import string
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+import search as search_index
+from category_tree import mark_categories_changed
+from models import db, Category, Comment, Subscriber, User, Video
+from page_cache import mark_catalog_changed
+
+ADMIN_USERNAME = "bench-admin"
+PASSWORD = "bench-password"
+MAX_COMMENTS = 20000
+
+WORDS = (
+    "grace amazing worship praise glory holy spirit faith hope love light "
+    "king jesus lord mercy psalm hymn choir live acoustic gospel revival "
+    "morning evening prayer blessing victory heaven river fire mountain "
+    "song sermon testimony anointing shepherd kingdom promise joy peace"
+).split()
+
+
+def _title(rng, words=4):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def _youtube_id(rng):
+    return "".join(rng.choice(string.ascii_letters + string.digits + "-_") for _ in range(11))
+
+
+def sample_thumbnail(video_id):
+    """Stand-in for YouTube's thumbnail so benchmarks stay offline."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1280, 720), (hash(video_id) % 256, 80, 160)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _insert(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[start:start + batch_size])
+
+
+# =====================================================
+# SYNTHETIC CATALOG
+# =====================================================
+def generate_catalog(categories=40, videos=5000, uploaders=20, subscribers=2000,
+                     seed=1234, batch_size=1000, now=None):
+    """Fill an empty database with a reproducible catalog.
+
+    Categories form a two-level tree (about one root per five categories),
+    videos get a long-tailed view distribution and dates over two years,
+    and one comment per 20 views (the most viewed get thousands).
+    Returns a summary dict of what was written."""
+    if db.session.query(Video.id).first() is not None:
+        raise RuntimeError("Refusing to seed a database that already has videos.")
+
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    password = generate_password_hash(PASSWORD)
+
+    _insert(User, [{
+        "username": ADMIN_USERNAME, "email": "bench-admin@example.com",
+        "password": password, "role": "admin", "created_at": now,
+    }] + [{
+        "username": f"uploader-{n}", "email": f"uploader-{n}@example.com",
+        "password": password, "role": "uploader", "created_at": now,
+    } for n in range(uploaders)], batch_size)
+    uploader_ids = [row[0] for row in db.session.query(User.id).filter(User.role == "uploader")]
+
+    roots = max(1, categories // 5)
+    _insert(Category, [
+        {"name": f"Category {n}", "slug": f"category-{n}", "parent_id": None}
+        for n in range(roots)
+    ], batch_size)
+    root_ids = [row[0] for row in db.session.query(Category.id)]
+    _insert(Category, [
+        {"name": f"Category {n}", "slug": f"category-{n}", "parent_id": rng.choice(root_ids)}
+        for n in range(roots, categories)
+    ], batch_size)
+    category_ids = [row[0] for row in db.session.query(Category.id)]
+
+    seen_ids = set()
+    video_rows = []
+    for n in range(videos):
+        video_id = _youtube_id(rng)
+        while video_id in seen_ids:
+            video_id = _youtube_id(rng)
+        seen_ids.add(video_id)
+        views = int(rng.paretovariate(1.1) * 20) - 20
+        added = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        video_rows.append({
+            "title": _title(rng, rng.randint(2, 6)),
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))),
+            "video_id": video_id,
+            "category_id": rng.choice(category_ids),
+            "uploaded_by": rng.choice(uploader_ids),
+            "views": views,
+            "likes_count": int(views * rng.uniform(0, 0.05)),
+            "comments_count": min(views // 20, MAX_COMMENTS),
+            "last_watched": added + (now - added) * rng.random() if views else None,
+            "date_added": added,
+        })
+    _insert(Video, video_rows, batch_size)
+
+    # A separate stream, so the videos stay what they were before comments.
+    comment_rng = random.Random(seed + 1)
+    comment_rows = []
+    for video_pk, count, added in db.session.query(Video.id, Video.comments_count, Video.date_added)\
+            .filter(Video.comments_count > 0):
+        comment_rows.extend({
+            "video_id": video_pk,
+            "content": " ".join(comment_rng.choice(WORDS) for _ in range(comment_rng.randint(3, 30))),
+            "author_name": f"Visitor {comment_rng.randrange(10000)}",
+            "timestamp": added + (now - added) * comment_rng.random(),
+        } for _ in range(count))
+    _insert(Comment, comment_rows, batch_size)
+
+    frequencies = ("immediate", "hourly", "daily")
+    _insert(Subscriber, [{
+        "email": f"subscriber-{n}@example.com",
+        "date_subscribed": now,
+        "digest_frequency": rng.choice(frequencies),
+        "last_digest_at": now,
+        "next_digest_at": now,
+    } for n in range(subscribers)], batch_size)
+
+    mark_categories_changed()
+    mark_catalog_changed()
+    db.session.commit()
+    indexed = search_index.rebuild_index()
+    related = current_app.extensions["related_videos"].rebuild()
+
+    return {
+        "seed": seed,
+        "categories": categories,
+        "root_categories": roots,
+        "videos": videos,
+        "uploaders": uploaders,
+        "subscribers": subscribers,
+        "comments": len(comment_rows),
+        "indexed": indexed,
+        "related_pairs": related,
+    }
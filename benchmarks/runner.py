@@ -0,0 +1,205 @@
+# benchmarks/runner.py
+import json
+import threading
+import time
+
+from sqlalchemy import event
+
+from benchmarks.scenarios import SCENARIOS, SKIPPED_ENDPOINTS, Fixtures
+from models import db
+
+
+# =====================================================
+# SQL PROBE
+# =====================================================
+class _CountingCursor:
+    """DB-API cursor proxy that counts rows handed back to SQLAlchemy."""
+
+    def __init__(self, cursor, probe):
+        self._cursor = cursor
+        self._probe = probe
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._probe.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._probe.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._probe.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._probe.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLProbe:
+    """Counts statements and fetched rows issued by the measuring thread
+    (background flushes from other threads are ignored)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.rows = 0
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(self.engine, "after_cursor_execute", self._after_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "after_cursor_execute", self._after_execute)
+
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() != self._thread:
+            return
+        self.statements += 1
+        if context is not None and cursor.description is not None:
+            context.cursor = _CountingCursor(cursor, self)
+
+
+# =====================================================
+# RUNNING SCENARIOS
+# =====================================================
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _client(app, role, fixtures):
+    client = app.test_client()
+    if role is not None:
+        with client.session_transaction() as session:
+            session["user_id"] = fixtures.admin_id if role == "admin" else fixtures.uploader_id
+            session["role"] = role
+    return client
+
+
+def run_scenario(app, scenario, fixtures, probe, iterations=20, warmup=2):
+    timings, statements, rows, statuses = [], [], [], []
+
+    for n in range(warmup + iterations):
+        # Every request comes from a fresh visitor, as on a first page view.
+        client = _client(app, scenario.role, fixtures)
+        request = scenario.build(fixtures)
+        db.session.remove()
+
+        probe.reset()
+        started = time.perf_counter()
+        response = client.open(
+            request["path"], method=scenario.method,
+            data=request.get("data"), json=request.get("json"), headers=request.get("headers")
+        )
+        response.get_data()  # streamed pages run their queries while the body is read
+        elapsed = time.perf_counter() - started
+        response.close()
+
+        if n < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        statements.append(probe.statements)
+        rows.append(probe.rows)
+        statuses.append(response.status_code)
+
+    unexpected = sorted({s for s in statuses if s not in scenario.expect})
+    return {
+        "endpoint": _endpoint(app, scenario.method, request["path"]),
+        "method": scenario.method,
+        "path": request["path"],
+        "role": scenario.role,
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "max_ms": round(max(timings), 3),
+        # Median, so an occasional cache refresh does not move the budget.
+        "queries": int(percentile(statements, 0.50)),
+        "max_queries": max(statements),
+        "rows": int(percentile(rows, 0.50)),
+        "max_rows": max(rows),
+        "statuses": sorted(set(statuses)),
+        "unexpected_statuses": unexpected,
+    }
+
+
+def _endpoint(app, method, path):
+    adapter = app.url_map.bind("localhost")
+    endpoint, _ = adapter.match(path.split("?", 1)[0], method=method)
+    return endpoint
+
+
+def uncovered_endpoints(app, results):
+    """Endpoints in the URL map that no scenario (or skip entry) exercised."""
+    covered = set(SKIPPED_ENDPOINTS) | {r["endpoint"] for r in results.values()}
+    return sorted({rule.endpoint for rule in app.url_map.iter_rules()} - covered)
+
+
+def run_all(app, iterations=20, warmup=2, only=None):
+    with app.app_context():
+        fixtures = Fixtures()
+        results = {}
+        with SQLProbe(db.engine) as probe:
+            for scenario in SCENARIOS:
+                if only and scenario.name not in only:
+                    continue
+                results[scenario.name] = run_scenario(app, scenario, fixtures, probe, iterations, warmup)
+        db.session.remove()
+    return results
+
+
+# =====================================================
+# REGRESSION BUDGETS
+# =====================================================
+def load_budgets(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def budgets_from(results, catalog, latency_headroom=2.0, latency_floor_ms=5.0):
+    """Budgets that the current results pass. Query counts are exact; rows
+    and latency get headroom because they vary with data and machine."""
+    routes = {}
+    for name, result in sorted(results.items()):
+        routes[name] = {
+            "max_queries": result["queries"],
+            "max_rows": int(result["rows"] * 1.1) + 10,
+            "max_p95_ms": round(max(result["p95_ms"] * latency_headroom,
+                                    result["p95_ms"] + latency_floor_ms), 1),
+        }
+    return {"catalog": catalog, "routes": routes}
+
+
+def check_budgets(results, budgets, check_latency=True):
+    """Human-readable budget violations; an empty list means pass."""
+    failures = []
+    for name, result in sorted(results.items()):
+        if result["unexpected_statuses"]:
+            failures.append(f"{name}: unexpected status {result['unexpected_statuses']}")
+        budget = budgets.get("routes", {}).get(name)
+        if budget is None:
+            continue
+        if result["queries"] > budget.get("max_queries", float("inf")):
+            failures.append(f"{name}: {result['queries']} queries > budget {budget['max_queries']}")
+        if result["rows"] > budget.get("max_rows", float("inf")):
+            failures.append(f"{name}: {result['rows']} rows > budget {budget['max_rows']}")
+        if check_latency and result["p95_ms"] > budget.get("max_p95_ms", float("inf")):
+            failures.append(f"{name}: p95 {result['p95_ms']}ms > budget {budget['max_p95_ms']}ms")
+    return failures
@@ -0,0 +1,194 @@
+# benchmarks/scenarios.py
+import io
+import itertools
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func
+
+import search as search_index
+from benchmarks.catalog import ADMIN_USERNAME, PASSWORD
+from models import db, Category, Comment, User, Video
+from pagination import NEXT, encode_cursor
+
+SEARCH_QUERY = "grace"
+
+# Routes deliberately left out of the run, with the reason.
+SKIPPED_ENDPOINTS = {
+    "static": "served by the web server in production",
+    "main.create_uploader": "debug route that always inserts the same user",
+}
+
+
+class Fixtures:
+    """Ids and slugs picked from the seeded catalog, plus unique-name helpers
+    for scenarios that insert rows on every iteration."""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+        self.admin_id = db.session.query(User.id).filter_by(username=ADMIN_USERNAME).scalar()
+        self.uploader_id = db.session.query(User.id).filter_by(role="uploader").order_by(User.id).limit(1).scalar()
+
+        popular = Video.query.order_by(Video.views.desc(), Video.id).first()
+        tail = Video.query.order_by(Video.views, Video.id).first()
+        self.popular_video = popular.video_id
+        self.tail_video = tail.video_id
+        self.video_pk = popular.id
+        # A full batch for the API lookup (API_BATCH_LIMIT ids).
+        self.api_batch_ids = ",".join(video_id for (video_id,) in
+                                      db.session.query(Video.video_id).order_by(Video.id).limit(200))
+
+        # The root with the most children makes the heaviest landing page.
+        root_id = db.session.query(Category.parent_id)\
+            .filter(Category.parent_id.isnot(None))\
+            .group_by(Category.parent_id)\
+            .order_by(func.count().desc(), Category.parent_id)\
+            .limit(1).scalar()
+        root = db.session.get(Category, root_id) if root_id else Category.query.first()
+        self.root_category_id, self.root_category_slug, self.root_category_name = root.id, root.slug, root.name
+        self.leaf_category_id = db.session.query(Category.id)\
+            .filter(Category.parent_id.isnot(None)).order_by(Category.id).limit(1).scalar() or root.id
+
+        # Cursors deep into the listings, as a visitor paging on would hold.
+        middle = Video.query.order_by(Video.date_added.desc(), Video.id.desc())\
+            .offset(Video.query.count() // 2).first()
+        self.deep_videos_cursor = encode_cursor(NEXT, [middle.date_added, middle.id])
+        self.asset_file = current_app.extensions["assets"].manifest()["video.js"]
+
+        # Halfway down the most commented thread.
+        middle = Comment.query.filter_by(video_id=popular.id)\
+            .order_by(Comment.timestamp.desc(), Comment.id.desc())\
+            .offset(popular.comments_count // 2).first()
+        self.deep_comments_cursor = encode_cursor(NEXT, [middle.timestamp, middle.id]) if middle else ""
+        backend = search_index.get_search_backend()
+        page, self.search_cursor = backend.search(SEARCH_QUERY), ""
+        for _ in range(2):  # the cursor that opens page 3
+            if page.has_next:
+                self.search_cursor = page.next_cursor
+                page = backend.search(SEARCH_QUERY, cursor=page.next_cursor)
+
+    def unique(self, prefix):
+        return f"{prefix}-{next(self._counter)}"
+
+    # ---- rows created outside the timed request --------------------
+    def throwaway_video(self):
+        video = Video(
+            title="Benchmark throwaway", video_id=self.unique("throwaway")[:50],
+            category_id=self.leaf_category_id, uploaded_by=self.admin_id,
+            date_added=datetime.utcnow()
+        )
+        db.session.add(video)
+        db.session.commit()
+        return video.id
+
+    def throwaway_category(self):
+        name = self.unique("Throwaway")
+        category = Category(name=name, slug=name.lower())
+        db.session.add(category)
+        db.session.commit()
+        return category.id
+
+
+class Scenario:
+    """One request shape. `build(fixtures)` runs untimed before every request
+    and returns the path plus optional form/json data and headers."""
+
+    def __init__(self, name, build, method="GET", role=None, expect=(200,)):
+        self.name = name
+        self.build = build
+        self.method = method
+        self.role = role
+        self.expect = tuple(expect)
+
+
+def _path(path):
+    return lambda fx: {"path": path}
+
+
+def _import_file(fx, rows=50):
+    """A CSV of new links plus one that is already in the catalog."""
+    lines = ["youtube_link,title,description,category"]
+    lines += [f"https://youtu.be/{fx.unique('import')},Imported {n},Bulk import,{fx.root_category_slug}"
+              for n in range(rows)]
+    lines.append(f"https://youtu.be/{fx.popular_video},Duplicate,,")
+    return {"path": "/admin/videos/import",
+            "data": {"file": (io.BytesIO("\n".join(lines).encode()), "videos.csv")}}
+
+
+SCENARIOS = (
+    # ---- public ----------------------------------------------------
+    Scenario("index", _path("/")),
+    Scenario("index_gzip", lambda fx: {"path": "/", "headers": {"Accept-Encoding": "gzip"}}),
+    Scenario("video_page", lambda fx: {"path": f"/video/{fx.popular_video}"}),
+    Scenario("video_page_tail", lambda fx: {"path": f"/video/{fx.tail_video}"}),
+    Scenario("video_comments", lambda fx: {"path": f"/video/{fx.popular_video}/comments?cursor={fx.deep_comments_cursor}"}),
+    Scenario("post_comment", lambda fx: {
+        "path": f"/video/{fx.popular_video}/comments", "json": {"content": "Amen", "name": "Bench"}
+    }, method="POST"),
+    Scenario("asset", lambda fx: {"path": f"/static/dist/{fx.asset_file}", "headers": {"Accept-Encoding": "gzip"}}),
+    Scenario("thumbnail", lambda fx: {"path": f"/thumbs/{fx.popular_video}/480"}, expect=(200, 302)),
+    Scenario("like_video", lambda fx: {"path": f"/like_video/{fx.popular_video}"}, method="POST"),
+    Scenario("subscribe", lambda fx: {
+        "path": "/subscribe", "json": {"email": fx.unique("bench") + "@example.com"}
+    }, method="POST"),
+    Scenario("search", _path("/search?q=grace+worship")),
+    Scenario("search_gzip", lambda fx: {"path": "/search?q=grace+worship", "headers": {"Accept-Encoding": "gzip"}}),
+    Scenario("search_page_3", lambda fx: {"path": f"/search?q={SEARCH_QUERY}&cursor={fx.search_cursor}"}),
+    Scenario("privacy_policy", _path("/privacy-policy")),
+    Scenario("category_landing_page", lambda fx: {"path": f"/category-page/{fx.root_category_slug}"}),
+    Scenario("view_all_videos", _path("/videos")),
+    Scenario("view_all_videos_deep", lambda fx: {"path": f"/videos?cursor={fx.deep_videos_cursor}"}),
+    Scenario("api_categories", _path("/api/v1/categories")),
+    Scenario("api_category_videos", lambda fx: {"path": f"/api/v1/categories/{fx.root_category_slug}/videos?limit=100"}),
+    Scenario("api_video", lambda fx: {"path": f"/api/v1/videos/{fx.popular_video}"}),
+    Scenario("api_videos_batch", lambda fx: {"path": f"/api/v1/videos?ids={fx.api_batch_ids}"}),
+
+    # ---- admin -----------------------------------------------------
+    Scenario("admin_login_form", _path("/admin/login")),
+    Scenario("admin_login", lambda fx: {
+        "path": "/admin/login", "data": {"username": ADMIN_USERNAME, "password": PASSWORD}
+    }, method="POST", expect=(302,)),
+    Scenario("admin_logout", _path("/logout"), role="admin", expect=(302,)),
+    Scenario("manage_videos", _path("/admin/videos"), role="admin"),
+    Scenario("admin_videos_api", _path("/admin/api/videos?sort=views"), role="admin"),
+    Scenario("admin_videos_api_filtered", lambda fx: {
+        "path": f"/admin/api/videos?category_id={fx.root_category_id}&uploader_id={fx.uploader_id}&q=a"
+    }, role="admin"),
+    Scenario("add_video_form", _path("/admin/videos/add"), role="admin"),
+    Scenario("add_video", lambda fx: {
+        "path": "/admin/videos/add",
+        "data": {"youtube_link": "https://youtu.be/" + fx.unique("bench"), "title": "Benchmark upload",
+                 "description": "", "category_id": fx.leaf_category_id},
+    }, method="POST", role="admin", expect=(302,)),
+    Scenario("import_videos", _import_file, method="POST", role="admin"),
+    Scenario("uploader_dashboard", _path("/uploader/dashboard"), role="uploader"),
+    Scenario("edit_video_form", lambda fx: {"path": f"/admin/videos/{fx.video_pk}/edit"}, role="admin"),
+    Scenario("edit_video", lambda fx: {
+        "path": f"/admin/videos/{fx.video_pk}/edit",
+        "data": {"title": "Benchmark edit", "description": "edited", "category_id": fx.leaf_category_id},
+    }, method="POST", role="admin", expect=(302,)),
+    Scenario("delete_video", lambda fx: {
+        "path": f"/admin/videos/{fx.throwaway_video()}/delete"
+    }, method="POST", role="admin", expect=(302,)),
+    Scenario("manage_categories", _path("/admin/categories"), role="admin"),
+    Scenario("add_category", lambda fx: {
+        "path": "/admin/categories", "data": {"name": fx.unique("Bench category")}
+    }, method="POST", role="admin"),
+    Scenario("edit_category_form", lambda fx: {
+        "path": f"/admin/categories/{fx.root_category_id}/edit"
+    }, role="admin"),
+    Scenario("edit_category", lambda fx: {
+        "path": f"/admin/categories/{fx.root_category_id}/edit",
+        "data": {"name": fx.root_category_name},
+    }, method="POST", role="admin", expect=(302,)),
+    Scenario("delete_category", lambda fx: {
+        "path": f"/admin/categories/{fx.throwaway_category()}/delete"
+    }, method="POST", role="admin", expect=(302,)),
+    Scenario("admin_perf", _path("/admin/perf"), role="admin"),
+    Scenario("create_user", lambda fx: {
+        "path": "/admin/create-user",
+        "data": {"username": fx.unique("bench-user"), "email": fx.unique("bench-user") + "@example.com",
+                 "password": PASSWORD, "role": "uploader"},
+    }, method="POST", role="admin", expect=(302,)),
+)
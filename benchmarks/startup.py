@@ -0,0 +1,118 @@
+"""Worker start-up benchmark: import time and time to the first response.
+
+    python -m benchmarks.startup                 # seed a temp SQLite db, report JSON
+    python -m benchmarks.startup --runs 10 --path / --path /videos
+
+Every run is a fresh interpreter, once as a plain worker and once calling
+warm_up() before its first request.
+"""
+# benchmarks/startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter: argv = config JSON, warm (0/1), paths...
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+if sys.argv[2] == "1":
+    from warmup import warm_up
+    warm_up(application)
+warmed = time.perf_counter()
+client = application.test_client()
+requests = []
+for path in sys.argv[3:]:
+    before = time.perf_counter()
+    status = client.get(path).status_code
+    requests.append({"path": path, "status": status, "ms": (time.perf_counter() - before) * 1000})
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "warm_up_ms": (warmed - created) * 1000,
+    "first_request_ms": requests[0]["ms"],
+    "ready_ms": (warmed - started) * 1000 + requests[0]["ms"],
+    "requests": requests,
+}))
+"""
+
+
+def _probe(config, warm, paths):
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(config), "1" if warm else "0", *paths],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def _summary(runs):
+    keys = ("process_ms", "import_ms", "create_app_ms", "warm_up_ms", "first_request_ms", "ready_ms")
+    summary = {key: round(statistics.median(r[key] for r in runs), 2) for key in keys}
+    summary["requests"] = [
+        {"path": first["path"], "status": first["status"],
+         "p50_ms": round(statistics.median(r["requests"][i]["ms"] for r in runs), 2)}
+        for i, first in enumerate(runs[0]["requests"])
+    ]
+    return summary
+
+
+def _seed(database_url, videos):
+    from app import create_app
+    from benchmarks.catalog import generate_catalog
+    from models import db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+    with app.app_context():
+        db.create_all()
+        generate_catalog(videos=videos)
+
+
+@click.command()
+@click.option("--database-url", help="Existing database to start against (default: seed a temp SQLite file).")
+@click.option("--videos", default=2000, show_default=True, help="Videos to seed into the temp database.")
+@click.option("--runs", default=5, show_default=True, help="Fresh interpreters per mode.")
+@click.option("--path", "paths", multiple=True, help="Requests made after start-up, in order (default: /).")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the JSON report here instead of stdout.")
+def main(database_url, videos, runs, paths, output):
+    """Measure how long a fresh worker takes to import, build the app and
+    answer its first request, with and without warm-up."""
+    paths = list(paths) or ["/"]
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="gospeltube-startup-"), "startup.db")
+        click.echo(f"Seeding {videos} videos into {database_url}", err=True)
+        _seed(database_url, videos)
+
+    config = {"SQLALCHEMY_DATABASE_URI": database_url, "OUTBOX_WORKER": "cli", "THUMBNAIL_WORKER": "off"}
+    report = {"meta": {"runs": runs, "python": sys.version.split()[0]}}
+    for mode, warm in (("cold", False), ("warm_up", True)):
+        results = [_probe(config, warm, paths) for _ in range(runs)]
+        report[mode] = _summary(results)
+        click.echo(f"{mode:<8} import {report[mode]['import_ms']:7.1f} ms  create_app "
+                   f"{report[mode]['create_app_ms']:6.1f} ms  warm-up {report[mode]['warm_up_ms']:7.1f} ms  "
+                   f"first request {report[mode]['first_request_ms']:7.1f} ms  ready {report[mode]['ready_ms']:7.1f} ms",
+                   err=True)
+
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        click.echo(payload)
+
+
+if __name__ == "__main__":
+    main()
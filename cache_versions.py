@@ -0,0 +1,106 @@
+# cache_versions.py
+import sqlite3
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import db, CacheVersion
+
+# name -> [callback, ...] run in this process after a bump is committed
+_local_listeners = {}
+
+
+def _seen() -> dict:
+    """The current app's name -> (version, monotonic time it was read)."""
+    return current_app.extensions.setdefault("cache_versions", {})
+
+
+# =====================================================
+# VERSION STAMPS
+# =====================================================
+def current_version(name: str) -> int:
+    """Read the committed version for `name` (0 if never bumped)."""
+    version = db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar()
+    return version or 0
+
+
+def cached_version(name: str, max_age: float) -> int:
+    """`current_version(name)`, re-read from the database at most every
+    `max_age` seconds. Bumps committed by this process are seen at once."""
+    now = time.monotonic()
+    remembered = _seen()
+    seen = remembered.get(name)
+    if seen is not None and now - seen[1] < max_age:
+        return seen[0]
+    version = current_version(name)
+    remembered[name] = (version, now)
+    return version
+
+
+def forget_versions() -> None:
+    """Drop every remembered stamp (e.g. after recreating the database)."""
+    _seen().clear()
+
+
+def bump_version(name: str) -> None:
+    """Increment `name` inside the current transaction.
+
+    Call it before `db.session.commit()` so the bump is committed together
+    with the change it describes; other workers see the new stamp on their
+    next check, and this worker's listeners run right after the commit.
+    The first bump of a name is an upsert, so concurrent first writers
+    cannot both try to insert the row."""
+    table = CacheVersion.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "postgresql" or (dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)):
+        module = postgresql if dialect == "postgresql" else sqlite_dialect
+        statement = module.insert(table).values(name=name, version=1)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.name], set_={"version": table.c.version + 1}
+        ))
+    else:
+        # No upsert: make sure the row exists, then bump it atomically.
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(name=name, version=0))
+        except IntegrityError:
+            pass
+        db.session.execute(
+            update(table).where(table.c.name == name).values(version=table.c.version + 1)
+        )
+    db.session.info.setdefault("bumped_versions", set()).add(name)
+
+
+def on_version_bump(name: str, callback) -> None:
+    """Run `callback()` in this process whenever a bump of `name` commits,
+    inside the committing app's context."""
+    callbacks = _local_listeners.setdefault(name, [])
+    if callback not in callbacks:
+        callbacks.append(callback)
+
+
+# =====================================================
+# SESSION HOOKS
+# =====================================================
+@event.listens_for(Session, "after_commit")
+def _run_local_listeners(session):
+    bumped = session.info.pop("bumped_versions", ())
+    if bumped and not has_app_context():
+        return
+    for name in bumped:
+        _seen().pop(name, None)
+        for callback in _local_listeners.get(name, ()):
+            callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bumps(session):
+    session.info.pop("bumped_versions", None)
@@ -0,0 +1,160 @@
+# category_tree.py
+import threading
+from types import MappingProxyType
+
+from flask import current_app
+
+from cache_versions import bump_version, cached_version, on_version_bump
+from models import db, Category
+
+VERSION_NAME = "categories"
+DEFAULT_CHECK_INTERVAL = 5  # seconds between version checks per worker
+
+
+# =====================================================
+# IMMUTABLE TREE
+# =====================================================
+class CategoryNode:
+    """Read-only stand-in for a Category row, usable from templates."""
+    __slots__ = ("id", "name", "slug", "parent_id", "_tree")
+
+    def __init__(self, tree, id, name, slug, parent_id):
+        for attr, value in (("_tree", tree), ("id", id), ("name", name),
+                            ("slug", slug), ("parent_id", parent_id)):
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CategoryNode is read-only")
+
+    def __repr__(self):
+        return f"<CategoryNode {self.id} {self.slug!r}>"
+
+    @property
+    def parent(self):
+        return self._tree.get(self.parent_id)
+
+    @property
+    def children(self):
+        return self._tree.children_of(self.id)
+
+    @property
+    def ancestors(self):
+        return self._tree.ancestors(self.id)
+
+    @property
+    def descendants(self):
+        return self._tree.descendants(self.id)
+
+
+class CategoryTree:
+    def __init__(self, rows, version=0):
+        self.version = version
+        nodes = [CategoryNode(self, *row) for row in rows]
+
+        by_id = {}
+        by_slug = {}
+        children = {}
+        for node in sorted(nodes, key=lambda n: n.id):
+            by_id[node.id] = node
+            by_slug[node.slug] = node
+            children.setdefault(node.parent_id, []).append(node)
+
+        self.by_id = MappingProxyType(by_id)
+        self.by_slug = MappingProxyType(by_slug)
+        self._children = MappingProxyType({k: tuple(v) for k, v in children.items()})
+        self.by_name = tuple(sorted(nodes, key=lambda n: n.name))
+        self.roots = tuple(n for n in self.by_name if n.parent_id is None)
+
+    @classmethod
+    def load(cls, version=0):
+        rows = db.session.query(
+            Category.id, Category.name, Category.slug, Category.parent_id
+        ).all()
+        return cls(rows, version)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, category_id):
+        if category_id is None:
+            return None
+        return self.by_id.get(int(category_id))
+
+    def children_of(self, category_id):
+        """Direct children, oldest first (same order as the old backref)."""
+        return self._children.get(category_id, ())
+
+    def ancestors(self, category_id):
+        """Parent first, root last."""
+        result = []
+        node = self.get(category_id)
+        seen = set()
+        while node is not None and node.parent_id is not None and node.id not in seen:
+            seen.add(node.id)
+            node = self.get(node.parent_id)
+            if node is not None:
+                result.append(node)
+        return tuple(result)
+
+    def descendants(self, category_id):
+        """Every category below `category_id`, breadth first."""
+        result = []
+        queue = list(self.children_of(category_id))
+        seen = set()
+        while queue:
+            node = queue.pop(0)
+            if node.id in seen:
+                continue
+            seen.add(node.id)
+            result.append(node)
+            queue.extend(self.children_of(node.id))
+        return tuple(result)
+
+
+# =====================================================
+# PER-APP CACHE
+# =====================================================
+class _TreeCache:
+    """The current app's tree (in app.extensions["category_tree"])."""
+    __slots__ = ("tree", "lock")
+
+    def __init__(self):
+        self.tree = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get() -> "_TreeCache":
+        cache = current_app.extensions.get("category_tree")
+        if cache is None:
+            cache = current_app.extensions.setdefault("category_tree", _TreeCache())
+        return cache
+
+
+def get_category_tree() -> CategoryTree:
+    """Return the cached tree, reloading it when another worker (or this
+    one) has committed a category change since it was built."""
+    interval = current_app.config.get("CATEGORY_TREE_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)
+    version = cached_version(VERSION_NAME, interval)
+    cache = _TreeCache.get()
+    tree = cache.tree
+    if tree is not None and tree.version == version:
+        return tree
+
+    with cache.lock:
+        if cache.tree is None or cache.tree.version != version:
+            cache.tree = CategoryTree.load(version)
+        return cache.tree
+
+
+def invalidate_category_tree() -> None:
+    cache = _TreeCache.get()
+    with cache.lock:
+        cache.tree = None
+
+
+def mark_categories_changed() -> None:
+    """Call before committing any insert/update/delete on categories."""
+    bump_version(VERSION_NAME)
+
+
+on_version_bump(VERSION_NAME, invalidate_category_tree)
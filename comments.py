@@ -0,0 +1,81 @@
+# comments.py
+from datetime import datetime
+
+from flask import session
+from sqlalchemy import delete, insert, select, update
+
+from models import db, Comment, User, Video
+from pagination import keyset_paginate
+from visitors import get_visitor_id
+
+PAGE_SIZE = 20
+MAX_LENGTH = 2000
+MAX_NAME_LENGTH = 80
+# order name -> newest first?
+ORDERS = {"newest": True, "oldest": False}
+
+
+# =====================================================
+# READING
+# =====================================================
+def comment_page(video_pk, order="newest", cursor=None, per_page=PAGE_SIZE):
+    """One keyset page of a video's comments: a single indexed range scan
+    on (video_id, timestamp, id) whatever the thread length. Raises
+    InvalidCursor for a bad cursor."""
+    query = Comment.query.filter(Comment.video_id == video_pk)
+    return keyset_paginate(query, (Comment.timestamp, Comment.id), per_page=per_page,
+                           cursor=cursor, descending=ORDERS[order])
+
+
+def comment_to_dict(comment):
+    return {
+        "id": comment.id,
+        "author": comment.author_name or "Guest",
+        "content": comment.content,
+        "timestamp": comment.timestamp.isoformat() if comment.timestamp else None,
+    }
+
+
+# =====================================================
+# WRITING
+# =====================================================
+def add_comment(video_pk, content, name=None):
+    """Post a comment as the logged-in user (under their username) or the
+    anonymous visitor (under `name`).
+
+    Returns (comment, comments_count). The row and the counter bump are
+    committed together, so the count never drifts from the table."""
+    content = (content or "").strip()
+    if not content:
+        raise ValueError("Write a comment first.")
+    if len(content) > MAX_LENGTH:
+        raise ValueError(f"Comments are limited to {MAX_LENGTH} characters.")
+
+    values = {"video_id": video_pk, "content": content, "timestamp": datetime.utcnow()}
+    if session.get("user_id"):
+        values["user_id"] = session["user_id"]
+        values["author_name"] = db.session.execute(
+            select(User.username).where(User.id == session["user_id"])
+        ).scalar() or ""
+    else:
+        values["visitor_id"] = get_visitor_id()
+        values["author_name"] = (name or "").strip()[:MAX_NAME_LENGTH]
+
+    comment_id = db.session.execute(insert(Comment).values(**values)).inserted_primary_key[0]
+    db.session.execute(
+        update(Video)
+        .where(Video.id == video_pk)
+        .values(comments_count=Video.comments_count + 1)
+    )
+    comments_count = db.session.execute(
+        select(Video.comments_count).where(Video.id == video_pk)
+    ).scalar()
+    db.session.commit()
+    return Comment(id=comment_id, **values), comments_count or 0
+
+
+def forget_comments(video_pk):
+    """Bulk-delete a video's comments (before deleting the video), so the
+    ORM cascade does not load them one by one."""
+    db.session.execute(delete(Comment).where(Comment.video_id == video_pk))
+
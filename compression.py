@@ -0,0 +1,178 @@
+# compression.py
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+from assets import brotli
+
+COMPRESSIBLE = frozenset({
+    "text/html", "text/plain", "text/css", "text/xml", "text/csv",
+    "application/json", "application/javascript", "application/xml", "image/svg+xml",
+})
+
+
+# =====================================================
+# ENCODERS
+# =====================================================
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._c = brotli().Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+# =====================================================
+# EXTENSION
+# =====================================================
+class Compressor:
+    """Compress dynamic responses (HTML pages, JSON) for clients that send
+    Accept-Encoding: brotli when the module is installed and preferred,
+    otherwise gzip.
+
+    Buffered bodies under COMPRESS_MIN_SIZE go out as they are. Streamed
+    pages are compressed chunk by chunk with a sync flush after each, so
+    the page head still reaches the browser before the queries run.
+    Compressing changes the bytes but not the content, so a strong ETag
+    becomes weak (If-None-Match compares weakly everywhere here); the
+    compressed body of a URL with a strong ETag is kept in a small LRU, so
+    page-cache hits are not compressed again.
+
+    Responses that already have a Content-Encoding (precompressed assets),
+    files (send_file), images, HEAD requests and ``no-transform`` responses
+    are left alone. Turn this off when a front-end server compresses.
+
+    Config:
+        COMPRESS_ENABLED        compress at all
+        COMPRESS_MIN_SIZE       smallest buffered body worth compressing
+        COMPRESS_LEVEL          gzip level (1-9)
+        COMPRESS_BR_QUALITY     brotli quality (0-11)
+        COMPRESS_MIMETYPES      mimetypes to compress
+        COMPRESS_CACHE_ENTRIES  compressed bodies kept by ETag
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+        app.config.setdefault("COMPRESS_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BR_QUALITY", 4)
+        app.config.setdefault("COMPRESS_MIMETYPES", COMPRESSIBLE)
+        app.config.setdefault("COMPRESS_CACHE_ENTRIES", 256)
+        app.extensions["compressor"] = self
+        self.app = app
+        self.clear()
+        app.after_request(self._compress)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ---- negotiation -----------------------------------------------
+    def _encoding(self):
+        offered = ["br", "gzip"] if brotli() is not None else ["gzip"]
+        return request.accept_encodings.best_match(offered)
+
+    def _encoder(self, encoding):
+        config = self.app.config
+        if encoding == "br":
+            return _Brotli(config["COMPRESS_BR_QUALITY"])
+        return _Gzip(config["COMPRESS_LEVEL"])
+
+    def _eligible(self, response) -> bool:
+        return (self.app.config["COMPRESS_ENABLED"]
+                and request.method != "HEAD"
+                and 200 <= response.status_code < 300
+                and response.status_code not in (204, 206)
+                and not response.direct_passthrough
+                and "Content-Encoding" not in response.headers
+                and not response.cache_control.no_transform)
+
+    # ---- compressing -----------------------------------------------
+    def _compress(self, response):
+        if response.mimetype not in self.app.config["COMPRESS_MIMETYPES"]:
+            return response
+        response.vary.add("Accept-Encoding")
+        if not self._eligible(response):
+            return response
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, response.iter_encoded(),
+                                             self._encoder(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.app.config["COMPRESS_MIN_SIZE"]:
+                return response
+            response.set_data(self._compressed(body, encoding, response.headers.get("ETag")))
+
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compressed(self, body, encoding, etag):
+        """`body` compressed, reused per URL and ETag when the page has one."""
+        if not etag or etag.startswith("W/"):
+            return self._encode(body, encoding)
+        key = (request.full_path, etag, encoding)
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                return data
+        data = self._encode(body, encoding)
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.app.config["COMPRESS_CACHE_ENTRIES"]:
+                self._cache.popitem(last=False)
+        return data
+
+    def _encode(self, body, encoding):
+        encoder = self._encoder(encoding)
+        return encoder.compress(body) + encoder.finish()
+
+    @staticmethod
+    def _stream(original, chunks, encoder):
+        try:
+            for chunk in chunks:
+                data = encoder.compress(chunk) + encoder.flush()
+                if data:
+                    yield data
+            yield encoder.finish()
+        finally:
+            close = getattr(original, "close", None)
+            if close is not None:
+                close()
@@ -0,0 +1,100 @@
+# db_routing.py
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import CompoundSelect, Executable, Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA = "replica"
+STICKY_KEY = "db_primary_until"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _is_plain_read(clause) -> bool:
+    if isinstance(clause, Executable) and clause.get_execution_options().get(REPLICA):
+        return True  # e.g. text() marked .execution_options(replica=True)
+    return isinstance(clause, (Select, CompoundSelect)) and clause._for_update_arg is None
+
+
+# =====================================================
+# SESSION
+# =====================================================
+class RoutingSession(Session):
+    """db.session class that sends the reads of read-only requests to the
+    replica bind. Only plain SELECTs and statements marked
+    ``.execution_options(replica=True)`` (search's text() queries) move:
+    flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE, other text() and
+    session.connection() stay on the primary, and after the first write the
+    rest of the request does too."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g._db_wrote = True
+            elif g.get("_db_read_replica") and not g.get("_db_wrote") and _is_plain_read(clause):
+                return self._db.engines[REPLICA]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+# =====================================================
+# ROUTER
+# =====================================================
+class ReplicaRouter:
+    """Optional read replica. With DATABASE_REPLICA_URL set, GET/HEAD
+    requests read from the replica (see RoutingSession) and everything else
+    uses the primary. A client that wrote keeps reading the primary for
+    DATABASE_REPLICA_STICKY seconds (a timestamp in its session), so it
+    sees its own changes despite replication lag. Writes through
+    db.engine (view counts, sketches) always go to the primary and do not
+    pin anyone.
+
+    init_app must run before db.init_app: the engines are created from the
+    binds and pool options it sets.
+
+    Config:
+        DATABASE_REPLICA_URL      replica to read from (unset: primary only)
+        DATABASE_REPLICA_STICKY   seconds a client reads the primary after a write
+        DB_POOL_SIZE              primary pool size (unset: SQLAlchemy default)
+        DB_MAX_OVERFLOW           primary connections allowed beyond the pool
+        REPLICA_POOL_SIZE         replica pool size (unset: same as the primary)
+        REPLICA_MAX_OVERFLOW      replica connections allowed beyond the pool
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("DATABASE_REPLICA_URL", None)
+        app.config.setdefault("DATABASE_REPLICA_STICKY", 10)
+        for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "REPLICA_POOL_SIZE", "REPLICA_MAX_OVERFLOW"):
+            app.config.setdefault(name, None)
+        app.extensions["replica_router"] = self
+        self.app = app
+        config = app.config
+
+        options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+        options.update(self._pool_options("DB_"))
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+        if config["DATABASE_REPLICA_URL"]:
+            binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+            binds[REPLICA] = {"url": config["DATABASE_REPLICA_URL"], **self._pool_options("REPLICA_")}
+            config["SQLALCHEMY_BINDS"] = binds
+            app.before_request(self._route)
+            app.after_request(self._stick)
+
+    def _pool_options(self, prefix):
+        config = self.app.config
+        return {option: config[prefix + name] for name, option in
+                (("POOL_SIZE", "pool_size"), ("MAX_OVERFLOW", "max_overflow"))
+                if config[prefix + name] is not None}
+
+    def _route(self):
+        g._db_read_replica = request.method in READ_METHODS and session.get(STICKY_KEY, 0) <= time.time()
+
+    def _stick(self, response):
+        if g.get("_db_wrote"):
+            session[STICKY_KEY] = int(time.time() + self.app.config["DATABASE_REPLICA_STICKY"]) + 1
+        return response
@@ -0,0 +1,103 @@
+# digests.py
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from flask import current_app, render_template
+from sqlalchemy import func, update
+
+from models import db, Subscriber, Video
+
+FREQUENCIES = {
+    "immediate": timedelta(0),
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+}
+
+
+# =====================================================
+# DIGEST SCHEDULER
+# =====================================================
+def _url_builder():
+    """Build external URLs outside a request from SITE_URL."""
+    site = urlparse(current_app.config["SITE_URL"])
+    adapter = current_app.url_map.bind(
+        site.netloc, url_scheme=site.scheme or "http", script_name=site.path or "/"
+    )
+    return lambda endpoint, **values: adapter.build(endpoint, values, force_external=True)
+
+
+def set_frequency(subscriber, frequency):
+    """Change cadence; the next digest is due one new period from the last."""
+    subscriber.digest_frequency = frequency
+    subscriber.next_digest_at = subscriber.last_digest_at + FREQUENCIES[frequency]
+
+
+def _compose(videos, max_videos, build_url):
+    """(subject, body) of a digest listing `videos`, newest first."""
+    body = render_template(
+        "emails/digest.txt",
+        videos=videos[:max_videos],
+        more=len(videos) > max_videos,
+        video_url=lambda v: build_url("main.video_page", video_id=v.video_id),
+        all_videos_url=build_url("main.view_all_videos")
+    )
+    if len(videos) == 1:
+        subject = f"New Video Added: {videos[0].title}"
+    elif len(videos) > max_videos:
+        subject = f"{max_videos}+ new videos on GospelTube"
+    else:
+        subject = f"{len(videos)} new videos on GospelTube"
+    return subject, body
+
+
+def run_digests(outbox, now=None) -> int:
+    """Queue one digest email per due subscriber; returns how many.
+
+    A subscriber is due when their cadence has elapsed (next_digest_at) and
+    a video was added after their watermark (last_digest_at); both columns
+    are indexed together, so up-to-date subscribers are never read. Each
+    chunk's emails and watermark moves commit together.
+
+    Every worker may run this at once: a subscriber is claimed by moving
+    their watermark only if it still holds the value that was read, and
+    only the run whose UPDATE matched queues the email."""
+    now = now or datetime.utcnow()
+    config = current_app.config
+    latest = db.session.query(func.max(Video.date_added)).scalar()
+    if latest is None:
+        return 0
+
+    build_url = _url_builder()
+    max_videos = config["DIGEST_MAX_VIDEOS"]
+    queued = 0
+    while True:
+        due = Subscriber.query.filter(
+            Subscriber.next_digest_at <= now,
+            Subscriber.last_digest_at < latest
+        ).order_by(Subscriber.next_digest_at, Subscriber.id)\
+         .limit(config["DIGEST_BATCH_SIZE"]).all()
+        if not due:
+            return queued
+
+        # Newest videos after the oldest watermark in this chunk; every
+        # subscriber's own newest-N list is a prefix of this one.
+        oldest = min(sub.last_digest_at for sub in due)
+        videos = Video.query.filter(Video.date_added > oldest, Video.date_added <= latest)\
+                            .order_by(Video.date_added.desc(), Video.id.desc())\
+                            .limit(max_videos + 1).all()
+
+        for sub in due:
+            new_videos = [v for v in videos if v.date_added > sub.last_digest_at]
+            digest = _compose(new_videos, max_videos, build_url) if new_videos else None
+            claimed = db.session.execute(
+                update(Subscriber)
+                .where(Subscriber.id == sub.id, Subscriber.last_digest_at == sub.last_digest_at)
+                .values(last_digest_at=latest,
+                        next_digest_at=now + FREQUENCIES.get(sub.digest_frequency, timedelta(0)))
+                .execution_options(synchronize_session=False)
+            ).rowcount == 1
+            if claimed and digest:
+                subject, body = digest
+                outbox.enqueue("digest", subject=subject, body=body, recipient=sub.email)
+                queued += 1
+        db.session.commit()
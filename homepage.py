@@ -0,0 +1,110 @@
+# homepage.py
+import sqlite3
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
+
+from category_tree import get_category_tree
+from models import db, Video
+
+LATEST_PER_CATEGORY = 10
+
+
+# =====================================================
+# LATEST VIDEOS PER CATEGORY (ONE QUERY)
+# =====================================================
+def _supports_window_functions() -> bool:
+    """ROW_NUMBER() needs SQLite 3.25+; every other backend has it."""
+    if db.engine.dialect.name != "sqlite":
+        return True
+    return sqlite3.sqlite_version_info >= (3, 25, 0)
+
+
+def newest_first(video=Video):
+    return (video.date_added.desc(), video.id.desc())
+
+
+def most_viewed(video=Video):
+    return (video.views.desc(), video.id.desc())
+
+
+def top_per_category(category_ids, ordering, limit):
+    """Criterion matching the first `limit` videos of each category in
+    `category_ids` under `ordering(entity)`, for use in a single SELECT."""
+    if _supports_window_functions():
+        ranked = select(
+            Video.id.label("id"),
+            func.row_number().over(
+                partition_by=Video.category_id,
+                order_by=ordering(Video)
+            ).label("rn")
+        ).where(Video.category_id.in_(category_ids)).subquery()
+        return Video.id.in_(select(ranked.c.id).where(ranked.c.rn <= limit))
+
+    # Older SQLite: correlated "top N ids of my category" subquery.
+    other = aliased(Video)
+    top_ids = select(other.id)\
+        .where(other.category_id == Video.category_id)\
+        .order_by(*ordering(other))\
+        .limit(limit)\
+        .correlate(Video)
+    return and_(Video.category_id.in_(category_ids), Video.id.in_(top_ids))
+
+
+def latest_videos_by_category(category_ids, limit=LATEST_PER_CATEGORY):
+    """Return {category_id: [Video, ...]} with the newest `limit` videos of
+    every category in `category_ids`, fetched in a single SELECT."""
+    category_ids = list(category_ids)
+    if not category_ids:
+        return {}
+
+    query = Video.query.filter(top_per_category(category_ids, newest_first, limit))
+    grouped = {category_id: [] for category_id in category_ids}
+    for video in query.order_by(Video.category_id, *newest_first()).all():
+        grouped[video.category_id].append(video)
+    return grouped
+
+
+# =====================================================
+# PAGE DATA BUILDERS
+# =====================================================
+def build_category_block(category, children, latest):
+    """Assemble one {"category", "parent_videos", "children"} block."""
+    children_data = []
+    for sub in children:
+        sub_videos = latest.get(sub.id, [])
+        if sub_videos:
+            children_data.append({"category": sub, "videos": sub_videos})
+    return {
+        "category": category,
+        "parent_videos": latest.get(category.id, []),
+        "children": children_data
+    }
+
+
+def build_homepage_data(limit=LATEST_PER_CATEGORY):
+    """Homepage sections for every top-level category.
+
+    Categories come from the cached tree, so this is a single video query
+    regardless of how many categories exist."""
+    tree = get_category_tree()
+
+    wanted_ids = []
+    for cat in tree.roots:
+        wanted_ids.append(cat.id)
+        wanted_ids.extend(sub.id for sub in cat.children)
+    latest = latest_videos_by_category(wanted_ids, limit)
+
+    homepage_data = []
+    for cat in tree.roots:
+        block = build_category_block(cat, cat.children, latest)
+        if block["parent_videos"] or block["children"]:
+            homepage_data.append(block)
+    return homepage_data
+
+
+def build_category_page_data(category, limit=LATEST_PER_CATEGORY):
+    """Same block shape as the homepage, for a single category landing page."""
+    children = get_category_tree().children_of(category.id)
+    latest = latest_videos_by_category([category.id] + [c.id for c in children], limit)
+    return build_category_block(category, children, latest)
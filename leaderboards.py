@@ -0,0 +1,256 @@
+# leaderboards.py
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.exc import IntegrityError
+
+from cache_versions import cached_version, on_version_bump
+from homepage import most_viewed, top_per_category
+from models import db, Video, VideoActivity
+from page_cache import CATALOG_VERSION
+
+
+# =====================================================
+# HOURLY ACTIVITY BUCKETS
+# =====================================================
+def hour_bucket(when: datetime) -> datetime:
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def increment_counters(conn, table, keys, rows) -> None:
+    """Add each row's counter columns (every column not in `keys`) to the
+    row with the same key, creating it if needed, on `conn`'s transaction."""
+    rows = list(rows)
+    if not rows:
+        return
+    counters = [name for name in rows[0] if name not in keys]
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql" or (dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)):
+        module = postgresql if dialect == "postgresql" else sqlite_dialect
+        statement = module.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        )
+        conn.execute(statement, rows)
+        return
+
+    # No upsert: make sure the row exists, then add to it atomically.
+    if dialect == "sqlite":
+        conn.execute(
+            insert(table).prefix_with("OR IGNORE"),
+            [dict(row, **{name: 0 for name in counters}) for row in rows]
+        )
+    for row in rows:
+        result = conn.execute(
+            update(table)
+            .where(*(table.c[name] == row[name] for name in keys))
+            .values({name: table.c[name] + row[name] for name in counters})
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def insert_missing(conn, table, keys, rows) -> None:
+    """Insert the rows whose key (the `keys` columns) is not in `table` yet,
+    on `conn`'s transaction, without failing when another transaction
+    inserts the same key first."""
+    rows = list(rows)
+    if not rows:
+        return
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql" or (dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)):
+        module = postgresql if dialect == "postgresql" else sqlite_dialect
+        conn.execute(module.insert(table).on_conflict_do_nothing(index_elements=[table.c[name] for name in keys]),
+                     rows)
+    elif dialect == "sqlite":
+        conn.execute(insert(table).prefix_with("OR IGNORE"), rows)
+    else:
+        for row in rows:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table).values(**row))
+            except IntegrityError:
+                pass
+
+
+def record_activity(conn, rows) -> None:
+    """Add view/like deltas to their hourly buckets, on `conn`'s transaction.
+
+    `rows` is an iterable of dicts with video_id, bucket, views and likes."""
+    increment_counters(conn, VideoActivity.__table__, ("video_id", "bucket"), rows)
+
+
+def prune_activity(conn, before: datetime) -> int:
+    return conn.execute(delete(VideoActivity.__table__).where(VideoActivity.bucket < before)).rowcount
+
+
+class _Snapshot:
+    __slots__ = ("built", "generation", "popular", "trending", "by_category")
+
+    def __init__(self, generation, popular, trending):
+        self.built = time.time()
+        self.generation = generation
+        self.popular = popular          # tuple of video ids, best first
+        self.trending = trending        # tuple of video ids, best first
+        self.by_category = {}           # category id -> ((views, video id), ...)
+
+
+def _invalidate_current():
+    """Catalog bump listener: drop the committing app's snapshot."""
+    boards = current_app.extensions.get("leaderboards")
+    if boards is not None:
+        boards.invalidate()
+
+
+# =====================================================
+# LEADERBOARDS
+# =====================================================
+class Leaderboards:
+    """Precomputed top-N video lists shared by the hot public pages.
+
+    * popular   all-time views, read through the index on videos.views
+    * trending  recent views and likes from the hourly video_activity
+                buckets, each bucket weighted by 0.5 ** (age / half-life)
+    * per category top-N by views, filled in lazily per category
+
+    Lists are kept as ids and rebuilt at most every
+    LEADERBOARD_REFRESH_INTERVAL seconds (or when the catalog changes);
+    pages turn them into videos with one bulk fetch. The activity buckets
+    are written incrementally by the view counter flush and by likes.
+
+    Config:
+        LEADERBOARD_SIZE              ids kept per list
+        LEADERBOARD_REFRESH_INTERVAL  seconds a snapshot is served
+        TRENDING_WINDOW_HOURS         activity older than this is ignored and pruned
+        TRENDING_HALF_LIFE_HOURS      age at which activity counts half
+        TRENDING_LIKE_WEIGHT          views one like is worth
+    """
+
+    def __init__(self, app=None, view_counter=None):
+        self.app = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._pruned_before = None
+        if app is not None:
+            self.init_app(app, view_counter)
+
+    def init_app(self, app, view_counter=None):
+        app.config.setdefault("LEADERBOARD_SIZE", 50)
+        app.config.setdefault("LEADERBOARD_REFRESH_INTERVAL", 30)
+        app.config.setdefault("TRENDING_WINDOW_HOURS", 72)
+        app.config.setdefault("TRENDING_HALF_LIFE_HOURS", 24)
+        app.config.setdefault("TRENDING_LIKE_WEIGHT", 5)
+        app.extensions["leaderboards"] = self
+        self.app = app
+        if view_counter is not None:
+            view_counter.add_flush_hook(self._record_views)
+        on_version_bump(CATALOG_VERSION, _invalidate_current)
+
+    # ---- activity --------------------------------------------------
+    def _record_views(self, conn, batch):
+        """View counter flush hook: runs inside the flush transaction."""
+        record_activity(conn, (
+            {"video_id": video_id, "bucket": hour_bucket(watched), "views": count, "likes": 0}
+            for video_id, (count, watched) in batch.items()
+        ))
+        cutoff = hour_bucket(datetime.utcnow()) - timedelta(hours=self.app.config["TRENDING_WINDOW_HOURS"])
+        if self._pruned_before != cutoff:
+            prune_activity(conn, cutoff)
+            self._pruned_before = cutoff
+
+    # ---- building --------------------------------------------------
+    def _popular_ids(self, size):
+        return tuple(db.session.execute(
+            select(Video.id).order_by(*most_viewed()).limit(size)
+        ).scalars())
+
+    def _trending_ids(self, size, now=None):
+        config = self.app.config
+        current = hour_bucket(now or datetime.utcnow())
+        hours = config["TRENDING_WINDOW_HOURS"]
+        half_life = float(config["TRENDING_HALF_LIFE_HOURS"])
+
+        decay = case(
+            {current - timedelta(hours=age): 0.5 ** (age / half_life) for age in range(hours)},
+            value=VideoActivity.bucket,
+            else_=0.0
+        )
+        activity = VideoActivity.views + config["TRENDING_LIKE_WEIGHT"] * VideoActivity.likes
+        score = func.sum(activity * decay)
+        return tuple(db.session.execute(
+            select(VideoActivity.video_id)
+            .where(VideoActivity.bucket > current - timedelta(hours=hours))
+            .group_by(VideoActivity.video_id)
+            .order_by(score.desc(), VideoActivity.video_id.desc())
+            .limit(size)
+        ).scalars())
+
+    def _current(self) -> _Snapshot:
+        config = self.app.config
+        interval = config["LEADERBOARD_REFRESH_INTERVAL"]
+        generation = cached_version(CATALOG_VERSION, interval)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == generation \
+                and time.time() - snapshot.built < interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != generation \
+                    or time.time() - snapshot.built >= interval:
+                size = config["LEADERBOARD_SIZE"]
+                snapshot = _Snapshot(generation, self._popular_ids(size), self._trending_ids(size))
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    # ---- reading ---------------------------------------------------
+    @staticmethod
+    def _fetch(ids):
+        """Videos for `ids` in one query, keeping the ranking order."""
+        if not ids:
+            return []
+        videos = {v.id: v for v in Video.query.filter(Video.id.in_(ids)).all()}
+        return [videos[i] for i in ids if i in videos]
+
+    def popular(self, limit=10):
+        return self._fetch(self._current().popular[:limit])
+
+    def trending(self, limit=10):
+        return self._fetch(self._current().trending[:limit])
+
+    def popular_in_category(self, category_ids, limit=10):
+        """Most watched videos across `category_ids` (e.g. a category and its
+        children); missing per-category lists are built in one query."""
+        snapshot = self._current()
+        category_ids = list(category_ids)
+        missing = [c for c in category_ids if c not in snapshot.by_category]
+        if missing:
+            size = self.app.config["LEADERBOARD_SIZE"]
+            found = {c: [] for c in missing}
+            rows = db.session.execute(
+                select(Video.category_id, Video.views, Video.id)
+                .where(top_per_category(missing, most_viewed, size))
+                .order_by(Video.category_id, *most_viewed())
+            )
+            for category_id, views, video_id in rows:
+                found[category_id].append((views, video_id))
+            for category_id, entries in found.items():
+                snapshot.by_category[category_id] = tuple(entries)
+
+        merged = sorted(
+            (entry for c in category_ids for entry in snapshot.by_category[c]),
+            reverse=True
+        )
+        return self._fetch([video_id for _, video_id in merged[:limit]])
@@ -0,0 +1,99 @@
+# likes.py
+import sqlite3
+from datetime import datetime
+
+from flask import session
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.exc import IntegrityError
+
+from leaderboards import hour_bucket, record_activity
+from models import db, Like, Video
+from visitors import get_visitor_id
+
+
+# =====================================================
+# WHO IS LIKING
+# =====================================================
+def current_liker(create: bool = True):
+    """(column name, value) identifying the current liker: the logged-in
+    user if there is one, otherwise the anonymous visitor id."""
+    if session.get("user_id"):
+        return "user_id", session["user_id"]
+    visitor_id = get_visitor_id(create=create)
+    return ("visitor_id", visitor_id) if visitor_id else (None, None)
+
+
+# =====================================================
+# IDEMPOTENT LIKE
+# =====================================================
+def _insert_like(column, value, video_pk) -> bool:
+    """Insert one Like row unless it already exists; True if inserted."""
+    values = {column: value, "video_id": video_pk}
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        statement = postgresql.insert(Like).values(**values)\
+            .on_conflict_do_nothing(index_elements=[column, "video_id"])
+    elif dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0):
+        statement = sqlite_dialect.insert(Like).values(**values)\
+            .on_conflict_do_nothing(index_elements=[column, "video_id"])
+    elif dialect == "sqlite":
+        statement = insert(Like).values(**values).prefix_with("OR IGNORE")
+    else:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Like).values(**values))
+            return True
+        except IntegrityError:
+            return False
+
+    return db.session.execute(statement).rowcount == 1
+
+
+def add_like(video_pk, column, value):
+    """Like `video_pk` once per liker.
+
+    Returns (inserted, likes_count). The counter is bumped atomically and
+    only when a row was actually inserted, so repeat clicks are no-ops."""
+    inserted = _insert_like(column, value, video_pk)
+    if inserted:
+        db.session.execute(
+            update(Video)
+            .where(Video.id == video_pk)
+            .values(likes_count=func.coalesce(Video.likes_count, 0) + 1)
+        )
+        record_activity(db.session.connection(), [{
+            "video_id": video_pk, "bucket": hour_bucket(datetime.utcnow()),
+            "views": 0, "likes": 1,
+        }])
+    likes_count = db.session.execute(
+        select(Video.likes_count).where(Video.id == video_pk)
+    ).scalar()
+    db.session.commit()
+    return inserted, likes_count or 0
+
+
+# =====================================================
+# BATCH LIKE STATE
+# =====================================================
+def liked_video_ids(video_pks, column=None, value=None) -> set:
+    """Which of `video_pks` the liker has liked, in one query. Defaults to
+    the current request's liker without creating a visitor id.
+
+    Only the video page asks today: list pages are cached once for every
+    anonymous visitor and their cards have no like button."""
+    if column is None:
+        column, value = current_liker(create=False)
+    video_pks = list(video_pks)
+    if not column or not video_pks:
+        return set()
+
+    rows = db.session.execute(
+        select(Like.video_id).where(
+            getattr(Like, column) == value,
+            Like.video_id.in_(video_pks)
+        )
+    ).scalars()
+    return set(rows)
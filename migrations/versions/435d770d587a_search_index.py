@@ -0,0 +1,32 @@
+"""search index
+
+Revision ID: 435d770d587a
+Revises: 38e774af2232
+Create Date: 2026-10-17 09:06:40.118093
+
+"""
+from alembic import op
+
+import search
+
+
+# revision identifiers, used by Alembic.
+revision = '435d770d587a'
+down_revision = '38e774af2232'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Full-text index of the backend this database supports (db.create_all
+    # does the same through search.py's schema hooks), filled with the
+    # videos already there.
+    bind = op.get_bind()
+    backend = search.BACKENDS[search.backend_name_for(bind)]()
+    backend.create_schema(bind)
+    backend.fill(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    search.BACKENDS[search.backend_name_for(bind)]().drop_schema(bind)
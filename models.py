@@ -2,7 +2,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
-db = SQLAlchemy()  # ✅ Only defined once
+from db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # ✅ Only defined once
 
 # =====================================================
 # USER MODEL
@@ -62,15 +64,28 @@ class Video(db.Model):
     translated_link = db.Column(db.String(500), nullable=True)
     download_link = db.Column(db.String(500), nullable=True)
 
-    views = db.Column(db.Integer, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
     likes_count = db.Column(db.Integer, default=0)
+    # Kept in step with the comments table by comments.add_comment.
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     last_watched = db.Column(db.DateTime, nullable=True)
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by every ORM update of the row; the API's ETags are built from it.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     comments = db.relationship("Comment", backref="video", lazy="dynamic", cascade="all, delete-orphan")
     likes = db.relationship("Like", backref="video", lazy="dynamic", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index("ix_videos_category_date_added", "category_id", "date_added"),
+        db.Index("ix_videos_category_views", "category_id", "views"),
+        # Keyset pagination walks (date_added, id), optionally per uploader.
+        db.Index("ix_videos_date_added_id", "date_added", "id"),
+        db.Index("ix_videos_uploader_date_added", "uploaded_by", "date_added", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
 
 # =====================================================
 # COMMENT MODEL
@@ -81,10 +96,19 @@ class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Display name at posting time, so listing comments needs no join.
+    author_name = db.Column(db.String(80), nullable=False, server_default="")
 
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Logged-in comments use user_id; anonymous visitors use visitor_id.
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    visitor_id = db.Column(db.String(32), nullable=True)
     video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        # Keyset pagination walks (timestamp, id) within one video.
+        db.Index("ix_comments_video_timestamp_id", "video_id", "timestamp", "id"),
+    )
+
 
 # =====================================================
 # LIKE MODEL
@@ -93,11 +117,14 @@ class Like(db.Model):
     __tablename__ = "likes"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Logged-in likes use user_id; anonymous visitors use visitor_id.
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    visitor_id = db.Column(db.String(32), nullable=True)
     video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "video_id", name="unique_like"),
+        db.UniqueConstraint("visitor_id", "video_id", name="unique_visitor_like"),
     )
 
 
@@ -109,4 +136,116 @@ class Subscriber(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    date_subscribed = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    date_subscribed = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Digest preferences: immediate | hourly | daily
+    digest_frequency = db.Column(db.String(20), nullable=False, default="immediate")
+    # Videos added after this moment have not been emailed yet
+    last_digest_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Earliest time the next digest may go out
+    next_digest_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_subscribers_digest_due", "next_digest_at", "last_digest_at"),
+    )
+
+# =====================================================
+# CACHE VERSION MODEL
+# =====================================================
+class CacheVersion(db.Model):
+    """Monotonic version stamps shared by every worker process."""
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# =====================================================
+# OUTBOX MODELS (QUEUED EMAIL)
+# =====================================================
+class OutboxMessage(db.Model):
+    __tablename__ = "outbox_messages"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # welcome | new_video
+    subject = db.Column(db.String(300), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    recipient = db.Column(db.String(120), nullable=True)  # None = every subscriber
+
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)  # pending | sent | failed
+    cursor = db.Column(db.Integer, nullable=False, default=0)  # last subscriber id handed to SMTP
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    deliveries = db.relationship("OutboxDelivery", backref="message", lazy="dynamic", cascade="all, delete-orphan")
+
+
+class OutboxDelivery(db.Model):
+    __tablename__ = "outbox_deliveries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    message_id = db.Column(db.Integer, db.ForeignKey("outbox_messages.id", ondelete="CASCADE"), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # sent | failed
+    attempts = db.Column(db.Integer, nullable=False, default=1)
+    last_error = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("message_id", "email", name="unique_delivery"),
+    )
+
+
+# =====================================================
+# VIDEO ACTIVITY MODEL (HOURLY BUCKETS FOR TRENDING)
+# =====================================================
+class VideoActivity(db.Model):
+    __tablename__ = "video_activity"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True, index=True)  # start of the hour
+    views = db.Column(db.Integer, nullable=False, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+
+
+# =====================================================
+# RELATED VIDEOS (PRECOMPUTED NEIGHBOURS AND CO-VIEWS)
+# =====================================================
+class RelatedVideo(db.Model):
+    __tablename__ = "related_videos"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    related_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_related_videos_video_score", "video_id", "score"),
+    )
+
+
+class VideoCoView(db.Model):
+    """Visitors who watched one video then the other; each pair is stored
+    once with video_id < other_id."""
+    __tablename__ = "video_coviews"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    other_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# =====================================================
+# UNIQUE VIEWER SKETCHES (HYPERLOGLOG REGISTERS)
+# =====================================================
+class VideoViewerSketch(db.Model):
+    __tablename__ = "video_viewer_sketches"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    registers = db.Column(db.LargeBinary, nullable=False)
@@ -0,0 +1,373 @@
+# outbox.py
+import logging
+import os
+import smtplib
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import or_, update
+
+from models import db, OutboxMessage, OutboxDelivery, Subscriber
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the SMTP connection itself is unusable, as opposed to
+# one recipient being refused (SMTPException subclasses OSError, so the
+# socket-level errors are listed individually).
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                     smtplib.SMTPAuthenticationError, ConnectionError,
+                     TimeoutError, socket.gaierror)
+
+
+# =====================================================
+# OUTBOX + BACKGROUND SENDER
+# =====================================================
+class Outbox:
+    """Durable email queue.
+
+    Requests only insert an OutboxMessage in their own transaction; a
+    sender (an in-process thread, or ``flask outbox-worker``) claims due
+    messages with a lease, streams subscribers in chunks over one SMTP
+    connection per chunk, and records every delivery so a restart resumes
+    from the saved cursor instead of resending. Due single-recipient
+    messages (welcome emails, digests) are batched onto one connection too.
+
+    Config:
+        OUTBOX_WORKER          "thread" (sender runs inside the web worker)
+                               or "cli" (run ``flask outbox-worker``)
+        OUTBOX_BATCH_SIZE      subscribers per chunk / SMTP connection
+        OUTBOX_RATE_PER_SECOND max emails per second per sender (0 = no limit)
+        OUTBOX_MAX_ATTEMPTS    tries per message and per recipient
+        OUTBOX_RETRY_BASE      first retry delay in seconds, doubled each try
+        OUTBOX_POLL_INTERVAL   seconds between idle polls
+        OUTBOX_LEASE_SECONDS   a claim older than this may be taken over
+    """
+
+    def __init__(self, app=None, mail=None):
+        self.app = None
+        self.mail = mail
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._last_send = 0.0
+        self._periodic = []
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        if app is not None:
+            self.init_app(app, mail)
+
+    def init_app(self, app, mail=None):
+        app.config.setdefault("OUTBOX_WORKER", "thread")
+        app.config.setdefault("OUTBOX_BATCH_SIZE", 100)
+        app.config.setdefault("OUTBOX_RATE_PER_SECOND", 10)
+        app.config.setdefault("OUTBOX_MAX_ATTEMPTS", 5)
+        app.config.setdefault("OUTBOX_RETRY_BASE", 60)
+        app.config.setdefault("OUTBOX_POLL_INTERVAL", 30)
+        app.config.setdefault("OUTBOX_LEASE_SECONDS", 600)
+        app.extensions["outbox"] = self
+        self.app = app
+        if mail is not None:
+            self.mail = mail
+
+    # ---- enqueueing (request side) ---------------------------------
+    def enqueue(self, kind, subject, body, recipient=None):
+        """Queue an email in the caller's transaction. `recipient=None`
+        sends it to every subscriber. Call `wake()` after committing."""
+        message = OutboxMessage(kind=kind, subject=subject, body=body, recipient=recipient)
+        db.session.add(message)
+        return message
+
+    def wake(self):
+        """Nudge the in-process sender after a commit that queued mail."""
+        if self.app.config["OUTBOX_WORKER"] != "thread":
+            return
+        self._ensure_thread()
+        self._wakeup.set()
+
+    # ---- claiming --------------------------------------------------
+    def _claim(self):
+        """Claim either one broadcast message or up to OUTBOX_BATCH_SIZE
+        single-recipient messages, which then share one SMTP connection."""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.app.config["OUTBOX_LEASE_SECONDS"])
+        claimable = (
+            OutboxMessage.status == "pending",
+            OutboxMessage.next_attempt_at <= now,
+            or_(OutboxMessage.locked_by.is_(None), OutboxMessage.locked_at < stale)
+        )
+        candidates = db.session.query(OutboxMessage.id, OutboxMessage.recipient)\
+                               .filter(*claimable)\
+                               .order_by(OutboxMessage.id)\
+                               .limit(self.app.config["OUTBOX_BATCH_SIZE"]).all()
+        if not candidates:
+            return []
+        if candidates[0].recipient is None:
+            ids = [candidates[0].id]
+        else:
+            ids = [c.id for c in candidates if c.recipient is not None]
+
+        claimed = []
+        for message_id in ids:
+            if db.session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message_id, *claimable)
+                .values(locked_by=self.worker_id, locked_at=now)
+            ).rowcount:
+                claimed.append(message_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return OutboxMessage.query.filter(OutboxMessage.id.in_(claimed))\
+                                  .order_by(OutboxMessage.id).all()
+
+    def process_next(self) -> bool:
+        """Claim and work one batch of due messages; False when nothing was due."""
+        messages = self._claim()
+        if not messages:
+            return False
+        if messages[0].recipient is not None:
+            self._deliver_singles(messages)
+            return True
+
+        message = messages[0]
+        try:
+            self._deliver(message)
+        except Exception as e:
+            db.session.rollback()
+            message = db.session.get(OutboxMessage, message.id)
+            message.attempts += 1
+            message.last_error = str(e)
+            if message.attempts >= self.app.config["OUTBOX_MAX_ATTEMPTS"]:
+                message.status = "failed"
+                message.finished_at = datetime.utcnow()
+            else:
+                message.next_attempt_at = datetime.utcnow() + self._backoff(message.attempts)
+            message.locked_by = None
+            message.locked_at = None
+            db.session.commit()
+            logger.warning("Outbox message %s failed (attempt %s): %s", message.id, message.attempts, e)
+        return True
+
+    def add_periodic_task(self, task):
+        """Run `task()` (inside an app context) before every sending pass."""
+        if task not in self._periodic:
+            self._periodic.append(task)
+
+    def run_pending(self) -> int:
+        """Run periodic tasks, then work every due batch; returns how many
+        batches were processed."""
+        for task in self._periodic:
+            try:
+                task()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Outbox periodic task %r failed", task)
+
+        processed = 0
+        while self.process_next():
+            processed += 1
+        return processed
+
+    # ---- delivery --------------------------------------------------
+    def _backoff(self, attempts):
+        return timedelta(seconds=self.app.config["OUTBOX_RETRY_BASE"] * 2 ** (attempts - 1))
+
+    def _recipient_chunks(self, message):
+        """Yield lists of (subscriber id, email) after the saved cursor."""
+        size = self.app.config["OUTBOX_BATCH_SIZE"]
+        cursor = message.cursor
+        while True:
+            rows = db.session.query(Subscriber.id, Subscriber.email)\
+                             .filter(Subscriber.id > cursor)\
+                             .order_by(Subscriber.id).limit(size).all()
+            if not rows:
+                return
+            yield rows
+            cursor = rows[-1][0]
+
+    def _retry_chunks(self, message, before):
+        """Yield lists of (None, email) for earlier failed deliveries that
+        may be retried (not the ones that just failed in this pass)."""
+        size = self.app.config["OUTBOX_BATCH_SIZE"]
+        rows = db.session.query(OutboxDelivery.email).filter(
+            OutboxDelivery.message_id == message.id,
+            OutboxDelivery.status == "failed",
+            OutboxDelivery.attempts < self.app.config["OUTBOX_MAX_ATTEMPTS"],
+            OutboxDelivery.updated_at < before
+        ).order_by(OutboxDelivery.id).all()
+        for start in range(0, len(rows), size):
+            yield [(None, email) for (email,) in rows[start:start + size]]
+
+    def _deliver(self, message):
+        started = datetime.utcnow()
+        for chunk in self._recipient_chunks(message):
+            self._send_chunk(message, chunk)
+        for chunk in self._retry_chunks(message, started):
+            self._send_chunk(message, chunk)
+
+        failed = OutboxDelivery.query.filter_by(message_id=message.id, status="failed")
+        message.failed_count = failed.count()
+        message.locked_by = None
+        message.locked_at = None
+        retryable = failed.filter(OutboxDelivery.attempts < self.app.config["OUTBOX_MAX_ATTEMPTS"])
+        if retryable.first() is not None:
+            message.attempts += 1
+            message.next_attempt_at = datetime.utcnow() + self._backoff(message.attempts)
+        else:
+            message.status = "sent"
+            message.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def _deliver_singles(self, messages):
+        """Send single-recipient messages over one connection; each one is
+        marked sent, or re-scheduled with backoff, in one commit."""
+        errors = {}
+        connection_error = None
+        try:
+            with self.mail.connect() as conn:
+                for message in messages:
+                    self._throttle()
+                    try:
+                        conn.send(Message(subject=message.subject, recipients=[message.recipient],
+                                          body=message.body))
+                        errors[message.id] = None
+                    except CONNECTION_ERRORS:
+                        raise
+                    except Exception as e:
+                        errors[message.id] = str(e)
+        except CONNECTION_ERRORS as e:
+            connection_error = e
+            logger.warning("Outbox connection failed: %s", e)
+
+        existing = {
+            d.message_id: d for d in OutboxDelivery.query.filter(
+                OutboxDelivery.message_id.in_([m.id for m in messages])
+            )
+        }
+        now = datetime.utcnow()
+        for message in messages:
+            message.locked_by = None
+            message.locked_at = None
+            attempted = message.id in errors
+            error = errors[message.id] if attempted else str(connection_error)
+
+            if attempted:
+                delivery = existing.get(message.id)
+                if delivery is None:
+                    delivery = OutboxDelivery(message_id=message.id, email=message.recipient, attempts=0)
+                    db.session.add(delivery)
+                delivery.attempts += 1
+                delivery.status = "failed" if error else "sent"
+                delivery.last_error = error
+                delivery.updated_at = now
+
+            if error is None:
+                message.status = "sent"
+                message.cursor = 1
+                message.sent_count = 1
+                message.failed_count = 0
+                message.finished_at = now
+                continue
+
+            message.attempts += 1
+            message.last_error = error
+            if message.attempts >= self.app.config["OUTBOX_MAX_ATTEMPTS"]:
+                message.status = "failed"
+                message.failed_count = 1
+                message.finished_at = now
+            else:
+                message.next_attempt_at = now + self._backoff(message.attempts)
+        db.session.commit()
+
+    def _send_chunk(self, message, chunk):
+        """Send one chunk over a single SMTP connection and persist every
+        outcome plus the new cursor in one commit."""
+        emails = [email for _, email in chunk]
+        existing = {
+            d.email: d for d in OutboxDelivery.query.filter(
+                OutboxDelivery.message_id == message.id,
+                OutboxDelivery.email.in_(emails)
+            )
+        }
+
+        done = []
+        connection_error = None
+        try:
+            with self.mail.connect() as conn:
+                for cursor, email in chunk:
+                    delivery = existing.get(email)
+                    if delivery is not None and delivery.status == "sent":
+                        done.append((cursor, None, None))
+                        continue
+                    self._throttle()
+                    try:
+                        conn.send(Message(subject=message.subject, recipients=[email], body=message.body))
+                        done.append((cursor, email, None))
+                    except CONNECTION_ERRORS:
+                        raise
+                    except Exception as e:
+                        done.append((cursor, email, str(e)))
+        except CONNECTION_ERRORS as e:
+            connection_error = e
+
+        now = datetime.utcnow()
+        for cursor, email, error in done:
+            if cursor is not None:
+                message.cursor = max(message.cursor, cursor)
+            if email is None:
+                continue
+            delivery = existing.get(email)
+            if delivery is None:
+                delivery = OutboxDelivery(message_id=message.id, email=email, attempts=0)
+                db.session.add(delivery)
+            delivery.attempts += 1
+            delivery.status = "failed" if error else "sent"
+            delivery.last_error = error
+            delivery.updated_at = now
+            if not error:
+                message.sent_count += 1
+        message.locked_at = now
+        db.session.commit()
+
+        if connection_error is not None:
+            raise connection_error
+
+    def _throttle(self):
+        rate = self.app.config["OUTBOX_RATE_PER_SECOND"]
+        if rate <= 0:
+            return
+        wait = self._last_send + 1.0 / rate - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_send = time.monotonic()
+
+    # ---- in-process sender thread ----------------------------------
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # forked gunicorn worker: start its own sender
+            self._pid = os.getpid()
+            self._thread = None
+            self.worker_id = f"{socket.gethostname()}:{self._pid}"
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="outbox-sender", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.run_pending()
+            except Exception:
+                logger.exception("Outbox sender crashed; retrying after poll interval")
+            self._wakeup.wait(self.app.config["OUTBOX_POLL_INTERVAL"])
+            self._wakeup.clear()
+
+    def serve_forever(self):
+        """Blocking loop for a dedicated ``flask outbox-worker`` process."""
+        while True:
+            processed = self.run_pending()
+            if not processed:
+                db.session.remove()
+                time.sleep(self.app.config["OUTBOX_POLL_INTERVAL"])
@@ -0,0 +1,176 @@
+# page_cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from flask import make_response, request, session
+
+from cache_versions import bump_version, cached_version
+
+CATALOG_VERSION = "catalog"
+
+
+def mark_catalog_changed() -> None:
+    """Call before committing any video or category insert/update/delete."""
+    bump_version(CATALOG_VERSION)
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "created", "generation", "mimetype")
+
+    def __init__(self, body, generation, mimetype):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.created = time.time()
+        self.generation = generation
+        self.mimetype = mimetype
+
+
+# =====================================================
+# ANONYMOUS PAGE CACHE
+# =====================================================
+class PageCache:
+    """In-process LRU of rendered public pages for anonymous visitors.
+
+    Entries are keyed on path, query string, template version and an
+    optional per-view variant, and are served with ETag/Last-Modified so
+    browsers and proxies can revalidate with a 304. Any video or category
+    change bumps the shared "catalog" generation, which retires every
+    entry in every worker; view and like counts shown on a page may be up
+    to PAGE_CACHE_MAX_AGE seconds old.
+
+    Config:
+        PAGE_CACHE_ENABLED         turn the cache off entirely
+        PAGE_CACHE_MAX_ENTRIES     LRU bound on entry count
+        PAGE_CACHE_MAX_BYTES       LRU bound on total body size
+        PAGE_CACHE_MAX_AGE         seconds a page may be served unchanged
+        PAGE_CACHE_CHECK_INTERVAL  seconds between catalog generation reads
+        PAGE_CACHE_TEMPLATE_VERSION  defaults to a hash of the templates
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PAGE_CACHE_ENABLED", True)
+        app.config.setdefault("PAGE_CACHE_MAX_ENTRIES", 2000)
+        app.config.setdefault("PAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        app.config.setdefault("PAGE_CACHE_MAX_AGE", 60)
+        app.config.setdefault("PAGE_CACHE_CHECK_INTERVAL", 2)
+        app.config.setdefault("PAGE_CACHE_TEMPLATE_VERSION", self._template_version(app))
+        app.extensions["page_cache"] = self
+        self.app = app
+
+    @staticmethod
+    def _template_version(app):
+        digest = hashlib.sha1()
+        folder = os.path.join(app.root_path, app.template_folder or "templates")
+        for root, _, files in sorted(os.walk(folder)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:12]
+
+    # ---- eligibility -----------------------------------------------
+    def _cacheable_request(self) -> bool:
+        if not self.app.config["PAGE_CACHE_ENABLED"] or request.method != "GET":
+            return False
+        # Logged-in users and pending flash messages get a fresh render.
+        return not (session.get("user_id") or session.get("role") or session.get("_flashes"))
+
+    def _key(self, variant):
+        query = "&".join(sorted(request.query_string.decode("latin-1").split("&")))
+        return (request.path, query, self.app.config["PAGE_CACHE_TEMPLATE_VERSION"], variant)
+
+    # ---- store -----------------------------------------------------
+    def _get(self, key, generation):
+        max_age = self.app.config["PAGE_CACHE_MAX_AGE"]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation or time.time() - entry.created > max_age:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        config = self.app.config
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._entries and (len(self._entries) > config["PAGE_CACHE_MAX_ENTRIES"]
+                                     or self._bytes > config["PAGE_CACHE_MAX_BYTES"]):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ---- responding ------------------------------------------------
+    def _not_modified(self, entry) -> bool:
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(entry.etag.strip('"'))
+        since = request.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return int(entry.created) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _respond(self, entry):
+        if self._not_modified(entry):
+            self.stats["not_modified"] += 1
+            response = make_response("", 304)
+        else:
+            response = make_response(entry.body)
+            response.mimetype = entry.mimetype
+        response.headers["ETag"] = entry.etag
+        response.headers["Last-Modified"] = formatdate(entry.created, usegmt=True)
+        # Storable, but always revalidated, so catalog edits show up at once.
+        # Responses that set a cookie stay out of shared caches.
+        response.headers["Cache-Control"] = "private, no-cache" if session.modified else "public, no-cache"
+        return response
+
+    def respond(self, render, variant=None):
+        """Serve `render()`'s page from cache for anonymous GETs.
+
+        `render` returns the page (str or Response) and runs only on a miss;
+        `variant` distinguishes per-visitor versions of the same URL."""
+        if not self._cacheable_request():
+            return render()
+
+        generation = cached_version(CATALOG_VERSION, self.app.config["PAGE_CACHE_CHECK_INTERVAL"])
+        key = self._key(variant)
+        entry = self._get(key, generation)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return self._respond(entry)
+
+        self.stats["misses"] += 1
+        response = make_response(render())
+        if response.status_code != 200:
+            return response
+        entry = _Entry(response.get_data(), generation, response.mimetype)
+        self._put(key, entry)
+        return self._respond(entry)
@@ -0,0 +1,180 @@
+# pagination.py
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_, text
+
+from cache_versions import cached_version
+from page_cache import CATALOG_VERSION
+
+NEXT = "n"
+PREV = "p"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# =====================================================
+# OPAQUE CURSORS
+# =====================================================
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(direction, values) -> str:
+    """Opaque, URL-safe token for "the page after/before this key"."""
+    payload = json.dumps([direction] + [_dump(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, size=None):
+    """(direction, values) from `encode_cursor`; raises InvalidCursor, also
+    when `size` is given and the cursor holds a different number of values."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        direction, values = payload[0], [_load(v) for v in payload[1:]]
+    except (binascii.Error, ValueError, TypeError, IndexError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREV) or not values or (size is not None and len(values) != size):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+# =====================================================
+# PAGES
+# =====================================================
+class KeysetPage:
+    """One page of a keyset listing. `next_url`/`prev_url` keep the current
+    endpoint and query string and swap in the new cursor."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, per_page=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def url_for_cursor(self, cursor):
+        args = request.args.to_dict()
+        args.pop("page", None)
+        args["cursor"] = cursor
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        return self.url_for_cursor(self.next_cursor) if self.has_next else None
+
+    @property
+    def prev_url(self):
+        return self.url_for_cursor(self.prev_cursor) if self.has_prev else None
+
+
+def page_window(rows, per_page, direction, had_cursor, key_of):
+    """Trim `per_page + 1` rows fetched in `direction` to display order and
+    work out the neighbouring cursors: (rows, next_cursor, prev_cursor).
+
+    The extra row only tells whether there is another page that way."""
+    more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if direction == PREV:
+        rows.reverse()
+    has_next = more if direction == NEXT else had_cursor
+    has_prev = more if direction == PREV else had_cursor
+    next_cursor = encode_cursor(NEXT, key_of(rows[-1])) if rows and has_next else None
+    prev_cursor = encode_cursor(PREV, key_of(rows[0])) if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
+
+
+def _beyond(keys, values, descending):
+    """Rows strictly past `values` in the listing's direction, as nested
+    OR/AND so it works on every backend and uses the composite index."""
+    key, value = keys[0], values[0]
+    past = key < value if descending else key > value
+    if len(keys) == 1:
+        return past
+    return or_(past, and_(key == value, _beyond(keys[1:], values[1:], descending)))
+
+
+def keyset_paginate(query, keys, per_page=20, cursor=None, total=None,
+                    descending=True, key_of=None):
+    """Page through `query` ordered by `keys`, e.g. (Video.date_added,
+    Video.id), newest first unless `descending` is False. Each page is one
+    indexed range scan of per_page + 1 rows, whatever its depth.
+
+    `cursor` is a token from a previous page; `total` is passed through
+    for display (see approximate_count). `key_of(item)` reads the key
+    values off a row when the keys are expressions rather than columns."""
+    direction, values = (NEXT, None) if not cursor else decode_cursor(cursor, len(keys))
+
+    # Walking backwards flips every comparison and the ORDER BY.
+    forward = descending if direction == NEXT else not descending
+    if values is not None:
+        query = query.filter(_beyond(keys, values, forward))
+    order = [key.desc() if forward else key.asc() for key in keys]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    if key_of is None:
+        names = [key.key for key in keys]
+        key_of = lambda item: [getattr(item, name) for name in names]  # noqa: E731
+    rows, next_cursor, prev_cursor = page_window(rows, per_page, direction, values is not None, key_of)
+    return KeysetPage(rows, next_cursor, prev_cursor, total, per_page)
+
+
+# =====================================================
+# APPROXIMATE TOTALS
+# =====================================================
+_counts_lock = threading.Lock()
+
+
+def approximate_count(key, compute):
+    """`compute()` cached per worker until the catalog changes or
+    PAGINATION_COUNT_MAX_AGE seconds pass, so listings show a total
+    without counting on every request."""
+    max_age = current_app.config.get("PAGINATION_COUNT_MAX_AGE", 300)
+    generation = cached_version(CATALOG_VERSION, current_app.config.get("PAGE_CACHE_CHECK_INTERVAL", 2))
+    now = time.time()
+    counts = current_app.extensions.setdefault("approximate_counts", {})  # key -> (generation, time, value)
+    cached = counts.get(key)
+    if cached is not None and cached[0] == generation and now - cached[1] < max_age:
+        return cached[2]
+
+    value = compute()
+    with _counts_lock:
+        if len(counts) >= 1000:
+            counts.clear()
+        counts[key] = (generation, now, value)
+    return value
+
+
+def table_estimate(session, table, exact):
+    """Planner row estimate for a whole table on PostgreSQL (no scan),
+    otherwise `exact()`."""
+    if session.get_bind().dialect.name == "postgresql":
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"), {"table": table}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return exact()
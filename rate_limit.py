@@ -0,0 +1,271 @@
+# rate_limit.py
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+
+from visitors import VISITOR_SESSION_KEY
+
+
+def _refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+def _wait(tokens, rate):
+    """Seconds until a bucket holding `tokens` has a whole one again."""
+    return (1 - tokens) / rate
+
+
+# =====================================================
+# BUCKET BACKENDS
+# =====================================================
+class MemoryBuckets:
+    """Token buckets in this worker's memory. Each gunicorn worker keeps
+    its own, so the effective limit is per worker."""
+
+    def __init__(self, idle=3600, max_keys=100_000):
+        self.idle = idle
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [tokens, updated]
+
+    def take(self, keys, rate, burst, now) -> float:
+        """Take a token from every bucket in `keys`, or from none of them.
+        Returns 0 when allowed, else the seconds until a retry can pass."""
+        with self._lock:
+            states = [self._buckets.get(key) for key in keys]
+            tokens = [_refill(s[0], s[1], now, rate, burst) if s else burst for s in states]
+            wait = max((_wait(t, rate) for t in tokens if t < 1), default=0)
+            if not wait:
+                for key, left in zip(keys, tokens):
+                    self._buckets[key] = [left - 1, now]
+                if len(self._buckets) > self.max_keys:
+                    self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # A bucket untouched for `idle` seconds is full again; forgetting it changes nothing.
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated >= self.idle]
+        for key in stale:
+            del self._buckets[key]
+
+
+class SQLiteBuckets:
+    """Token buckets in a small SQLite file shared by every worker on the
+    host (not the application database). Each take is one short
+    BEGIN IMMEDIATE transaction."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, idle=3600, timeout=0.5):
+        self.path = path
+        self.idle = idle
+        self.timeout = timeout
+        self._local = threading.local()
+        self._takes = 0
+
+    def _conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():  # never reuse a connection across fork
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing the buckets on a crash only refills them
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                         "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def take(self, keys, rate, burst, now) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            marks = ",".join("?" * len(keys))
+            stored = {key: (tokens, updated) for key, tokens, updated in conn.execute(
+                f"SELECT key, tokens, updated FROM buckets WHERE key IN ({marks})", keys)}
+            tokens = [_refill(*stored[key], now, rate, burst) if key in stored else burst for key in keys]
+            wait = max((_wait(t, rate) for t in tokens if t < 1), default=0)
+            if not wait:
+                conn.executemany(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    [(key, left - 1, now) for key, left in zip(keys, tokens)])
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+# =====================================================
+# ADMISSION CONTROL
+# =====================================================
+class _Counters:
+    __slots__ = ("allowed", "limited", "shed", "errors")
+
+    def __init__(self):
+        self.allowed = self.limited = self.shed = self.errors = 0
+
+
+class RateLimiter:
+    """Admission control for the anonymous write endpoints. Decorate a view
+    with ``@limit("like", per_minute=30, burst=10)``:
+
+    * every request takes a token from two buckets, one for the client
+      address (RATE_LIMIT_IP_FACTOR times larger, since many visitors can
+      share an address) and one for the logged-in user or anonymous
+      visitor id; an empty bucket answers 429 with Retry-After
+    * at most WRITE_CONCURRENCY decorated requests run at once in a worker
+      (so writes cannot take the whole connection pool); the rest get 503
+    Both checks run before the view, without touching the database.
+
+    Counters per limit (this worker) are shown on /admin/perf. If the
+    bucket store fails, requests are let through and counted as errors.
+    Behind a reverse proxy, wrap the app in ProxyFix so remote_addr is the
+    client's address.
+
+    Config:
+        RATE_LIMIT_ENABLED     turn the limiter off
+        RATE_LIMIT_BACKEND     memory (per worker) | sqlite (shared by the host's workers)
+        RATE_LIMIT_SQLITE_PATH bucket file for the sqlite backend
+        RATE_LIMITS            {name: (per_minute, burst)} overriding the decorators
+        RATE_LIMIT_IP_FACTOR   address buckets are this many times larger
+        WRITE_CONCURRENCY      decorated requests allowed at once per worker
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self._lock = threading.Lock()
+        self._gate = None
+        self._in_flight = 0
+        self._counters = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATE_LIMIT_ENABLED", True)
+        app.config.setdefault("RATE_LIMIT_BACKEND", "memory")
+        app.config.setdefault("RATE_LIMIT_SQLITE_PATH", os.path.join(app.instance_path, "rate_limits.db"))
+        app.config.setdefault("RATE_LIMITS", {})
+        app.config.setdefault("RATE_LIMIT_IP_FACTOR", 4)
+        app.config.setdefault("WRITE_CONCURRENCY", 4)
+        app.extensions["rate_limiter"] = self
+        self.app = app
+        self.backend = None
+        self._gate = None
+
+    def _backend(self):
+        if self.backend is None:
+            config = self.app.config
+            if config["RATE_LIMIT_BACKEND"] == "sqlite":
+                self.backend = SQLiteBuckets(config["RATE_LIMIT_SQLITE_PATH"])
+            else:
+                self.backend = MemoryBuckets()
+        return self.backend
+
+    def _semaphore(self):
+        with self._lock:
+            if self._gate is None:
+                self._gate = threading.BoundedSemaphore(self.app.config["WRITE_CONCURRENCY"])
+            return self._gate
+
+    def _count(self, name, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(name, _Counters())
+            setattr(counters, outcome, getattr(counters, outcome) + 1)
+
+    @staticmethod
+    def _client_keys(name):
+        keys = [f"{name}:ip:{request.remote_addr}"]
+        if session.get("user_id"):
+            keys.append(f"{name}:u:{session['user_id']}")
+        elif session.get(VISITOR_SESSION_KEY):
+            keys.append(f"{name}:v:{session[VISITOR_SESSION_KEY]}")
+        return keys
+
+    def check(self, name, per_minute, burst) -> float:
+        """Take this request's tokens for limit `name`: 0 if admitted, else
+        the seconds to wait."""
+        per_minute, burst = self.app.config["RATE_LIMITS"].get(name, (per_minute, burst))
+        rate = per_minute / 60.0
+        factor = self.app.config["RATE_LIMIT_IP_FACTOR"]
+        ip_key, *visitor_keys = self._client_keys(name)
+        now = time.time()
+        backend = self._backend()
+        # The address bucket is bigger, so it is taken separately.
+        wait = backend.take([ip_key], rate * factor, burst * factor, now)
+        if not wait and visitor_keys:
+            wait = backend.take(visitor_keys, rate, burst, now)
+        return wait
+
+    def call(self, name, per_minute, burst, view, *args, **kwargs):
+        """Run `view` if limit `name` admits this request; otherwise the
+        429/503 response."""
+        if not self.app.config["RATE_LIMIT_ENABLED"]:
+            return view(*args, **kwargs)
+        try:
+            wait = self.check(name, per_minute, burst)
+        except Exception:
+            current_app.logger.exception("Rate limit backend failed; letting %s through.", name)
+            self._count(name, "errors")
+            wait = 0
+        if wait:
+            self._count(name, "limited")
+            return self._reject(429, wait, "Too many requests.")
+
+        gate = self._semaphore()
+        if not gate.acquire(blocking=False):
+            self._count(name, "shed")
+            return self._reject(503, 1, "The server is busy.")
+        self._count(name, "allowed")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return view(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            gate.release()
+
+    @staticmethod
+    def _reject(status, wait, message):
+        seconds = max(1, int(wait + 0.999))
+        response = jsonify({"success": False, "message": f"{message} Try again in {seconds} s."})
+        response.status_code = status
+        response.headers["Retry-After"] = str(seconds)
+        return response
+
+    # ---- metrics ---------------------------------------------------
+    def summary(self):
+        """Counters per limit in this worker, plus writes running now."""
+        with self._lock:
+            limits = [{"name": name, "allowed": c.allowed, "limited": c.limited,
+                       "shed": c.shed, "errors": c.errors}
+                      for name, c in sorted(self._counters.items())]
+            return {"limits": limits, "in_flight": self._in_flight}
+
+    def reset(self):
+        """Forget buckets, counters and the gate size (tests, config changes)."""
+        with self._lock:
+            self._counters = {}
+            self._gate = None
+        self.backend = None
+
+
+def limit(name, per_minute, burst):
+    """Route decorator: admit requests through the RateLimiter of the app
+    handling them (see RateLimiter)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return current_app.extensions["rate_limiter"].call(name, per_minute, burst, view, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,392 @@
+# related.py
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from sqlalchemy import and_, delete, insert, or_, select, tuple_
+
+from category_tree import get_category_tree
+from leaderboards import increment_counters
+from models import db, RelatedVideo, Video, VideoCoView
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he her his in is it its of on or our
+    she that the their they this to was we were will with you your
+""".split())
+
+
+# =====================================================
+# TEXT AND CATEGORY SIGNALS
+# =====================================================
+def tokenize(text):
+    return [word for word in _WORD.findall((text or "").lower()) if word not in STOPWORDS]
+
+
+def term_counts(title, description):
+    """Bag of words for a video; title words count twice."""
+    counts = Counter(tokenize(description))
+    for word in tokenize(title):
+        counts[word] += 2
+    return counts
+
+
+def category_proximity(tree, a, b) -> float:
+    """1 for the same category, 0.6 for parent/child or siblings, 0.3 under
+    the same top-level category, otherwise 0."""
+    if a is None or b is None:
+        return 0.0
+    if a == b:
+        return 1.0
+    node_a, node_b = tree.get(a), tree.get(b)
+    if node_a is None or node_b is None:
+        return 0.0
+    if node_a.parent_id == node_b.id or node_b.parent_id == node_a.id \
+            or (node_a.parent_id is not None and node_a.parent_id == node_b.parent_id):
+        return 0.6
+    root_a = (node_a.ancestors or (node_a,))[-1]
+    root_b = (node_b.ancestors or (node_b,))[-1]
+    return 0.3 if root_a.id == root_b.id else 0.0
+
+
+def nearby_categories(tree, category_id):
+    """The category, its parent, siblings and children (proximity >= 0.6)."""
+    node = tree.get(category_id)
+    if node is None:
+        return []
+    ids = [node.id] + [c.id for c in node.children]
+    if node.parent_id is not None:
+        ids.append(node.parent_id)
+        ids.extend(c.id for c in tree.children_of(node.parent_id) if c.id != node.id)
+    return ids
+
+
+class _Corpus:
+    """TF-IDF unit vectors for every video, plus an inverted index over the
+    terms rare enough to be worth matching on.
+
+    `put`/`remove` keep it current between rebuilds; IDF weights of known
+    terms stay as they were at build time."""
+
+    def __init__(self, documents, max_df):
+        self.total = len(documents)
+        self.df = Counter(term for counts in documents.values() for term in counts)
+        self.idf = {term: math.log((1 + self.total) / (1 + n)) + 1 for term, n in self.df.items()}
+        self.limit = max(2, int(max_df * self.total))
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for video_id, counts in documents.items():
+            self._index(video_id, counts)
+
+    def _index(self, video_id, counts):
+        weights = {term: (1 + math.log(n)) * self.idf[term] for term, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vector = self.vectors[video_id] = {term: w / norm for term, w in weights.items()}
+        for term, weight in vector.items():
+            if self.df[term] <= self.limit:
+                self.postings[term].append((video_id, weight))
+
+    def put(self, video_id, counts):
+        self.remove(video_id)
+        self.total += 1
+        for term in counts:
+            self.df[term] += 1
+            self.idf.setdefault(term, math.log((1 + self.total) / 2) + 1)
+        self._index(video_id, counts)
+
+    def remove(self, video_id):
+        vector = self.vectors.pop(video_id, None)
+        if vector is None:
+            return
+        self.total -= 1
+        for term in vector:
+            self.df[term] -= 1
+            if term in self.postings:
+                self.postings[term] = [p for p in self.postings[term] if p[0] != video_id]
+
+    def similar(self, video_id):
+        """{other video id: cosine similarity} over shared indexed terms."""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(video_id, {}).items():
+            for other, other_weight in self.postings.get(term, ()):
+                scores[other] += weight * other_weight
+        scores.pop(video_id, None)
+        return scores
+
+
+class _Catalog:
+    """Per-video category, the text corpus, and the newest videos of each
+    category (the category candidates)."""
+
+    def __init__(self, rows, max_df, pool_size):
+        self.built = time.time()
+        self.pool_size = pool_size
+        self.categories, documents, self.pools = {}, {}, defaultdict(list)
+        for video_id, category_id, title, description in rows:  # newest first
+            self.categories[video_id] = category_id
+            documents[video_id] = term_counts(title, description)
+            pool = self.pools[category_id]
+            if len(pool) < pool_size:
+                pool.append(video_id)
+        self.corpus = _Corpus(documents, max_df)
+
+    def put(self, video_id, category_id, title, description):
+        self.remove(video_id)
+        self.categories[video_id] = category_id
+        self.corpus.put(video_id, term_counts(title, description))
+        pool = self.pools[category_id]
+        pool.insert(0, video_id)
+        del pool[self.pool_size:]
+
+    def remove(self, video_id):
+        if video_id in self.categories:
+            pool = self.pools[self.categories.pop(video_id)]
+            if video_id in pool:
+                pool.remove(video_id)
+        self.corpus.remove(video_id)
+
+
+# =====================================================
+# RELATED VIDEOS
+# =====================================================
+class RelatedVideos:
+    """Top-K related videos per video, precomputed into related_videos so
+    the watch page needs one indexed join.
+
+    A neighbour's score is a weighted sum of
+    * TF-IDF cosine similarity of title and description
+    * category proximity in the category tree
+    * co-views: visitors who watched both, as n / (n + RELATED_COVIEW_DAMPING)
+
+    Scores are symmetric. `rebuild()` recomputes everything (run
+    `flask rebuild-related` offline); `refresh(video_id)` recomputes one
+    video's list after add/edit against a per-worker copy of the corpus
+    and offers it to its best candidates' lists.
+    Co-views are buffered per worker and written by the view counter flush.
+
+    Config:
+        RELATED_TOP_K              neighbours stored per video
+        RELATED_TEXT_WEIGHT        weight of text similarity
+        RELATED_CATEGORY_WEIGHT    weight of category proximity
+        RELATED_COVIEW_WEIGHT      weight of co-views
+        RELATED_COVIEW_DAMPING     co-views at which that signal counts half
+        RELATED_CATEGORY_POOL      newest videos per nearby category considered
+        RELATED_MAX_DF             terms in more than this fraction of videos
+                                   are not used to find candidates
+        RELATED_CATALOG_MAX_AGE    seconds a worker reuses its text corpus for
+                                   refresh() before reloading it
+        RELATED_RECENT_VISITORS    visitors whose last video a worker remembers
+    """
+
+    def __init__(self, app=None, view_counter=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._coviews = Counter()  # (lower id, higher id) -> visitors
+        self._writing = Counter()  # co-views taken by the flush in progress
+        self._last_viewed = OrderedDict()  # visitor -> video id, least recent first
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, view_counter)
+
+    def init_app(self, app, view_counter=None):
+        app.config.setdefault("RELATED_TOP_K", 12)
+        app.config.setdefault("RELATED_TEXT_WEIGHT", 0.6)
+        app.config.setdefault("RELATED_CATEGORY_WEIGHT", 0.3)
+        app.config.setdefault("RELATED_COVIEW_WEIGHT", 0.5)
+        app.config.setdefault("RELATED_COVIEW_DAMPING", 5)
+        app.config.setdefault("RELATED_CATEGORY_POOL", 20)
+        app.config.setdefault("RELATED_MAX_DF", 0.2)
+        app.config.setdefault("RELATED_CATALOG_MAX_AGE", 300)
+        app.config.setdefault("RELATED_RECENT_VISITORS", 100_000)
+        app.extensions["related_videos"] = self
+        self.app = app
+        if view_counter is not None:
+            view_counter.add_flush_hook(self._write_coviews, self._restore_coviews)
+
+    # ---- co-views --------------------------------------------------
+    def record_view(self, visitor, video_id):
+        """`visitor` opened `video_id`: a co-view with the video they opened
+        before it on this worker, if any."""
+        with self._lock:
+            previous = self._last_viewed.pop(visitor, None)
+            self._last_viewed[visitor] = video_id
+            if len(self._last_viewed) > self.app.config["RELATED_RECENT_VISITORS"]:
+                self._last_viewed.popitem(last=False)
+            if previous is not None and previous != video_id:
+                self._coviews[(min(previous, video_id), max(previous, video_id))] += 1
+
+    def _write_coviews(self, conn, batch):
+        """View counter flush hook: runs inside the flush transaction."""
+        with self._lock:
+            pairs = self._writing = self._coviews
+            self._coviews = Counter()
+        increment_counters(conn, VideoCoView.__table__, ("video_id", "other_id"), (
+            {"video_id": a, "other_id": b, "count": n} for (a, b), n in pairs.items()
+        ))
+
+    def _restore_coviews(self):
+        """The flush failed: count its co-views again at the next one."""
+        with self._lock:
+            self._coviews.update(self._writing)
+            self._writing = Counter()
+
+    # ---- scoring ---------------------------------------------------
+    def _load_catalog(self):
+        config = self.app.config
+        rows = db.session.execute(
+            select(Video.id, Video.category_id, Video.title, Video.description)
+            .order_by(Video.date_added.desc(), Video.id.desc())
+        )
+        return _Catalog(rows, config["RELATED_MAX_DF"], config["RELATED_CATEGORY_POOL"])
+
+    def _cached_catalog(self):
+        """This worker's catalog, reloaded every RELATED_CATALOG_MAX_AGE
+        seconds so that other workers' edits are picked up."""
+        catalog = self._catalog
+        if catalog is None or time.time() - catalog.built >= self.app.config["RELATED_CATALOG_MAX_AGE"]:
+            catalog = self._catalog = self._load_catalog()
+        return catalog
+
+    @staticmethod
+    def _load_coviews(video_id=None):
+        coviews = defaultdict(dict)
+        query = select(VideoCoView.video_id, VideoCoView.other_id, VideoCoView.count)
+        if video_id is not None:
+            query = query.where(or_(VideoCoView.video_id == video_id, VideoCoView.other_id == video_id))
+        for a, b, n in db.session.execute(query):
+            coviews[a][b] = coviews[b][a] = n
+        return coviews
+
+    def _neighbours(self, video_id, catalog, coviews, tree, size):
+        """[(score, other id)] best first."""
+        config = self.app.config
+        categories = catalog.categories
+        text = catalog.corpus.similar(video_id)
+        seen = coviews.get(video_id, {})
+        category_id = categories.get(video_id)
+
+        candidates = set(text) | set(seen)
+        for nearby in nearby_categories(tree, category_id):
+            candidates.update(catalog.pools.get(nearby, ()))
+        candidates.discard(video_id)
+
+        damping = config["RELATED_COVIEW_DAMPING"]
+        scored = []
+        for other in candidates:
+            if other not in categories:
+                continue
+            together = seen.get(other, 0)
+            score = config["RELATED_TEXT_WEIGHT"] * text.get(other, 0.0) \
+                + config["RELATED_CATEGORY_WEIGHT"] * category_proximity(tree, category_id, categories[other]) \
+                + config["RELATED_COVIEW_WEIGHT"] * together / (together + damping)
+            if score > 0:
+                scored.append((score, other))
+        return heapq.nlargest(size, scored)
+
+    # ---- writing ---------------------------------------------------
+    def rebuild(self, batch_size=1000) -> int:
+        """Recompute every video's list; returns the number of rows written."""
+        with self._catalog_lock:
+            catalog = self._catalog = self._load_catalog()
+        coviews = self._load_coviews()
+        tree = get_category_tree()
+        size = self.app.config["RELATED_TOP_K"]
+        table = RelatedVideo.__table__
+
+        db.session.execute(delete(table))
+        rows, written = [], 0
+        for video_id in list(catalog.categories):
+            for score, other in self._neighbours(video_id, catalog, coviews, tree, size):
+                rows.append({"video_id": video_id, "related_id": other, "score": score})
+            if len(rows) >= batch_size:
+                db.session.execute(insert(table), rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(table), rows)
+            written += len(rows)
+        db.session.commit()
+        return written
+
+    def refresh(self, video_id):
+        """Recompute `video_id`'s list and place it in the lists of its best
+        candidates, on the current transaction (the caller commits)."""
+        row = db.session.execute(
+            select(Video.category_id, Video.title, Video.description).where(Video.id == video_id)
+        ).one_or_none()
+        if row is None:
+            return
+        tree = get_category_tree()
+        size = self.app.config["RELATED_TOP_K"]
+        table = RelatedVideo.__table__
+
+        coviews = self._load_coviews(video_id)
+        with self._catalog_lock:
+            catalog = self._cached_catalog()
+            catalog.put(video_id, *row)
+            candidates = self._neighbours(video_id, catalog, coviews, tree, size * 4)
+
+        self._unlink(video_id)
+        if not candidates:
+            return
+        db.session.execute(insert(table), [
+            {"video_id": video_id, "related_id": other, "score": score} for score, other in candidates[:size]
+        ])
+
+        # Scores are symmetric: offer this video to each candidate's list,
+        # pushing out its weakest entry when the list is full.
+        offered = dict((other, score) for score, other in candidates)
+        lists = defaultdict(list)
+        for owner, related_id, score in db.session.execute(
+            select(table.c.video_id, table.c.related_id, table.c.score).where(table.c.video_id.in_(offered))
+        ):
+            lists[owner].append((score, related_id))
+
+        added, dropped = [], []
+        for owner, score in offered.items():
+            current = lists[owner]
+            if len(current) < size:
+                added.append({"video_id": owner, "related_id": video_id, "score": score})
+                continue
+            weakest = min(current)
+            if score > weakest[0]:
+                added.append({"video_id": owner, "related_id": video_id, "score": score})
+                dropped.append((owner, weakest[1]))
+        if dropped:
+            db.session.execute(delete(table).where(tuple_(table.c.video_id, table.c.related_id).in_(dropped)))
+        if added:
+            db.session.execute(insert(table), added)
+
+    def _unlink(self, video_id):
+        table = RelatedVideo.__table__
+        db.session.execute(delete(table).where(or_(table.c.video_id == video_id, table.c.related_id == video_id)))
+
+    def forget(self, video_id):
+        """Drop a video that is about to be deleted from every list."""
+        self._unlink(video_id)
+        with self._catalog_lock:
+            if self._catalog is not None:
+                self._catalog.remove(video_id)
+
+    # ---- reading ---------------------------------------------------
+    def for_video(self, video, limit=6):
+        """Best related videos in one indexed join; videos not scored yet
+        fall back to the newest videos from nearby categories."""
+        videos = Video.query.join(RelatedVideo, and_(
+            RelatedVideo.related_id == Video.id, RelatedVideo.video_id == video.id
+        )).order_by(RelatedVideo.score.desc(), Video.id.desc()).limit(limit).all()
+        if videos:
+            return videos
+
+        category_ids = nearby_categories(get_category_tree(), video.category_id)
+        if not category_ids:
+            return []
+        return Video.query.filter(
+            Video.category_id.in_(category_ids),
+            Video.id != video.id
+        ).order_by(Video.date_added.desc()).limit(limit).all()
+
@@ -0,0 +1,222 @@
+# request_profiler.py
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("gospeltube.perf")
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace folded and IN-lists collapsed, so the
+    same query with different parameters maps to one shape."""
+    return _PLACEHOLDER_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _RequestStats:
+    __slots__ = ("started", "queries", "db_seconds", "shapes", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes = {}    # shape -> [count, seconds]
+        self.slowest = []   # (seconds, shape), longest first
+
+    def add(self, statement, seconds, keep):
+        self.queries += 1
+        self.db_seconds += seconds
+        shape = statement_shape(statement)
+        entry = self.shapes.setdefault(shape, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        if len(self.slowest) < keep or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[keep:]
+
+
+# Engine-wide listeners, shared by every app: statements count towards
+# the request being handled, if any.
+def _current():
+    if not has_app_context():
+        return None
+    return g.get("_request_stats")
+
+
+# The start time rides on the statement's execution context, so a
+# statement that raises takes it along instead of leaving it on the
+# connection for the next one to pick up.
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    started = getattr(context, "_profiler_started", None)
+    if stats is None or started is None:
+        return
+    stats.add(statement, time.perf_counter() - started, current_app.config["PERF_TOP_STATEMENTS"])
+
+
+# =====================================================
+# PER-REQUEST SQL PROFILER
+# =====================================================
+class RequestProfiler:
+    """Counts and times every SQL statement issued while a request is being
+    handled and reports it three ways:
+
+    * a ``Server-Timing: db;dur=..;desc="N queries", app;dur=..`` header
+    * a JSON line on the ``gospeltube.perf`` logger for slow requests or
+      requests with N+1 patterns (one statement shape repeated
+      PERF_REPEAT_THRESHOLD times or more)
+    * an in-memory history of recent requests for the /admin/perf page
+
+    Statements run outside a request (background threads, CLI) are ignored.
+
+    Config:
+        PERF_ENABLED            turn the profiler off entirely
+        PERF_SERVER_TIMING      add the Server-Timing header
+        PERF_SLOW_REQUEST_MS    requests slower than this are logged
+        PERF_REPEAT_THRESHOLD   repeats of one shape reported as N+1
+        PERF_TOP_STATEMENTS     slowest statements kept per request
+        PERF_HISTORY            recent requests kept for aggregation
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self.history = deque()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PERF_ENABLED", True)
+        app.config.setdefault("PERF_SERVER_TIMING", True)
+        app.config.setdefault("PERF_SLOW_REQUEST_MS", 500)
+        app.config.setdefault("PERF_REPEAT_THRESHOLD", 5)
+        app.config.setdefault("PERF_TOP_STATEMENTS", 5)
+        app.config.setdefault("PERF_HISTORY", 1000)
+        app.extensions["request_profiler"] = self
+        self.app = app
+        self.history = deque(maxlen=app.config["PERF_HISTORY"])
+
+        if not event.contains(Engine, "before_cursor_execute", _before_execute):
+            event.listen(Engine, "before_cursor_execute", _before_execute)
+            event.listen(Engine, "after_cursor_execute", _after_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    # ---- collecting ------------------------------------------------
+    def _start(self):
+        if self.app.config["PERF_ENABLED"]:
+            g._request_stats = _RequestStats()
+
+    # ---- reporting -------------------------------------------------
+    def _finish(self, response):
+        stats = g.get("_request_stats")
+        if stats is None:
+            return response
+
+        if self.app.config["PERF_SERVER_TIMING"]:
+            # For a streamed body this is the work done before the first byte.
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                f'app;dur={(time.perf_counter() - stats.started) * 1000:.1f}'
+            )
+
+        details = (request.method, request.path, request.endpoint, response.status_code)
+        if response.is_streamed:
+            # Streamed pages run their queries after this hook: record once sent.
+            response.call_on_close(lambda: self._record(stats, *details))
+        else:
+            g.pop("_request_stats")
+            self._record(stats, *details)
+        return response
+
+    def _record(self, stats, method, path, endpoint, status):
+        config = self.app.config
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_seconds * 1000
+
+        threshold = config["PERF_REPEAT_THRESHOLD"]
+        repeated = sorted(
+            ({"shape": shape, "count": count, "ms": round(seconds * 1000, 2)}
+             for shape, (count, seconds) in stats.shapes.items() if count >= threshold),
+            key=lambda item: item["count"], reverse=True
+        )
+        record = {
+            "time": time.time(),
+            "method": method,
+            "path": path,
+            "endpoint": endpoint,
+            "status": status,
+            "ms": round(total_ms, 2),
+            "db_ms": round(db_ms, 2),
+            "queries": stats.queries,
+            "repeated": repeated,
+            "slowest": [{"shape": shape, "ms": round(seconds * 1000, 2)} for seconds, shape in stats.slowest],
+        }
+        with self._lock:
+            self.history.append(record)
+
+        if total_ms >= config["PERF_SLOW_REQUEST_MS"] or repeated:
+            logger.warning(json.dumps(record, sort_keys=True))
+
+    def summary(self):
+        """Per-endpoint aggregates over the recent history, slowest p95 first."""
+        with self._lock:
+            records = list(self.history)
+
+        by_endpoint = {}
+        for record in records:
+            by_endpoint.setdefault(record["endpoint"] or record["path"], []).append(record)
+
+        rows = []
+        for endpoint, items in by_endpoint.items():
+            durations = [r["ms"] for r in items]
+            queries = [r["queries"] for r in items]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(items),
+                "p50_ms": percentile(durations, 0.50),
+                "p95_ms": percentile(durations, 0.95),
+                "avg_db_ms": round(sum(r["db_ms"] for r in items) / len(items), 2),
+                "avg_queries": round(sum(queries) / len(queries), 1),
+                "max_queries": max(queries),
+                "n_plus_one": sum(1 for r in items if r["repeated"]),
+            })
+        rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+
+        shapes = {}
+        for record in records:
+            for item in record["repeated"]:
+                entry = shapes.setdefault((record["endpoint"], item["shape"]), [0, 0])
+                entry[0] += 1
+                entry[1] = max(entry[1], item["count"])
+        repeated = sorted(
+            ({"endpoint": endpoint, "shape": shape, "requests": n, "max_count": most}
+             for (endpoint, shape), (n, most) in shapes.items()),
+            key=lambda item: (item["requests"], item["max_count"]), reverse=True
+        )
+
+        slow = sorted(records, key=lambda r: r["ms"], reverse=True)[:20]
+        return {"requests": len(records), "endpoints": rows, "repeated": repeated[:20], "slowest": slow}
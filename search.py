@@ -0,0 +1,466 @@
+# search.py
+import re
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, event, inspect, or_, text
+
+from category_tree import get_category_tree
+from models import db, Video, Category
+from pagination import NEXT, KeysetPage, approximate_count, decode_cursor, keyset_paginate, page_window
+
+# Highlight markers are control characters so they can never collide with
+# user content; they are swapped for <mark> after HTML-escaping.
+MARK_START = "\x02"
+MARK_END = "\x03"
+SNIPPET_WORDS = 16
+DEFAULT_PER_PAGE = 20
+# Every backend pages on (rank or date, video id).
+CURSOR_SIZE = 2
+
+
+# =====================================================
+# RESULTS
+# =====================================================
+def highlight(snippet: str) -> Markup:
+    """Escape a backend snippet and turn its markers into <mark> tags."""
+    escaped = str(escape(snippet or ""))
+    return Markup(escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+class SearchHit:
+    def __init__(self, video, rank, snippet):
+        self.video = video
+        self.rank = rank
+        self.snippet = highlight(snippet)
+
+
+class SearchPage(KeysetPage):
+    """A keyset page of SearchHits; `total` is a cached approximate count."""
+
+    def __init__(self, query, hits, next_cursor=None, prev_cursor=None, total=0,
+                 per_page=DEFAULT_PER_PAGE):
+        super().__init__(hits, next_cursor, prev_cursor, total, per_page)
+        self.query = query
+
+    @property
+    def hits(self):
+        return self.items
+
+    @property
+    def videos(self):
+        return [hit.video for hit in self.hits]
+
+
+def _load_hits(rows):
+    """rows: (video_id, rank, snippet) in rank order -> [SearchHit]."""
+    ids = [row[0] for row in rows]
+    videos = {v.id: v for v in Video.query.filter(Video.id.in_(ids)).all()} if ids else {}
+    return [SearchHit(videos[row[0]], row[1], row[2]) for row in rows if row[0] in videos]
+
+
+def _terms(query: str):
+    return re.findall(r"\w+", query.lower())
+
+
+def _document(video):
+    """(title, description, category name) for one video."""
+    category = get_category_tree().get(video.category_id)
+    return (video.title or "", video.description or "", category.name if category else "")
+
+
+def _documents():
+    query = db.session.query(Video.id, Video.title, Video.description, Category.name)\
+                      .outerjoin(Category, Category.id == Video.category_id)\
+                      .order_by(Video.id)
+    for video_id, title, description, category in query.yield_per(500):
+        yield video_id, title or "", description or "", category or ""
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+class SearchBackend:
+    """Interface every backend implements. Index writes go through
+    db.session, so they commit or roll back with the video change."""
+    name = "base"
+    table = None
+    batch_size = 500
+
+    def create_schema(self, conn):
+        pass
+
+    def drop_schema(self, conn):
+        if self.table:
+            conn.execute(text(f"DROP TABLE IF EXISTS {self.table}"))
+
+    def fill(self, conn):
+        """Index every video with one INSERT ... SELECT on `conn` (used by
+        the migration that adds the index to an existing database)."""
+
+    def is_ready(self) -> bool:
+        return self.table is None or inspect(db.session.connection()).has_table(self.table)
+
+    def _upsert(self, documents):
+        pass
+
+    def _delete(self, video_id):
+        pass
+
+    def _clear(self):
+        pass
+
+    def index_video(self, video):
+        self._upsert([(video.id, *_document(video))])
+
+    def remove_video(self, video_id):
+        self._delete(video_id)
+
+    def rebuild(self) -> int:
+        """Re-index every video in batches; returns the number indexed."""
+        self._clear()
+        count = 0
+        batch = []
+        for document in _documents():
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                self._upsert(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._upsert(batch)
+            count += len(batch)
+        return count
+
+    def search(self, query, cursor=None, per_page=DEFAULT_PER_PAGE) -> SearchPage:
+        """Hits in rank order. `cursor` comes from a previous page's
+        next/prev cursor and may raise pagination.InvalidCursor."""
+        raise NotImplementedError
+
+    def _total(self, key, compute):
+        return approximate_count(("search", self.name, key), compute)
+
+    @staticmethod
+    def _ranked_page(execute_ranked, cursor, per_page):
+        """Keyset-page a ranked id list; `execute_ranked(direction, values,
+        limit)` returns (video_id, rank) rows, best first for NEXT."""
+        direction, values = (NEXT, None) if not cursor else decode_cursor(cursor, CURSOR_SIZE)
+        rows = execute_ranked(direction, values, per_page + 1)
+        return page_window(rows, per_page, direction, values is not None,
+                           key_of=lambda row: [row[1], row[0]])
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback for databases without a full-text engine; keeps no index."""
+    name = "like"
+
+    def search(self, query, cursor=None, per_page=DEFAULT_PER_PAGE):
+        terms = _terms(query)
+        if not terms:
+            return SearchPage(query, [])
+
+        filters = [
+            or_(Video.title.ilike(f"%{term}%"), Video.description.ilike(f"%{term}%"))
+            for term in terms
+        ]
+        base = Video.query.filter(*filters)
+        total = self._total(tuple(terms), base.count)
+        page = keyset_paginate(base, (Video.date_added, Video.id), per_page, cursor, total)
+
+        pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+        hits = []
+        for video in page.items:
+            source = video.description or video.title or ""
+            words = source.split()[:SNIPPET_WORDS]
+            snippet = pattern.sub(lambda m: MARK_START + m.group(0) + MARK_END, " ".join(words))
+            hits.append(SearchHit(video, 0.0, snippet))
+        return SearchPage(query, hits, page.next_cursor, page.prev_cursor, total, per_page)
+
+
+class SqliteFTSSearchBackend(SearchBackend):
+    """FTS5 table keyed by videos.id (as rowid), ranked with bm25()."""
+    name = "fts5"
+    table = "video_search"
+    # bm25 column weights: title, description, category
+    weights = (10.0, 1.0, 4.0)
+
+    def create_schema(self, conn):
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(title, description, category, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+    def fill(self, conn):
+        conn.execute(text(
+            f"INSERT INTO {self.table} (rowid, title, description, category) "
+            "SELECT v.id, coalesce(v.title, ''), coalesce(v.description, ''), coalesce(c.name, '') "
+            "FROM videos v LEFT JOIN categories c ON c.id = v.category_id"
+        ))
+
+    def _upsert(self, documents):
+        rows = [
+            {"id": video_id, "title": title, "description": description, "category": category}
+            for video_id, title, description, category in documents
+        ]
+        db.session.execute(text(f"DELETE FROM {self.table} WHERE rowid = :id"), rows)
+        db.session.execute(
+            text(f"INSERT INTO {self.table} (rowid, title, description, category) "
+                 "VALUES (:id, :title, :description, :category)"),
+            rows
+        )
+
+    def _delete(self, video_id):
+        db.session.execute(text(f"DELETE FROM {self.table} WHERE rowid = :id"), {"id": video_id})
+
+    def _clear(self):
+        db.session.execute(text(f"DELETE FROM {self.table}"))
+
+    @staticmethod
+    def match_expression(query):
+        """Each word becomes a quoted prefix term, all required (AND)."""
+        return " ".join(f'"{term}"*' for term in _terms(query))
+
+    def search(self, query, cursor=None, per_page=DEFAULT_PER_PAGE):
+        match = self.match_expression(query)
+        if not match:
+            return SearchPage(query, [])
+
+        total = self._total(match, lambda: db.session.execute(
+            text(f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH :match").execution_options(replica=True),
+            {"match": match}
+        ).scalar())
+
+        # bm25: lower is better. Ties break on newest rowid first.
+        def ranked(direction, values, limit):
+            params = {"match": match, "limit": limit}
+            where = ""
+            if values is not None:
+                params.update(rank=values[0], after=values[1])
+                where = ("WHERE rank > :rank OR (rank = :rank AND rowid < :after)" if direction == NEXT
+                         else "WHERE rank < :rank OR (rank = :rank AND rowid > :after)")
+            order = "rank, rowid DESC" if direction == NEXT else "rank DESC, rowid"
+            return db.session.execute(
+                text(
+                    f"SELECT rowid, rank FROM (SELECT rowid, "
+                    f"bm25({self.table}, {', '.join(map(str, self.weights))}) AS rank "
+                    f"FROM {self.table} WHERE {self.table} MATCH :match) "
+                    f"{where} ORDER BY {order} LIMIT :limit"
+                ).execution_options(replica=True),
+                params
+            ).all()
+
+        rows, next_cursor, prev_cursor = self._ranked_page(ranked, cursor, per_page)
+        # Snippets only for the page being shown.
+        snippets = dict(db.session.execute(
+            text(
+                f"SELECT rowid, snippet({self.table}, -1, :start, :end, '…', {SNIPPET_WORDS}) "
+                f"FROM {self.table} WHERE {self.table} MATCH :match AND rowid IN :ids"
+            ).bindparams(bindparam("ids", expanding=True)).execution_options(replica=True),
+            {"match": match, "start": MARK_START, "end": MARK_END, "ids": [row[0] for row in rows]}
+        ).all()) if rows else {}
+        hits = _load_hits([(video_id, rank, snippets.get(video_id, "")) for video_id, rank in rows])
+        return SearchPage(query, hits, next_cursor, prev_cursor, total, per_page)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Weighted tsvector per video in a side table with a GIN index,
+    ranked with ts_rank()."""
+    name = "postgres"
+    table = "video_search"
+
+    @property
+    def config(self):
+        return current_app.config.get("SEARCH_TEXT_CONFIG", "simple")
+
+    def create_schema(self, conn):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "video_id INTEGER PRIMARY KEY REFERENCES videos (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{self.table}_document "
+            f"ON {self.table} USING GIN (document)"
+        ))
+
+    def fill(self, conn):
+        conn.execute(text(
+            f"INSERT INTO {self.table} (video_id, document) SELECT v.id, "
+            "setweight(to_tsvector(CAST(:config AS regconfig), coalesce(v.title, '')), 'A') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), coalesce(c.name, '')), 'B') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), coalesce(v.description, '')), 'C') "
+            "FROM videos v LEFT JOIN categories c ON c.id = v.category_id"
+        ), {"config": self.config})
+
+    def _upsert(self, documents):
+        rows = [
+            {"id": video_id, "title": title, "description": description,
+             "category": category, "config": self.config}
+            for video_id, title, description, category in documents
+        ]
+        db.session.execute(
+            text(
+                f"INSERT INTO {self.table} (video_id, document) VALUES (:id, "
+                "setweight(to_tsvector(CAST(:config AS regconfig), :title), 'A') || "
+                "setweight(to_tsvector(CAST(:config AS regconfig), :category), 'B') || "
+                "setweight(to_tsvector(CAST(:config AS regconfig), :description), 'C')) "
+                "ON CONFLICT (video_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            rows
+        )
+
+    def _delete(self, video_id):
+        db.session.execute(text(f"DELETE FROM {self.table} WHERE video_id = :id"), {"id": video_id})
+
+    def _clear(self):
+        db.session.execute(text(f"DELETE FROM {self.table}"))
+
+    def search(self, query, cursor=None, per_page=DEFAULT_PER_PAGE):
+        terms = _terms(query)
+        if not terms:
+            return SearchPage(query, [])
+
+        # Prefix-match every word, all required: "grace:* & hymn:*"
+        params = {"tsquery": " & ".join(f"{t}:*" for t in terms), "config": self.config}
+        tsquery = "to_tsquery(CAST(:config AS regconfig), :tsquery)"
+        total = self._total(params["tsquery"], lambda: db.session.execute(
+            text(f"SELECT count(*) FROM {self.table} WHERE document @@ {tsquery}").execution_options(replica=True),
+            params
+        ).scalar())
+
+        # ts_rank: higher is better. Ties break on newest video id first.
+        def ranked(direction, values, limit):
+            where = ""
+            extra = {"limit": limit}
+            if values is not None:
+                extra.update(rank=values[0], after=values[1])
+                where = ("AND (rank < :rank OR (rank = :rank AND video_id < :after))" if direction == NEXT
+                         else "AND (rank > :rank OR (rank = :rank AND video_id > :after))")
+            order = "rank DESC, video_id DESC" if direction == NEXT else "rank, video_id"
+            return db.session.execute(
+                text(
+                    "SELECT video_id, rank FROM (SELECT s.video_id, ts_rank(s.document, q) AS rank "
+                    f"FROM {self.table} s, {tsquery} q WHERE s.document @@ q) ranked "
+                    f"WHERE TRUE {where} ORDER BY {order} LIMIT :limit"
+                ).execution_options(replica=True),
+                dict(params, **extra)
+            ).all()
+
+        rows, next_cursor, prev_cursor = self._ranked_page(ranked, cursor, per_page)
+        headlines = dict(db.session.execute(
+            text(
+                "SELECT v.id, ts_headline(CAST(:config AS regconfig), "
+                f"coalesce(v.description, v.title), {tsquery}, :headline) "
+                "FROM videos v WHERE v.id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True)).execution_options(replica=True),
+            dict(params, ids=[row[0] for row in rows],
+                 headline=f"StartSel={MARK_START}, StopSel={MARK_END}, "
+                          f"MaxWords={SNIPPET_WORDS}, MinWords=5")
+        ).all()) if rows else {}
+        hits = _load_hits([(video_id, rank, headlines.get(video_id, "")) for video_id, rank in rows])
+        return SearchPage(query, hits, next_cursor, prev_cursor, total, per_page)
+
+
+# =====================================================
+# BACKEND SELECTION
+# =====================================================
+BACKENDS = {
+    backend.name: backend
+    for backend in (LikeSearchBackend, SqliteFTSSearchBackend, PostgresSearchBackend)
+}
+
+
+def _sqlite_has_fts5(conn) -> bool:
+    options = conn.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def backend_name_for(conn) -> str:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        return "postgres"
+    if dialect == "sqlite" and _sqlite_has_fts5(conn):
+        return "fts5"
+    return "like"
+
+
+def configured_backend() -> SearchBackend:
+    """The backend SEARCH_BACKEND (auto|fts5|postgres|like) asks for,
+    whether or not its index exists yet."""
+    name = current_app.config.get("SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = backend_name_for(db.session.connection())
+    return BACKENDS[name]()
+
+
+def get_search_backend() -> SearchBackend:
+    """Backend serving the current app, cached per process once its index
+    table exists. Until `flask rebuild-search-index` has created it, the
+    LIKE fallback answers queries and index writes are skipped."""
+    backend = current_app.extensions.get("search")
+    if backend is None:
+        backend = configured_backend()
+        if not backend.is_ready():
+            return LikeSearchBackend()
+        current_app.extensions["search"] = backend
+    return backend
+
+
+def check_cursor(cursor):
+    """Raise pagination.InvalidCursor for a token no backend can page with,
+    before a streamed results page has sent its 200."""
+    if cursor:
+        decode_cursor(cursor, CURSOR_SIZE)
+
+
+def index_video(video):
+    """Add or refresh `video` in the index; call after flush, before commit."""
+    get_search_backend().index_video(video)
+
+
+def remove_video(video_id):
+    get_search_backend().remove_video(video_id)
+
+
+def index_documents(documents):
+    """Add or refresh many (video id, title, description, category name)
+    documents in batches; call after flush, before commit."""
+    backend = get_search_backend()
+    for start in range(0, len(documents), backend.batch_size):
+        backend._upsert(documents[start:start + backend.batch_size])
+
+
+def reindex_category(category):
+    """Refresh every video of a renamed category (before its commit, while
+    the cached category tree still has the old name)."""
+    rows = db.session.query(Video.id, Video.title, Video.description)\
+                     .filter(Video.category_id == category.id).all()
+    index_documents([(video_id, title or "", description or "", category.name)
+                     for video_id, title, description in rows])
+
+
+def rebuild_index() -> int:
+    """Create the configured backend's table if missing and re-index every
+    video. Used by `flask rebuild-search-index`."""
+    backend = configured_backend()
+    backend.create_schema(db.session.connection())
+    count = backend.rebuild()
+    db.session.commit()
+    current_app.extensions["search"] = backend
+    return count
+
+
+# =====================================================
+# SCHEMA HOOKS (db.create_all / db.drop_all)
+# =====================================================
+@event.listens_for(Video.__table__, "after_create")
+def _create_search_table(target, connection, **kw):
+    backend = BACKENDS[backend_name_for(connection)]()
+    backend.create_schema(connection)
+
+
+@event.listens_for(Video.__table__, "before_drop")
+def _drop_search_table(target, connection, **kw):
+    backend = BACKENDS[backend_name_for(connection)]()
+    backend.drop_schema(connection)
@@ -0,0 +1,35 @@
+# streaming.py
+from flask import current_app, stream_template
+
+# Rendered output is sent in pieces of at least this many characters, except
+# that the page head leaves as soon as it is complete (before the first query
+# runs) so the browser can start on the stylesheets.
+CHUNK_SIZE = 2048
+HEAD_END = "</head>"
+
+
+def _coalesce(chunks, size):
+    buffer, length, head_sent = [], 0, False
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if not head_sent and HEAD_END in chunk:
+            head_sent = True
+            length = size
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_page(template_name, **context):
+    """Response that sends `template_name` while it renders.
+
+    Pass the page's data as callables (e.g. ``listing=lambda: ...``) and
+    call them in the template where the data is first needed, so the head
+    and CSS reach the browser before the queries run. Anything that can
+    fail with a 4xx (a bad cursor) must be checked before calling this:
+    once streaming starts the status is 200."""
+    chunks = stream_template(template_name, **context)
+    return current_app.response_class(_coalesce(chunks, CHUNK_SIZE), mimetype="text/html")
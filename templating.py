@@ -0,0 +1,74 @@
+# templating.py
+import os
+import re
+
+from jinja2 import FileSystemBytecodeCache
+from jinja2.ext import Extension
+
+# Whitespace inside these elements is content, not layout.
+_PRESERVED = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.S | re.I)
+_INDENT = re.compile(r"\n[ \t\r\n]*")
+
+
+def collapse_whitespace(source):
+    """Drop indentation and blank lines from template source. Line breaks
+    stay (inline JS keeps its semicolon insertion) and <pre>/<textarea>
+    blocks are left untouched."""
+    parts = _PRESERVED.split(source)
+    # split() yields: text, match, group 2, text, match, group 2, ...
+    return "".join(
+        part if i % 3 == 1 else _INDENT.sub("\n", part)
+        for i, part in enumerate(parts) if i % 3 != 2
+    )
+
+
+class CollapseWhitespace(Extension):
+    """Applies collapse_whitespace to .html templates as they compile, so
+    the work is done once per template (and cached as bytecode), never on
+    rendered values such as comment text."""
+
+    def preprocess(self, source, name, filename=None):
+        if name and name.endswith(".html"):
+            return collapse_whitespace(source)
+        return source
+
+
+class Templating:
+    """Jinja settings that cut rendering CPU.
+
+    Compiled templates are cached as bytecode under JINJA_BYTECODE_CACHE_DIR,
+    which every worker on the host shares: after a restart or deploy a
+    worker loads the bytecode instead of parsing and compiling each
+    template again. Entries are keyed by the template source's checksum, so
+    an edited template is recompiled, and files are written atomically.
+
+    Config:
+        JINJA_BYTECODE_CACHE_DIR  bytecode cache (default: <instance>/jinja_cache;
+                                  None turns it off)
+        HTML_COLLAPSE_WHITESPACE  strip indentation from .html templates
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("JINJA_BYTECODE_CACHE_DIR", os.path.join(app.instance_path, "jinja_cache"))
+        app.config.setdefault("HTML_COLLAPSE_WHITESPACE", False)
+        app.extensions["templating"] = self
+        self.app = app
+
+        collapse = app.config["HTML_COLLAPSE_WHITESPACE"]
+        if collapse:
+            app.jinja_env.add_extension(CollapseWhitespace)
+        directory = app.config["JINJA_BYTECODE_CACHE_DIR"]
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                return  # read-only deploy: compile in memory as before
+            # The checksum covers the raw source, not the preprocessed one:
+            # keep the two variants in separate files.
+            pattern = "__jinja2_%s.collapsed.cache" if collapse else "__jinja2_%s.cache"
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory, pattern)
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models import db, User  # noqa: E402
+
+ASSETS_OUTPUT_DIR = tempfile.mkdtemp(prefix="gospeltube-assets-")
+JINJA_BYTECODE_CACHE_DIR = tempfile.mkdtemp(prefix="gospeltube-jinja-")
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A new app, with its own in-memory database and caches, per test."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://",
+                      "ASSETS_OUTPUT_DIR": ASSETS_OUTPUT_DIR,
+                      "JINJA_BYTECODE_CACHE_DIR": JINJA_BYTECODE_CACHE_DIR,
+                      "TESTING": True, "OUTBOX_WORKER": "cli", "PAGE_CACHE_ENABLED": False,
+                      "LEADERBOARD_REFRESH_INTERVAL": 0, "RELATED_CATALOG_MAX_AGE": 0,
+                      "THUMBNAIL_DIR": str(tmp_path / "thumbnails"), "THUMBNAIL_WORKER": "off",
+                      "THUMBNAIL_RETRY_AFTER": 0, "RATE_LIMIT_ENABLED": False})
+    # Never reach img.youtube.com from tests.
+    app.extensions["thumbnails"].fetcher = lambda video_id: None
+    with app.app_context():
+        db.create_all()
+        yield app
+        # Flush buffered views while this test's in-memory database still exists.
+        app.extensions["view_counter"].flush()
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def uploader(app):
+    user = User(username="uploader", email="uploader@example.com", password="x", role="uploader")
+    db.session.add(user)
+    db.session.commit()
+    return user
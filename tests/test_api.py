@@ -0,0 +1,76 @@
+from models import db, Category, Video
+
+
+def _catalog(uploader):
+    music = Category(name="Music", slug="music")
+    db.session.add(music)
+    db.session.flush()
+    db.session.add(Category(name="Choirs", slug="choirs", parent_id=music.id))
+    db.session.flush()
+    choirs = Category.query.filter_by(slug="choirs").one()
+    for n, category_id in enumerate([music.id, choirs.id, choirs.id, None]):
+        db.session.add(Video(title=f"Song {n}", video_id=f"song{n}", category_id=category_id,
+                             uploaded_by=uploader.id, likes_count=n))
+    db.session.commit()
+
+
+def test_category_videos_page_through_subcategories_with_etags(app, client, uploader):
+    _catalog(uploader)
+
+    tree = client.get("/api/v1/categories").get_json()
+    assert tree["categories"] == [{"slug": "music", "name": "Music",
+                                   "children": [{"slug": "choirs", "name": "Choirs", "children": []}]}]
+
+    first = client.get("/api/v1/categories/music/videos?limit=2&fields=title,likes")
+    body = first.get_json()
+    assert [set(v) for v in body["videos"]] == [{"video_id", "title", "likes"}] * 2
+    rest = client.get(f"/api/v1/categories/music/videos?limit=2&cursor={body['next_cursor']}").get_json()
+    assert len(body["videos"]) + len(rest["videos"]) == 3 and rest["next_cursor"] is None
+
+    assert first.headers["Cache-Control"] == "public, max-age=60"
+    again = client.get("/api/v1/categories/music/videos?limit=2&fields=title,likes",
+                       headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and not again.data
+
+    video = Video.query.filter_by(video_id=body["videos"][0]["video_id"]).one()
+    video.title = "Renamed"
+    db.session.commit()
+    changed = client.get("/api/v1/categories/music/videos?limit=2&fields=title,likes",
+                         headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and changed.get_json()["videos"][0]["title"] == "Renamed"
+
+
+def test_video_detail_and_batch_lookup(app, client, uploader, monkeypatch):
+    _catalog(uploader)
+
+    detail = client.get("/api/v1/videos/song1").get_json()
+    assert detail["category"] == {"slug": "choirs", "name": "Choirs"}
+    assert detail["uploader"] == uploader.username and detail["url"].endswith("/video/song1")
+    assert client.get("/api/v1/videos/nope").status_code == 404
+    assert client.get("/api/v1/videos/song1?fields=bogus").status_code == 400
+
+    batch = client.get("/api/v1/videos?ids=song3,missing1,song0,song3").get_json()
+    assert [v["video_id"] for v in batch["videos"]] == ["song3", "song0"]
+    assert batch["missing"] == ["missing1"]
+
+    monkeypatch.setitem(app.config, "API_BATCH_LIMIT", 2)
+    assert client.get("/api/v1/videos?ids=a,b,c").status_code == 400
+
+
+def test_views_and_etag_follow_the_stored_count(app, client, uploader):
+    _catalog(uploader)
+    video = Video.query.filter_by(video_id="song1").one()
+    counter = app.extensions["view_counter"]
+    first = client.get("/api/v1/videos/song1")
+
+    # A view still buffered in this worker is invisible to the other
+    # workers, so it must not change this one's answer either.
+    counter.record(video.id)
+    pending = client.get("/api/v1/videos/song1")
+    assert pending.get_json()["views"] == first.get_json()["views"] == 0
+    assert pending.headers["ETag"] == first.headers["ETag"]
+
+    counter.flush()
+    db.session.expire_all()  # requests here share the fixture's session
+    flushed = client.get("/api/v1/videos/song1", headers={"If-None-Match": first.headers["ETag"]})
+    assert flushed.status_code == 200 and flushed.get_json()["views"] == 1
@@ -0,0 +1,38 @@
+import gzip
+import os
+
+from assets import build, minify_css
+
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    source = tmp_path / "src"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "a.css").write_text("/* header */\nbody {\n    color: red;\n}\n")
+    (source / "css" / "b.css").write_text(".x > .y , .z { margin: 0 auto; }\n")
+
+    manifest = build(str(source), str(tmp_path / "out"), {"site.css": ["css/a.css", "css/b.css"]})
+
+    filename = manifest["site.css"]
+    assert filename.startswith("site.") and filename.endswith(".css") and len(filename) == len("site..css") + 12
+    body = (tmp_path / "out" / filename).read_bytes()
+    assert body == b"body{color:red}.x>.y,.z{margin:0 auto}"
+    assert gzip.decompress((tmp_path / "out" / (filename + ".gz")).read_bytes()) == body
+    assert os.path.exists(tmp_path / "out" / "manifest.json")
+    assert minify_css("a:hover { color: blue; }") == "a:hover{color:blue}"
+
+
+def test_pages_link_bundles_served_immutable(app, client, uploader):
+    page = client.get("/search")  # extends base.html
+    html = page.get_data(as_text=True)
+    assert "<style>" not in html
+    href = html.split('href="/static/dist/base.', 1)[1].split('"', 1)[0]
+
+    compressed = client.get(f"/static/dist/base.{href}", headers={"Accept-Encoding": "gzip"})
+    plain = client.get(f"/static/dist/base.{href}")
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data and b"category-bar" in plain.data
+    assert plain.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert "Accept-Encoding" in plain.headers["Vary"] and "Content-Encoding" not in plain.headers
+    assert client.get("/static/dist/manifest.json").status_code == 404
+    assert client.get("/static/dist/../app.py").status_code == 404
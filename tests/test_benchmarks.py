@@ -0,0 +1,23 @@
+from benchmarks.catalog import generate_catalog
+from benchmarks.runner import check_budgets, run_all, uncovered_endpoints
+from models import Category, Video
+
+
+def test_catalog_is_seeded_as_a_two_level_tree(app):
+    summary = generate_catalog(categories=10, videos=50, uploaders=2, subscribers=5, seed=7)
+
+    assert summary["videos"] == Video.query.count() == 50
+    roots = Category.query.filter(Category.parent_id.is_(None)).all()
+    assert len(roots) == 2
+    for child in Category.query.filter(Category.parent_id.isnot(None)):
+        assert child.parent.parent_id is None
+
+
+def test_every_route_runs_within_expected_status(app):
+    generate_catalog(categories=10, videos=50, uploaders=2, subscribers=5, seed=7)
+
+    results = run_all(app, iterations=1, warmup=0)
+
+    assert uncovered_endpoints(app, results) == []
+    assert check_budgets(results, {}) == []
+    assert results["index"]["queries"] > 0
@@ -0,0 +1,69 @@
+from sqlalchemy import event, update
+
+from app import create_app
+from cache_versions import bump_version, current_version, on_version_bump
+from category_tree import get_category_tree, mark_categories_changed
+from models import db, CacheVersion, Category
+
+
+def test_bumps_commit_with_the_transaction(app):
+    calls = []
+    on_version_bump("test-stamp", lambda: calls.append("bumped"))
+
+    bump_version("test-stamp")
+    bump_version("test-stamp")
+    assert calls == []  # listeners wait for the commit
+    db.session.commit()
+    assert calls == ["bumped"] and current_version("test-stamp") == 2
+
+    bump_version("test-stamp")
+    db.session.rollback()
+    db.session.commit()
+    assert current_version("test-stamp") == 2 and calls == ["bumped"]
+
+
+def test_category_tree_reloads_only_after_a_change(app, monkeypatch):
+    monkeypatch.setitem(app.config, "CATEGORY_TREE_CHECK_INTERVAL", 60)
+    worship = Category(name="Worship", slug="worship")
+    db.session.add(worship)
+    db.session.flush()
+    db.session.add(Category(name="Hymns", slug="hymns", parent_id=worship.id))
+    mark_categories_changed()
+    db.session.commit()
+
+    tree = get_category_tree()
+    assert [node.slug for node in tree.by_slug["worship"].children] == ["hymns"]
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert get_category_tree() is tree
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    # Another worker's change shows up at the next version check.
+    db.session.add(Category(name="Choir", slug="choir", parent_id=worship.id))
+    db.session.execute(update(CacheVersion).where(CacheVersion.name == "categories")
+                       .values(version=CacheVersion.version + 1))
+    db.session.commit()
+    assert get_category_tree() is tree
+    monkeypatch.setitem(app.config, "CATEGORY_TREE_CHECK_INTERVAL", 0)
+    assert [node.slug for node in get_category_tree().by_slug["worship"].children] == ["hymns", "choir"]
+
+
+def test_each_app_keeps_its_own_tree(tmp_path):
+    apps = {}
+    for name, category in (("a", "Hymns"), ("b", "Sermons")):
+        apps[name] = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / name}.db",
+                                 "OUTBOX_WORKER": "cli", "THUMBNAIL_WORKER": "off"})
+        with apps[name].app_context():
+            db.create_all()
+            db.session.add(Category(name=category, slug=category.lower()))
+            mark_categories_changed()
+            db.session.commit()
+
+    # Both databases hold categories version 1; neither app may reuse the other's tree.
+    for name, expected in (("a", ["Hymns"]), ("b", ["Sermons"]), ("a", ["Hymns"])):
+        with apps[name].app_context():
+            assert [node.name for node in get_category_tree().roots] == expected
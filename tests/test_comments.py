@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from models import db, Comment, Video
+
+
+def _video_with_comments(uploader, count):
+    video = Video(title="Hymn", video_id="hymn0000001", uploaded_by=uploader.id, comments_count=count)
+    db.session.add(video)
+    db.session.commit()
+    start = datetime(2024, 1, 1)
+    db.session.execute(insert(Comment), [
+        {"video_id": video.id, "content": f"comment {n}", "author_name": "Visitor",
+         "timestamp": start + timedelta(minutes=n)} for n in range(count)
+    ])
+    db.session.commit()
+    return video
+
+
+def test_video_page_embeds_only_the_first_page(app, client, uploader):
+    _video_with_comments(uploader, 45)
+
+    page = client.get("/video/hymn0000001").get_data(as_text=True)
+    assert "comment 44" in page and "comment 25" in page and "comment 24" not in page
+
+    seen, cursor = [], None
+    while True:
+        body = client.get("/video/hymn0000001/comments", query_string={"order": "oldest", "cursor": cursor or ""}).get_json()
+        seen += [c["content"] for c in body["comments"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"comment {n}" for n in range(45)]
+    assert client.get("/video/hymn0000001/comments?order=sideways").status_code == 400
+
+
+def test_posting_a_comment_bumps_the_count(app, client, uploader):
+    video = _video_with_comments(uploader, 2)
+
+    response = client.post("/video/hymn0000001/comments", json={"content": "  Amen  ", "name": "Grace"})
+
+    body = response.get_json()
+    assert body["comments_count"] == 3
+    assert body["comment"]["author"] == "Grace" and body["comment"]["content"] == "Amen"
+    db.session.refresh(video)
+    assert video.comments_count == Comment.query.filter_by(video_id=video.id).count() == 3
+    assert client.post("/video/hymn0000001/comments", json={"content": " "}).status_code == 400
+    assert client.post("/video/missing/comments", json={"content": "Hi"}).status_code == 404
@@ -0,0 +1,44 @@
+import gzip
+import zlib
+
+from models import db, Video
+from templating import collapse_whitespace
+
+
+def test_pages_are_gzipped_and_revalidate_weakly(app, client, uploader, monkeypatch):
+    monkeypatch.setitem(app.config, "PAGE_CACHE_ENABLED", True)
+    app.extensions["page_cache"].clear()
+    db.session.add(Video(title="Hymn", video_id="hymn0000001", uploaded_by=uploader.id))
+    db.session.commit()
+
+    plain = client.get("/video/hymn0000001")
+    compressed = client.get("/video/hymn0000001", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.headers["Vary"]
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers["ETag"] == "W/" + plain.headers["ETag"]
+    revalidated = client.get("/video/hymn0000001", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+    # Below COMPRESS_MIN_SIZE the body goes out as it is.
+    small = client.get("/api/v1/categories", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+def test_streamed_pages_are_compressed_chunk_by_chunk(app, client):
+    response = client.get("/search?q=hymn", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    chunks = iter(response.response)
+    decompressor = zlib.decompressobj(31)
+
+    # The head can be decoded before the rest of the page is rendered.
+    assert "</head>" in decompressor.decompress(next(chunks)).decode()
+    rest = b"".join(decompressor.decompress(chunk) for chunk in chunks)
+    response.close()
+    assert rest.rstrip().endswith(b"</html>")
+    assert "Content-Length" not in response.headers
+
+
+def test_collapse_whitespace_keeps_textarea_content():
+    source = "<div>\n    <p>Hi</p>\n\n    <textarea>\n  keep\n</textarea>\n  </div>"
+    assert collapse_whitespace(source) == "<div>\n<p>Hi</p>\n<textarea>\n  keep\n</textarea>\n</div>"
@@ -0,0 +1,73 @@
+import threading
+from datetime import datetime, timedelta
+
+import digests
+from app import create_app
+from digests import run_digests
+from models import db, OutboxMessage, Subscriber, Video
+
+
+def test_digest_links_every_new_video(app, uploader, monkeypatch):
+    monkeypatch.setitem(app.config, "SITE_URL", "https://gospeltube.example")
+    monkeypatch.setitem(app.config, "DIGEST_MAX_VIDEOS", 2)
+    start = datetime(2024, 1, 1)
+    db.session.add(Subscriber(email="a@example.com", last_digest_at=start, next_digest_at=start))
+    db.session.add_all([
+        Video(title=f"Hymn {n}", video_id=f"hymn000000{n}", uploaded_by=uploader.id,
+              date_added=start + timedelta(hours=n)) for n in range(1, 4)
+    ])
+    db.session.commit()
+
+    now = start + timedelta(days=1)
+    assert run_digests(app.extensions["outbox"], now=now) == 1
+    assert run_digests(app.extensions["outbox"], now=now) == 0  # watermark moved
+
+    message = OutboxMessage.query.one()
+    assert message.recipient == "a@example.com" and message.subject == "2+ new videos on GospelTube"
+    assert "https://gospeltube.example/video/hymn0000003" in message.body
+    assert "https://gospeltube.example/video/hymn0000001" not in message.body
+    assert "more at https://gospeltube.example/videos" in message.body
+
+
+def test_concurrent_runs_queue_one_digest_per_subscriber(tmp_path, monkeypatch):
+    # Its own file database, so each thread gets a real connection.
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'digests.db'}",
+                      "OUTBOX_WORKER": "cli", "THUMBNAIL_WORKER": "off"})
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Video(title="Hymn", video_id="hymn0000001", uploaded_by=1, date_added=start))
+        db.session.add_all(Subscriber(email=f"s{n}@example.com", last_digest_at=start - timedelta(days=1),
+                                      next_digest_at=start) for n in range(3))
+        db.session.commit()
+
+    # Both runs have read the same due subscribers before either claims one.
+    both_read = threading.Barrier(2, timeout=5)
+    compose = digests._compose
+    waited = threading.local()
+
+    def compose_after_both_read(*args):
+        if not getattr(waited, "done", False):
+            waited.done = True
+            both_read.wait()
+        return compose(*args)
+
+    monkeypatch.setattr(digests, "_compose", compose_after_both_read)
+    counts = []
+
+    def run():
+        with app.app_context():
+            counts.append(run_digests(app.extensions["outbox"], now=start + timedelta(hours=1)))
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        recipients = [m.recipient for m in OutboxMessage.query]
+        db.session.remove()
+        db.engine.dispose()
+    assert sorted(counts) == [0, 3]
+    assert sorted(recipients) == [f"s{n}@example.com" for n in range(3)]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from category_tree import mark_categories_changed
+from homepage import build_homepage_data, latest_videos_by_category
+from models import db, Category, Video
+
+
+def _add_category_with_videos(index, uploader, parent=None, videos=12):
+    cat = Category(name=f"Category {index}", slug=f"category-{index}", parent=parent)
+    db.session.add(cat)
+    mark_categories_changed()
+    db.session.flush()
+    base = datetime(2024, 1, 1)
+    for n in range(videos):
+        db.session.add(Video(
+            title=f"Video {index}-{n}",
+            video_id=f"vid-{index}-{n}",
+            category_id=cat.id,
+            uploaded_by=uploader.id,
+            date_added=base + timedelta(hours=n)
+        ))
+    db.session.commit()
+    return cat
+
+
+def _count_homepage_queries(client):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_homepage_query_count_is_constant(client, uploader):
+    parent = _add_category_with_videos(0, uploader)
+    _add_category_with_videos(1, uploader, parent=parent)
+    baseline = _count_homepage_queries(client)
+
+    for index in range(2, 30):
+        top = _add_category_with_videos(index * 10, uploader)
+        _add_category_with_videos(index * 10 + 1, uploader, parent=top)
+
+    assert _count_homepage_queries(client) == baseline
+
+
+def test_latest_videos_are_capped_and_newest_first(app, uploader):
+    cat = _add_category_with_videos(0, uploader, videos=15)
+    latest = latest_videos_by_category([cat.id], limit=10)[cat.id]
+
+    assert len(latest) == 10
+    assert latest[0].title == "Video 0-14"
+    assert [v.date_added for v in latest] == sorted((v.date_added for v in latest), reverse=True)
+
+
+def test_homepage_data_keeps_template_shape(app, uploader):
+    parent = _add_category_with_videos(0, uploader, videos=2)
+    child = _add_category_with_videos(1, uploader, parent=parent, videos=3)
+    _add_category_with_videos(2, uploader, videos=0)
+
+    data = build_homepage_data()
+
+    assert [block["category"].id for block in data] == [parent.id]
+    assert len(data[0]["parent_videos"]) == 2
+    assert data[0]["children"][0]["category"].id == child.id
+    assert len(data[0]["children"][0]["videos"]) == 3
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from leaderboards import hour_bucket, record_activity
+from models import db, Category, Video
+
+
+def _videos(uploader, *specs):
+    """One video per (views, category) pair; views=None keeps the default."""
+    videos = []
+    for n, (views, category) in enumerate(specs):
+        video = Video(title=f"Hymn {n}", video_id=f"hymn000000{n}", uploaded_by=uploader.id,
+                      category=category)
+        if views is not None:
+            video.views = views
+        videos.append(video)
+    db.session.add_all(videos)
+    db.session.commit()
+    return videos
+
+
+def test_popular_ranks_unwatched_videos_last(app, uploader):
+    worship, choir = Category(name="Worship", slug="worship"), Category(name="Choir", slug="choir")
+    unwatched, five, nine, three = _videos(uploader, (None, worship), (5, worship), (9, choir), (3, choir))
+    boards = app.extensions["leaderboards"]
+
+    assert unwatched.views == 0
+    assert boards.popular() == [nine, five, three, unwatched]
+    assert boards.popular_in_category([choir.id]) == [nine, three]
+    assert boards.popular_in_category([worship.id, choir.id], limit=3) == [nine, five, three]
+
+
+def test_trending_decays_with_age_and_weighs_likes(app, uploader):
+    recent, older, liked, stale = _videos(uploader, (0, None), (0, None), (0, None), (0, None))
+    now = hour_bucket(datetime.utcnow())
+    record_activity(db.session.connection(), [
+        {"video_id": recent.id, "bucket": now, "views": 10, "likes": 0},
+        {"video_id": older.id, "bucket": now - timedelta(hours=24), "views": 16, "likes": 0},
+        {"video_id": liked.id, "bucket": now, "views": 0, "likes": 3},  # TRENDING_LIKE_WEIGHT 5
+        {"video_id": stale.id, "bucket": now - timedelta(hours=72), "views": 1000, "likes": 0},
+    ])
+    record_activity(db.session.connection(), [
+        {"video_id": older.id, "bucket": now - timedelta(hours=24), "views": 2, "likes": 0},
+    ])  # 18 views a half-life ago count as 9
+    db.session.commit()
+
+    assert app.extensions["leaderboards"].trending() == [liked, recent, older]
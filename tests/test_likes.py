@@ -0,0 +1,39 @@
+import likes
+from likes import liked_video_ids
+from models import db, Like, Video
+
+
+def _video(uploader):
+    video = Video(title="Hymn", video_id="hymn0000001", uploaded_by=uploader.id)
+    db.session.add(video)
+    db.session.commit()
+    return video
+
+
+def _likes(client):
+    return client.post("/like_video/hymn0000001").get_json()["likes"]
+
+
+def test_repeat_likes_are_counted_once_per_visitor_and_user(app, client, uploader):
+    video = _video(uploader)
+    other_visitor = app.test_client()
+    user = app.test_client()
+    with user.session_transaction() as session:
+        session["user_id"] = uploader.id
+
+    assert [_likes(client), _likes(client)] == [1, 1]
+    assert [_likes(other_visitor), _likes(user), _likes(user)] == [2, 3, 3]
+
+    db.session.refresh(video)
+    assert video.likes_count == Like.query.filter_by(video_id=video.id).count() == 3
+    assert liked_video_ids([video.id], "user_id", uploader.id) == {video.id}
+    assert liked_video_ids([video.id], "user_id", uploader.id + 1) == set()
+
+
+def test_repeat_likes_without_upsert_support(app, client, uploader, monkeypatch):
+    monkeypatch.setattr(likes.sqlite3, "sqlite_version_info", (3, 20, 0))  # INSERT OR IGNORE path
+    video = _video(uploader)
+
+    assert [_likes(client), _likes(client)] == [1, 1]
+    db.session.refresh(video)
+    assert video.likes_count == Like.query.filter_by(video_id=video.id).count() == 1
@@ -0,0 +1,41 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _flask_db(database, *args):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    return subprocess.run([sys.executable, "-m", "flask", "--app", "app", "db", *args],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def _upgrade_and_check(database):
+    upgrade = _flask_db(database, "upgrade")
+    assert upgrade.returncode == 0, upgrade.stderr
+    check = _flask_db(database, "check")  # the models and the migrated schema agree
+    assert check.returncode == 0, check.stderr
+
+
+def test_empty_database_upgrades_to_the_models(tmp_path):
+    _upgrade_and_check(tmp_path / "new.db")
+
+
+def test_pre_migration_database_upgrades_in_place(tmp_path):
+    database = tmp_path / "old.db"
+    shutil.copy(os.path.join(ROOT, "instance", "gospeltube.db"), database)
+    with sqlite3.connect(database) as conn:
+        (user_id,) = conn.execute("SELECT id FROM users").fetchone()
+        conn.execute("INSERT INTO subscribers (email) VALUES ('s@example.com')")
+        video_id = conn.execute("INSERT INTO videos (title, video_id, uploaded_by) VALUES ('Amazing Grace', 'hymn0000001', ?)",
+                                (user_id,)).lastrowid
+        conn.execute("INSERT INTO comments (content, user_id, video_id) VALUES ('Lovely', ?, ?)", (user_id, video_id))
+
+    _upgrade_and_check(database)
+    with sqlite3.connect(database) as conn:
+        assert conn.execute("SELECT rowid FROM video_search WHERE video_search MATCH 'grace'").fetchall() == [(video_id,)]
+        assert conn.execute("SELECT digest_frequency FROM subscribers").fetchall() == [("immediate",)]
+        assert conn.execute("SELECT comments_count FROM videos").fetchall() == [(1,)]
@@ -0,0 +1,141 @@
+import smtplib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, OutboxDelivery, OutboxMessage, Subscriber
+from outbox import Outbox
+
+
+class StubMail:
+    """Stands in for Flask-Mail: records what each connection sent."""
+
+    def __init__(self, refuse=(), disconnect_after=None):
+        self.connections = []
+        self.refuse = set(refuse)
+        self.disconnect_after = disconnect_after
+
+    @contextmanager
+    def connect(self):
+        sent = []
+        self.connections.append(sent)
+        yield self
+
+    def send(self, message):
+        (email,) = message.recipients
+        if self.disconnect_after is not None and self.sent_total() >= self.disconnect_after:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        if email in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({email: (550, b"no such user")})
+        self.connections[-1].append(email)
+
+    def sent_total(self):
+        return sum(len(sent) for sent in self.connections)
+
+    def all_sent(self):
+        return [email for sent in self.connections for email in sent]
+
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    for name, value in {"OUTBOX_BATCH_SIZE": 2, "OUTBOX_RATE_PER_SECOND": 0,
+                        "OUTBOX_MAX_ATTEMPTS": 3, "OUTBOX_RETRY_BASE": 60}.items():
+        monkeypatch.setitem(app.config, name, value)
+    monkeypatch.setitem(app.extensions, "outbox", app.extensions["outbox"])
+    return Outbox(app, StubMail())
+
+
+def _subscribers(count):
+    emails = [f"s{n}@example.com" for n in range(count)]
+    db.session.add_all(Subscriber(email=email) for email in emails)
+    db.session.commit()
+    return emails
+
+
+def _broadcast(outbox):
+    message = outbox.enqueue("new_video", subject="New hymn", body="Watch it")
+    db.session.commit()
+    return message
+
+
+def _make_due(message):
+    message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_broadcast_fans_out_in_chunks(app, outbox):
+    emails = _subscribers(5)
+    message = _broadcast(outbox)
+
+    assert outbox.run_pending() == 1
+    assert outbox.mail.connections == [emails[0:2], emails[2:4], emails[4:5]]
+    db.session.refresh(message)
+    assert (message.status, message.sent_count, message.failed_count) == ("sent", 5, 0)
+    assert message.cursor == Subscriber.query.order_by(Subscriber.id.desc()).first().id
+    assert outbox.run_pending() == 0
+
+
+def test_crashed_send_resumes_without_resending(app, outbox):
+    emails = _subscribers(5)
+    message = _broadcast(outbox)
+    outbox.mail.disconnect_after = 3
+
+    before = datetime.utcnow()
+    assert outbox.process_next()
+    db.session.refresh(message)
+    assert message.status == "pending" and message.attempts == 1 and message.locked_by is None
+    assert before + timedelta(seconds=59) < message.next_attempt_at  # OUTBOX_RETRY_BASE
+    assert not outbox.process_next()  # not due yet
+
+    # A worker dies mid-chunk after recording deliveries but before its
+    # cursor moved; its lease then expires.
+    outbox.mail.disconnect_after = None
+    message.cursor = 0
+    message.locked_by = "dead-worker:1"
+    message.locked_at = datetime.utcnow()
+    _make_due(message)
+    assert not outbox.process_next()  # still leased
+    message.locked_at = datetime.utcnow() - timedelta(seconds=app.config["OUTBOX_LEASE_SECONDS"] + 1)
+    db.session.commit()
+
+    assert outbox.process_next()
+    assert sorted(outbox.mail.all_sent()) == emails  # everyone exactly once
+    db.session.refresh(message)
+    assert message.status == "sent" and message.sent_count == 5
+
+
+def test_refused_recipients_are_retried_with_backoff(app, outbox):
+    emails = _subscribers(3)
+    message = _broadcast(outbox)
+    outbox.mail.refuse = {emails[1]}
+
+    outbox.process_next()
+    db.session.refresh(message)
+    first_retry = message.next_attempt_at
+    assert message.status == "pending" and message.failed_count == 1
+
+    _make_due(message)
+    outbox.process_next()
+    db.session.refresh(message)
+    assert message.attempts == 2 and message.next_attempt_at - datetime.utcnow() > timedelta(seconds=119)
+    assert first_retry - datetime.utcnow() < timedelta(seconds=61)
+
+    _make_due(message)
+    outbox.process_next()  # third and last attempt
+    db.session.refresh(message)
+    delivery = OutboxDelivery.query.filter_by(message_id=message.id, email=emails[1]).one()
+    assert message.status == "sent" and message.failed_count == 1
+    assert delivery.status == "failed" and delivery.attempts == 3
+    assert outbox.mail.all_sent().count(emails[0]) == 1
+
+
+def test_single_recipient_messages_share_a_connection(app, outbox):
+    for n in range(2):
+        outbox.enqueue("welcome", subject="Welcome", body="Hi", recipient=f"w{n}@example.com")
+    db.session.commit()
+
+    assert outbox.run_pending() == 1
+    assert outbox.mail.connections == [["w0@example.com", "w1@example.com"]]
+    assert {m.status for m in OutboxMessage.query} == {"sent"}
+    assert outbox.run_pending() == 0 and outbox.mail.sent_total() == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from models import db, Video
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PAGE_CACHE_ENABLED", True)
+    page_cache = app.extensions["page_cache"]
+    page_cache.clear()
+    return page_cache
+
+
+def _video(uploader):
+    video = Video(title="Amazing Grace", video_id="hymn0000001", uploaded_by=uploader.id)
+    db.session.add(video)
+    db.session.commit()
+    return video
+
+
+def test_repeat_visits_are_served_from_cache_and_revalidated(app, client, uploader, cache):
+    _video(uploader)
+    hits = cache.stats["hits"]
+
+    first = client.get("/")
+    second = client.get("/")
+    assert first.data == second.data and cache.stats["hits"] == hits + 1
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["Cache-Control"] in ("public, no-cache", "private, no-cache")
+
+    not_modified = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304 and not_modified.data == b""
+    since = client.get("/", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    admin = app.test_client()
+    with admin.session_transaction() as session:
+        session["role"] = "admin"
+    misses = cache.stats["misses"]
+    admin.get("/")
+    assert cache.stats["misses"] == misses  # logged-in pages bypass the cache
+
+
+def test_catalog_writes_retire_cached_pages(app, client, uploader, cache):
+    video = _video(uploader)
+    page = client.get("/video/hymn0000001")
+    assert b"Amazing Grace" in page.data
+
+    admin = app.test_client()
+    with admin.session_transaction() as session:
+        session["role"] = "admin"
+    admin.post(f"/admin/videos/{video.id}/edit", data={"title": "Be Thou My Vision", "description": ""})
+
+    fresh = client.get("/video/hymn0000001", headers={"If-None-Match": page.headers["ETag"]})
+    assert fresh.status_code == 200 and b"Be Thou My Vision" in fresh.data
+    assert fresh.headers["ETag"] != page.headers["ETag"]
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Category, Video
+from pagination import InvalidCursor, keyset_paginate
+import search as search_index
+
+
+def _add_videos(uploader, count):
+    category = Category(name="Worship", slug="worship")
+    db.session.add(category)
+    db.session.flush()
+    base = datetime(2024, 1, 1)
+    for n in range(count):
+        video = Video(
+            title=f"Grace {n}", video_id=f"vid-{n}", category_id=category.id,
+            uploaded_by=uploader.id,
+            # Pairs share a timestamp so ties on date_added are exercised.
+            date_added=base + timedelta(hours=n // 2)
+        )
+        db.session.add(video)
+        db.session.flush()
+        search_index.index_video(video)
+    db.session.commit()
+
+
+def _walk(fetch):
+    """Follow next cursors to the end, then prev cursors back to the start."""
+    pages = [fetch(None)]
+    while pages[-1].has_next:
+        pages.append(fetch(pages[-1].next_cursor))
+    backwards = [pages[-1]]
+    while backwards[-1].has_prev:
+        backwards.append(fetch(backwards[-1].prev_cursor))
+    return pages, backwards[::-1]
+
+
+def test_keyset_pages_cover_every_video_once_in_both_directions(app, uploader):
+    _add_videos(uploader, 23)
+    keys = (Video.date_added, Video.id)
+
+    forward, backward = _walk(lambda cursor: keyset_paginate(Video.query, keys, per_page=5, cursor=cursor))
+
+    ids = [v.id for page in forward for v in page.items]
+    expected = [v.id for v in Video.query.order_by(Video.date_added.desc(), Video.id.desc())]
+    assert ids == expected
+    assert [len(p.items) for p in forward] == [5, 5, 5, 5, 3]
+    assert [[v.id for v in p.items] for p in backward] == [[v.id for v in p.items] for p in forward]
+    assert not forward[0].has_prev
+
+
+def test_search_pages_follow_rank_order(app, uploader):
+    _add_videos(uploader, 23)
+    backend = search_index.get_search_backend()
+
+    forward, backward = _walk(lambda cursor: backend.search("grace", cursor=cursor, per_page=4))
+
+    ids = [hit.video.id for page in forward for hit in page.hits]
+    assert sorted(ids) == sorted(v.id for v in Video.query)
+    assert len(ids) == len(set(ids))
+    assert forward[0].total == 23
+    assert [[h.video.id for h in p.hits] for p in backward] == [[h.video.id for h in p.hits] for p in forward]
+
+
+def test_garbage_cursor_is_rejected(app, client):
+    with pytest.raises(InvalidCursor):
+        keyset_paginate(Video.query, (Video.date_added, Video.id), cursor="not-a-cursor")
+    assert client.get("/videos?cursor=not-a-cursor").status_code == 400
+    assert client.get("/search?q=grace&cursor=not-a-cursor").status_code == 400
+
+
+def test_listing_pages_stream_the_head_before_querying(app, client, uploader):
+    _add_videos(uploader, 23)
+
+    for path in ("/search?q=grace", "/videos"):
+        response = client.get(path, buffered=False)
+        chunks = iter(response.response)
+        head = next(chunks)
+        assert response.is_streamed and b"</head>" in head and b"Grace" not in head
+        assert b"Grace" in b"".join(chunks)
+        response.close()
+
+
+def test_admin_video_api_walks_a_sorted_filtered_listing(app, client, uploader):
+    _add_videos(uploader, 12)
+    for video in Video.query:
+        video.views = video.id % 3
+    db.session.commit()
+    with client.session_transaction() as session:
+        session["user_id"] = uploader.id
+        session["role"] = "admin"
+
+    ids, cursor = [], None
+    while True:
+        data = client.get("/admin/api/videos", query_string={
+            "sort": "views", "order": "asc", "q": "grace 1", "per_page": 1, "cursor": cursor or ""
+        }).get_json()
+        assert data["success"] and data["total"] == 3
+        ids += [v["id"] for v in data["videos"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    matching = Video.query.filter(Video.title.like("Grace 1%")).all()
+    assert ids == [v.id for v in sorted(matching, key=lambda v: (v.views, v.id))]
+    assert client.get("/admin/api/videos?sort=nope").status_code == 400
@@ -0,0 +1,55 @@
+from sqlalchemy import event
+
+from models import db, Video
+from rate_limit import SQLiteBuckets
+
+
+def _enable(app, monkeypatch, **config):
+    monkeypatch.setitem(app.config, "RATE_LIMIT_ENABLED", True)
+    for name, value in config.items():
+        monkeypatch.setitem(app.config, name, value)
+    app.extensions["rate_limiter"].reset()
+
+
+def test_over_the_limit_gets_a_429_without_queries(app, client, uploader, monkeypatch):
+    _enable(app, monkeypatch, RATE_LIMITS={"like": (60, 2)}, RATE_LIMIT_IP_FACTOR=1)
+    db.session.add(Video(title="Hymn", video_id="hymn0000001", uploaded_by=uploader.id))
+    db.session.commit()
+
+    assert [client.post("/like_video/hymn0000001").status_code for _ in range(2)] == [200, 200]
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        limited = client.post("/like_video/hymn0000001")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert limited.status_code == 429 and statements == []
+    assert limited.headers["Retry-After"] == "1" and limited.get_json()["success"] is False
+    assert app.extensions["rate_limiter"].summary()["limits"] == [
+        {"name": "like", "allowed": 2, "limited": 1, "shed": 0, "errors": 0}]
+
+
+def test_concurrency_cap_sheds_writes(app, client, monkeypatch):
+    _enable(app, monkeypatch, WRITE_CONCURRENCY=1)
+    limiter = app.extensions["rate_limiter"]
+    gate = limiter._semaphore()
+    gate.acquire()
+    try:
+        response = client.post("/subscribe", json={"email": "a@example.com"})
+    finally:
+        gate.release()
+
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    assert client.post("/subscribe", json={"email": "a@example.com"}).status_code == 200
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+
+    assert first.take(["k"], rate=1, burst=2, now=100) == 0
+    assert second.take(["k"], rate=1, burst=2, now=100) == 0
+    assert first.take(["k"], rate=1, burst=2, now=100) == 1
+    assert second.take(["k", "other"], rate=1, burst=2, now=101) == 0
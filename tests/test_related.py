@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from models import db, Category, RelatedVideo, Video, VideoCoView
+
+
+def _catalog(uploader):
+    music = Category(name="Music", slug="music")
+    sermons = Category(name="Sermons", slug="sermons")
+    db.session.add_all([music, sermons])
+    db.session.flush()
+    base = datetime(2024, 1, 1)
+    titles = [
+        (music, "Amazing grace choir", "Choir sings amazing grace"),
+        (music, "Morning worship", "Worship songs for the morning"),
+        (music, "Evening worship", "Worship songs for the evening"),
+        (sermons, "Grace and forgiveness", "A sermon on amazing grace"),
+        (sermons, "Faith in hard times", "Sermon about faith"),
+    ]
+    videos = []
+    for n, (category, title, description) in enumerate(titles):
+        video = Video(title=title, description=description, video_id=f"vid-{n}",
+                      category_id=category.id, uploaded_by=uploader.id,
+                      date_added=base + timedelta(days=n))
+        db.session.add(video)
+        videos.append(video)
+    db.session.commit()
+    return videos
+
+
+def _related_ids(video_id):
+    return [r.related_id for r in RelatedVideo.query.filter_by(video_id=video_id)
+            .order_by(RelatedVideo.score.desc())]
+
+
+def test_rebuild_ranks_text_category_and_coviews(app, uploader):
+    related = app.extensions["related_videos"]
+    grace, morning, evening, grace_sermon, faith = _catalog(uploader)
+
+    related.rebuild()
+    # Same category and shared words beat either signal alone.
+    assert _related_ids(morning.id)[0] == evening.id
+    # Shared rare words pull a video in from another category.
+    assert grace_sermon.id in _related_ids(grace.id)
+
+    db.session.add(VideoCoView(video_id=grace.id, other_id=faith.id, count=50))
+    db.session.commit()
+    related.rebuild()
+    assert _related_ids(faith.id)[0] == grace.id
+
+
+def test_refresh_and_coviews_from_the_watch_page(app, client, uploader):
+    related = app.extensions["related_videos"]
+    grace, morning, evening, grace_sermon, faith = _catalog(uploader)
+    related.rebuild()
+
+    hymn = Video(title="Amazing grace hymn", description="Old hymn", video_id="vid-new",
+                 category_id=grace.category_id, uploaded_by=uploader.id)
+    db.session.add(hymn)
+    db.session.flush()
+    related.refresh(hymn.id)
+    db.session.commit()
+    assert _related_ids(hymn.id)[0] == grace.id
+    assert hymn.id in _related_ids(grace.id)
+
+    client.get(f"/video/{faith.video_id}")
+    client.get(f"/video/{hymn.video_id}")
+    app.extensions["view_counter"].flush()
+    assert VideoCoView.query.filter_by(video_id=faith.id, other_id=hymn.id).one().count == 1
+
+    related.forget(hymn.id)
+    db.session.delete(hymn)
+    db.session.commit()
+    assert hymn.id not in _related_ids(grace.id)
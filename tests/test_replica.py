@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Needs its own app (the replica bind is set up when engines are created),
+# so it runs in a fresh interpreter like test_startup.
+PROBE = r"""
+import json, sys
+from app import create_app
+from sqlalchemy import text
+from models import db, User, Video
+
+app = create_app({
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1], "DATABASE_REPLICA_URL": "sqlite:///" + sys.argv[2],
+    "OUTBOX_WORKER": "cli", "THUMBNAIL_WORKER": "off", "PAGE_CACHE_ENABLED": False,
+})
+with app.app_context():
+    replica = db.engines["replica"]
+    db.create_all()
+    db.metadata.create_all(replica)
+    db.session.add(User(id=1, username="u", email="u@example.com", password="x", role="uploader"))
+    db.session.add(Video(id=1, title="Everywhere", video_id="everywhere1", uploaded_by=1))
+    db.session.commit()
+    # The replica has the same rows plus one the primary never had.
+    with replica.begin() as conn:
+        conn.execute(User.__table__.insert(), {"id": 1, "username": "u", "email": "u@example.com", "password": "x", "role": "uploader"})
+        conn.execute(Video.__table__.insert(), [{"id": 1, "title": "Everywhere", "video_id": "everywhere1", "uploaded_by": 1, "views": 0},
+                                                {"id": 2, "title": "ReplicaOnly", "video_id": "replicaonly", "uploaded_by": 1, "views": 0}])
+        conn.execute(text("INSERT INTO video_search (rowid, title, description, category) VALUES (2, 'ReplicaOnly', '', '')"))
+
+client = app.test_client()
+seen = lambda: b"ReplicaOnly" in client.get("/videos").data
+result = {"anonymous_get": seen()}
+result["search"] = b"ReplicaOnly" in client.get("/search?q=replicaonly").data
+result["like"] = client.post("/like_video/everywhere1").status_code
+result["get_after_write"] = seen()
+with client.session_transaction() as session:
+    session["db_primary_until"] = 0
+result["get_after_window"] = seen()
+print(json.dumps(result))
+"""
+
+
+def test_reads_use_the_replica_until_the_client_writes(tmp_path):
+    out = subprocess.run([sys.executable, "-c", PROBE, str(tmp_path / "primary.db"), str(tmp_path / "replica.db")],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(out) == {"anonymous_get": True, "search": True, "like": 200, "get_after_write": False,
+                               "get_after_window": True}
@@ -0,0 +1,82 @@
+import json
+import logging
+import re
+
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db, Video
+from request_profiler import _RequestStats, statement_shape
+
+
+@pytest.fixture
+def profiler(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PERF_ENABLED", True)
+    monkeypatch.setitem(app.config, "PERF_SERVER_TIMING", True)
+    profiler = app.extensions["request_profiler"]
+    profiler.history.clear()
+    return profiler
+
+
+def test_statement_shapes_ignore_parameters():
+    assert statement_shape("SELECT *\n  FROM videos WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT * FROM videos WHERE id IN (?, ?)") == \
+        "SELECT * FROM videos WHERE id IN (?, ...)"
+    assert statement_shape("SELECT * FROM videos WHERE id IN (%(id_1)s, %(id_2)s)") == \
+        "SELECT * FROM videos WHERE id IN (?, ...)"
+
+
+def test_requests_report_their_queries(app, client, uploader, profiler):
+    db.session.add(Video(title="Amazing Grace", video_id="hymn0000001", uploaded_by=uploader.id))
+    db.session.commit()
+
+    response = client.get("/video/hymn0000001")
+    timing = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=[\d.]+',
+                          response.headers["Server-Timing"])
+    (record,) = profiler.history
+    assert int(timing.group(1)) == record["queries"] > 0
+    assert (record["endpoint"], record["status"]) == ("main.video_page", 200)
+
+    summary = profiler.summary()
+    assert [row["endpoint"] for row in summary["endpoints"]] == ["main.video_page"]
+    assert summary["endpoints"][0]["max_queries"] == record["queries"]
+
+
+def test_repeated_statements_are_logged(app, client, profiler, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "PERF_REPEAT_THRESHOLD", 1)
+    monkeypatch.setitem(app.config, "PERF_SLOW_REQUEST_MS", 10 ** 6)
+
+    with caplog.at_level(logging.WARNING, logger="gospeltube.perf"):
+        client.get("/")
+    (line,) = [r.getMessage() for r in caplog.records if r.name == "gospeltube.perf"]
+    logged = json.loads(line)
+    assert logged["path"] == "/" and logged["repeated"]
+    assert profiler.summary()["repeated"][0]["endpoint"] == logged["endpoint"]
+
+
+def test_perf_page_is_admin_only(app, client, profiler):
+    assert client.get("/admin/perf").status_code == 302
+
+    with client.session_transaction() as session:
+        session["role"] = "admin"
+    client.get("/")
+    assert client.get("/admin/perf").status_code == 200
+    assert [r["path"] for r in profiler.history][-1] == "/admin/perf"
+
+
+def test_profiler_can_be_switched_off(app, client, profiler, monkeypatch):
+    monkeypatch.setitem(app.config, "PERF_ENABLED", False)
+    assert "Server-Timing" not in client.get("/").headers
+    assert not profiler.history
+
+
+def test_failed_statement_leaves_no_start_time_behind(app, profiler):
+    with app.test_request_context("/"), db.engine.connect() as conn:
+        g._request_stats = stats = _RequestStats()
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert stats.queries == 1
+        assert not conn.info.get("_profiler_started")
@@ -0,0 +1,58 @@
+from models import db, Category, Video
+import search as search_index
+
+
+def _add(uploader, video_id, title, description="", category=None):
+    video = Video(title=title, description=description, video_id=video_id, uploaded_by=uploader.id,
+                  category_id=category.id if category else None)
+    db.session.add(video)
+    db.session.flush()
+    search_index.index_video(video)
+    db.session.commit()
+    return video
+
+
+def _ids(query, backend=None):
+    backend = backend or search_index.get_search_backend()
+    return [hit.video.video_id for hit in backend.search(query).hits]
+
+
+def test_title_matches_rank_first_and_snippets_are_escaped(app, uploader):
+    _add(uploader, "described01", "Sunday service", "An old <b>grace</b> hymn sung by the choir")
+    _add(uploader, "titled00001", "Amazing Grace", "Live recording")
+
+    backend = search_index.get_search_backend()
+    assert backend.name == "fts5"
+    assert _ids("grace") == ["titled00001", "described01"]
+    assert _ids("gra") == ["titled00001", "described01"]  # prefix terms
+    assert _ids("grace choir") == ["described01"]  # every word required
+
+    snippet = str(backend.search("choir").hits[0].snippet)
+    assert "<mark>choir</mark>" in snippet and "&lt;b&gt;" in snippet and "<b>" not in snippet
+    # The LIKE fallback finds the same videos.
+    assert sorted(_ids("grace", search_index.LikeSearchBackend())) == ["described01", "titled00001"]
+
+
+def test_index_follows_edits_deletes_and_category_renames(app, uploader):
+    category = Category(name="Worship", slug="worship")
+    db.session.add(category)
+    db.session.commit()
+    video = _add(uploader, "hymn0000001", "Amazing Grace", category=category)
+    _add(uploader, "hymn0000002", "Holy Night")
+    assert _ids("worship") == ["hymn0000001"]
+
+    video.title = "Be Thou My Vision"
+    search_index.index_video(video)
+    db.session.commit()
+    assert _ids("grace") == [] and _ids("vision") == ["hymn0000001"]
+
+    category.name = "Praise"
+    search_index.reindex_category(category)
+    db.session.commit()
+    assert _ids("worship") == [] and _ids("praise") == ["hymn0000001"]
+
+    search_index.remove_video(video.id)
+    db.session.delete(video)
+    db.session.commit()
+    assert _ids("vision") == [] and _ids("holy") == ["hymn0000002"]
+    assert search_index.rebuild_index() == 1
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+from warmup import STEPS, warm_up
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in its own interpreter: whether Alembic was imported depends on
+# everything imported before.
+PROBE = r"""
+import json, sys
+import app as module
+first = module.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1]})
+second = module.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1]})
+print(json.dumps({
+    "alembic": "alembic" in sys.modules,
+    "migrate": "migrate" in second.extensions,
+    "flush_hooks": len(second.extensions["view_counter"]._flush_hooks),
+    "own_extensions": all(first.extensions[name] is not second.extensions[name]
+                          and first.extensions[name].app is first
+                          for name in ("view_counter", "outbox", "page_cache", "thumbnails")),
+    "same_default_app": module.app is module.app,
+}))
+"""
+
+
+def test_create_app_leaves_the_database_and_alembic_alone(tmp_path):
+    database = tmp_path / "untouched.db"
+
+    out = subprocess.run([sys.executable, "-c", PROBE, str(database)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(out) == {"alembic": False, "migrate": False, "flush_hooks": 3, "own_extensions": True,
+                               "same_default_app": True}
+    assert not database.exists()
+
+
+def test_warm_up_runs_every_step(app):
+    assert set(warm_up(app)) == {name for name, _ in STEPS}
@@ -0,0 +1,97 @@
+import os
+import threading
+
+from benchmarks.catalog import sample_thumbnail
+from models import db, Video
+from thumbnails import _DiskLRU
+
+
+def _video(uploader, video_id="abcDEF12345"):
+    db.session.add(Video(title="Grace", video_id=video_id, uploaded_by=uploader.id))
+    db.session.commit()
+    return video_id
+
+
+def test_thumbnail_is_fetched_once_and_served_immutable(app, client, uploader, monkeypatch):
+    monkeypatch.setitem(app.config, "THUMBNAIL_WORKER", "inline")
+    fetched = []
+    app.extensions["thumbnails"].fetcher = lambda video_id: fetched.append(video_id) or sample_thumbnail(video_id)
+    video_id = _video(uploader)
+
+    for _ in range(2):
+        response = client.get(f"/thumbs/{video_id}/480", headers={"Accept": "image/webp,image/*"})
+        assert response.status_code == 200
+        assert response.cache_control.immutable and response.cache_control.max_age >= 86400
+        assert "Accept" in response.vary
+    assert fetched == [video_id]
+    assert client.get(f"/thumbs/{video_id}/481").status_code == 404
+    assert client.get("/thumbs/notAVideo99/480").status_code == 404
+
+
+def test_unfetchable_thumbnail_falls_back_to_youtube(app, client, uploader):
+    video_id = _video(uploader)
+
+    response = client.get(f"/thumbs/{video_id}/320")
+
+    assert response.status_code == 302
+    assert response.location == f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+
+
+def test_miss_redirects_without_fetching_until_warmed(app, client, uploader, monkeypatch):
+    monkeypatch.setitem(app.config, "THUMBNAIL_RETRY_AFTER", 300)
+    fetched = []
+    app.extensions["thumbnails"].fetcher = lambda video_id: fetched.append(video_id) or sample_thumbnail(video_id)
+    video_id = _video(uploader)
+
+    response = client.get(f"/thumbs/{video_id}/480")
+    assert response.status_code == 302 and response.cache_control.max_age == 300
+    assert fetched == []  # the request never waits on img.youtube.com
+
+    result = app.test_cli_runner().invoke(args=["warm-thumbnails"])
+    assert "1 thumbnails ready, 0 could not be fetched" in result.output
+    assert client.get(f"/thumbs/{video_id}/480").status_code == 200
+    assert fetched == [video_id]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    lru = _DiskLRU(str(tmp_path), max_bytes=25)
+    paths = [str(tmp_path / "v" / name) for name in ("a", "b", "c")]
+
+    lru.put(paths[0], b"x" * 10)
+    lru.put(paths[1], b"x" * 10)
+    assert lru.touch(paths[0])
+    lru.put(paths[2], b"x" * 10)
+
+    assert [os.path.exists(p) for p in paths] == [True, False, True]
+    assert lru.total == 20
+
+
+def test_thumbnails_are_generated_once_per_video_and_in_parallel_across_videos(app):
+    thumbnails = app.extensions["thumbnails"]
+    both_fetching = threading.Barrier(2, timeout=5)
+    fetched = []
+
+    def fetcher(video_id):
+        fetched.append(video_id)
+        if video_id != "ccc333ccc33":
+            both_fetching.wait()  # deadlocks if one video's fetch blocks the other's
+        return sample_thumbnail(video_id)
+
+    thumbnails.fetcher = fetcher
+    results = []
+    threads = [threading.Thread(target=lambda v=v: results.append(thumbnails.ensure(v)))
+               for v in ("aaa111aaa11", "bbb222bbb22")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True, True] and sorted(fetched) == ["aaa111aaa11", "bbb222bbb22"]
+
+    threads = [threading.Thread(target=lambda: results.append(thumbnails.ensure("ccc333ccc33")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 6 and fetched.count("ccc333ccc33") == 1
+    assert thumbnails._locks == {}
@@ -0,0 +1,90 @@
+from models import db, Video, VideoCoView, VideoViewerSketch
+from related import RelatedVideos
+from unique_viewers import HyperLogLog, RotatingBloomFilter, UniqueViewers
+from view_counter import ViewCounter
+
+
+def test_hyperloglog_estimates_and_merges():
+    a, b = HyperLogLog(), HyperLogLog()
+    for n in range(6000):
+        a.add(f"visitor-{n}")
+    for n in range(4000, 10000):
+        b.add(f"visitor-{n}")
+
+    assert abs(a.count() - 6000) < 6000 * 0.08
+    a.merge(b)
+    assert abs(a.count() - 10000) < 10000 * 0.08
+    assert HyperLogLog().count() == 0
+
+
+def test_bloom_filter_remembers_for_a_window(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("unique_viewers.time.time", lambda: clock[0])
+    seen = RotatingBloomFilter(capacity=1000, error_rate=0.001, window=60)
+
+    assert seen.add("a:1") and not seen.add("a:1")
+    clock[0] += 61
+    assert not seen.add("a:1")  # still in the previous generation
+    clock[0] += 61
+    seen.add("b:1")
+    clock[0] += 61
+    assert seen.add("a:1")
+
+
+def test_repeat_views_are_not_counted_and_the_cookie_stays_small(app, client, uploader):
+    video = Video(title="Grace", video_id="vid-1", uploaded_by=uploader.id)
+    db.session.add(video)
+    db.session.commit()
+    viewers = app.extensions["unique_viewers"]
+
+    assert "Set-Cookie" in client.get("/video/vid-1").headers  # visitor id, once
+    for _ in range(3):
+        assert "Set-Cookie" not in client.get("/video/vid-1").headers
+    app.test_client().get("/video/vid-1")
+    app.extensions["view_counter"].flush()
+
+    db.session.refresh(video)
+    assert video.views == 2
+    assert viewers.count(video.id) == 2
+    with client.session_transaction() as session:
+        assert set(session) == {"_permanent", "vday", "vid"}
+        session["viewed_7"] = True  # left over from before server-side dedup
+    client.get("/video/vid-1")
+    with client.session_transaction() as session:
+        assert "viewed_7" not in session
+
+
+def test_failed_flush_keeps_sketches_and_coviews(app, uploader, monkeypatch):
+    monkeypatch.setitem(app.config, "VIEW_COUNTER_FLUSH_INTERVAL", 3600)
+    for name in ("view_counter", "unique_viewers", "related_videos"):
+        monkeypatch.setitem(app.extensions, name, app.extensions[name])
+    counter = ViewCounter(app)
+    viewers, related = UniqueViewers(app, counter), RelatedVideos(app, counter)
+    first, second = Video(title="A", video_id="vid-a", uploaded_by=uploader.id), \
+        Video(title="B", video_id="vid-b", uploaded_by=uploader.id)
+    db.session.add_all([first, second])
+    db.session.commit()
+    for visitor in ("a", "b"):
+        for video in (first, second):
+            viewers.observe(visitor, video.id)
+            related.record_view(visitor, video.id)
+            counter.record(video.id)
+
+    def fail(conn, batch):
+        raise RuntimeError("database unavailable")
+
+    counter.add_flush_hook(fail)
+    assert counter.flush() == 0
+    assert VideoViewerSketch.query.count() == 0 and VideoCoView.query.count() == 0
+    assert viewers.count(first.id) == 2  # still pending in memory
+
+    # Meanwhile another worker stored the first sketch of the second video.
+    other = HyperLogLog(app.config["UNIQUE_VIEWERS_PRECISION"])
+    other.add("c")
+    db.session.add(VideoViewerSketch(video_id=second.id, registers=bytes(other.registers)))
+    db.session.commit()
+
+    counter._flush_hooks.remove(fail)
+    assert counter.flush() == 4
+    assert viewers._dirty == {} and viewers.counts([first.id, second.id]) == {first.id: 2, second.id: 3}
+    assert VideoCoView.query.one().count == 2
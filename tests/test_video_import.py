@@ -0,0 +1,59 @@
+import io
+import json
+
+import search as search_index
+from models import db, Category, Video
+from video_import import import_videos
+
+CSV = """youtube_link,title,description,category
+https://youtu.be/newVideo001,Amazing grace live,Choir,music
+https://www.youtube.com/watch?v=newVideo002,Morning praise,,
+https://youtu.be/newVideo001,Amazing grace again,,music
+https://youtu.be/existing001,Already here,,
+not a link,Broken,,
+https://youtu.be/newVideo003,Wrong category,,nope
+https://youtu.be/newVideo004,,,
+"""
+
+
+def test_csv_import_dedupes_and_reports_row_errors(app, uploader):
+    db.session.add(Category(name="Music", slug="music"))
+    db.session.add(Video(title="Old", video_id="existing001", uploaded_by=uploader.id))
+    db.session.commit()
+
+    report = import_videos(io.StringIO(CSV), "csv", uploader.id, batch_size=2)
+
+    assert (report.imported, report.duplicates) == (2, 2)
+    assert report.errors == [
+        {"line": 6, "error": "Invalid YouTube link."},
+        {"line": 7, "error": "Unknown category 'nope'."},
+        {"line": 8, "error": "Missing title."},
+    ]
+    imported = Video.query.filter_by(video_id="newVideo001").one()
+    assert imported.category.slug == "music" and imported.uploaded_by == uploader.id
+    assert [hit.video.video_id for hit in search_index.get_search_backend().search("grace").hits] == ["newVideo001"]
+
+
+def test_admin_upload_endpoint_accepts_jsonl(app, client, uploader):
+    with client.session_transaction() as session:
+        session.update(role="admin", user_id=uploader.id)
+    lines = [json.dumps({"url": "https://youtu.be/jsonVideo01", "title": "Hymn"}), "{oops"]
+    data = {"file": (io.BytesIO("\n".join(lines).encode()), "videos.jsonl")}
+
+    response = client.post("/admin/videos/import", data=data, content_type="multipart/form-data")
+
+    body = response.get_json()
+    assert response.status_code == 200 and body["imported"] == 1
+    assert body["failed"] == 1 and body["errors"][0]["line"] == 2
+    assert client.post("/admin/videos/import", data={}).status_code == 400
+
+
+def test_admin_upload_endpoint_rejects_unknown_formats(app, client, uploader):
+    with client.session_transaction() as session:
+        session.update(role="admin", user_id=uploader.id)
+
+    for data in ({"file": (io.BytesIO(b"<videos/>"), "videos.xml")},
+                 {"file": (io.BytesIO(b"a,b"), "videos.csv"), "format": "xml"}):
+        response = client.post("/admin/videos/import", data=data, content_type="multipart/form-data")
+        assert response.status_code == 400 and not response.get_json()["success"]
+    assert Video.query.count() == 0
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from models import db, Video
+from view_counter import ViewCounter
+
+
+def _videos(uploader, count):
+    videos = [Video(title=f"Hymn {n}", video_id=f"hymn000000{n}", uploaded_by=uploader.id)
+              for n in range(count)]
+    db.session.add_all(videos)
+    db.session.commit()
+    return videos
+
+
+def _counter(app, monkeypatch, **config):
+    """A counter of its own: the app's has a flush thread on a short interval."""
+    monkeypatch.setitem(app.config, "VIEW_COUNTER_FLUSH_INTERVAL", 3600)
+    for name, value in config.items():
+        monkeypatch.setitem(app.config, name, value)
+    monkeypatch.setitem(app.extensions, "view_counter", app.extensions["view_counter"])
+    return ViewCounter(app)
+
+
+def _views(video):
+    db.session.expire_all()
+    return db.session.get(Video, video.id).views
+
+
+def test_views_are_buffered_and_flushed_in_one_batch(app, uploader, monkeypatch):
+    counter = _counter(app, monkeypatch)
+    first, second = _videos(uploader, 2)
+    batches = []
+    counter.add_flush_hook(lambda conn, batch: batches.append(dict(batch)))
+
+    for _ in range(3):
+        counter.record(first.id, when=datetime(2024, 1, 1, 12))
+    counter.record(second.id, when=datetime(2024, 1, 1, 9))
+    assert _views(first) == 0 and counter.view_count(first) == 3
+
+    assert counter.flush() == 4
+    assert _views(first) == 3 and _views(second) == 1
+    assert batches == [{first.id: [3, datetime(2024, 1, 1, 12)], second.id: [1, datetime(2024, 1, 1, 9)]}]
+    assert counter.pending(first.id) == 0 and counter.flush() == 0
+
+
+def test_failed_flush_keeps_increments_up_to_the_limit(app, uploader, monkeypatch):
+    counter = _counter(app, monkeypatch, VIEW_COUNTER_MAX_PENDING=3)
+    (video,) = _videos(uploader, 1)
+
+    def fail(conn, batch):
+        raise RuntimeError("database unavailable")
+
+    counter.add_flush_hook(fail)
+    for _ in range(4):
+        counter.record(video.id)
+    assert counter.stats["dropped"] == 1
+
+    assert counter.flush() == 0
+    assert _views(video) == 0 and counter.pending(video.id) == 3  # rolled back, re-queued
+
+    counter._flush_hooks.remove(fail)
+    assert counter.flush() == 3 and _views(video) == 3
@@ -0,0 +1,379 @@
+# thumbnails.py
+import functools
+import io
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask import abort, redirect, request, send_file, url_for
+from sqlalchemy import select
+
+from models import db, Video
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{6,20}$")
+YOUTUBE_THUMBNAIL = "https://img.youtube.com/vi/{video_id}/{name}.jpg"
+MIMETYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+
+# =====================================================
+# FETCHING AND RESIZING
+# =====================================================
+class YouTubeFetcher:
+    """Original thumbnail bytes from img.youtube.com, or None. Any callable
+    taking a video id can replace it (tests use a stub)."""
+
+    def __init__(self, timeout=5, names=("maxresdefault", "hqdefault")):
+        self.timeout = timeout
+        self.names = names
+
+    def __call__(self, video_id):
+        import requests  # only the warmer needs it; keeps worker start-up light
+
+        for name in self.names:
+            try:
+                response = requests.get(YOUTUBE_THUMBNAIL.format(video_id=video_id, name=name), timeout=self.timeout)
+            except requests.RequestException:
+                logger.warning("Thumbnail fetch failed for %s (%s)", video_id, name, exc_info=True)
+                continue
+            if response.status_code == 200 and response.headers.get("Content-Type", "").startswith("image/"):
+                return response.content
+        return None
+
+
+@functools.cache
+def image_formats():
+    """Formats variants are written in, best first."""
+    from PIL import features
+    return ("webp", "jpg") if features.check("webp") else ("jpg",)
+
+
+def render_variants(source, widths, quality=80):
+    """{(width, format): bytes} for a source image, center-cropped to 16:9
+    (hqdefault is 4:3 with black bars) and never upscaled."""
+    from PIL import Image  # only resizing needs it; keeps worker start-up light
+
+    image = Image.open(io.BytesIO(source)).convert("RGB")
+    height = image.width * 9 // 16
+    if image.height > height:
+        top = (image.height - height) // 2
+        image = image.crop((0, top, image.width, top + height))
+
+    variants = {}
+    for width in widths:
+        size = (min(width, image.width), min(width, image.width) * 9 // 16)
+        resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+        for fmt in image_formats():
+            buffer = io.BytesIO()
+            if fmt == "webp":
+                resized.save(buffer, "WEBP", quality=quality, method=4)
+            else:
+                resized.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+            variants[(width, fmt)] = buffer.getvalue()
+    return variants
+
+
+# =====================================================
+# SIZE-BOUNDED DISK CACHE
+# =====================================================
+class _DiskLRU:
+    """Files under `root`, least recently used deleted first once their
+    total size passes `max_bytes`.
+
+    Recency is kept in memory and mirrored to file mtimes (at most hourly
+    per file), so a restarted worker resumes with roughly the same order.
+    Each worker tracks the files it has seen; a file another worker
+    evicted is simply a miss."""
+
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # path -> [size, mtime], oldest first
+        self.total = 0
+
+    def _load(self):
+        found = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((path, [size, mtime]) for mtime, path, size in found)
+        self.total = sum(size for _, _, size in found)
+
+    def touch(self, path) -> bool:
+        """Whether `path` is cached; marks it most recently used."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries is not None and path in self._entries:
+                    self.total -= self._entries.pop(path)[0]
+            return False
+
+        now = time.time()
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = [stat.st_size, stat.st_mtime]
+                self.total += stat.st_size
+            self._entries.move_to_end(path)
+            stale = now - entry[1] >= self.TOUCH_INTERVAL
+            if stale:
+                entry[1] = now
+        if stale:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return True
+
+    def put(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(handle, "wb") as fh:
+            fh.write(data)
+        os.replace(temp, path)
+
+        evicted = []
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self.total -= previous[0]
+            self._entries[path] = [len(data), time.time()]
+            self.total += len(data)
+            while self.total > self.max_bytes and len(self._entries) > 1:
+                old, (size, _) = self._entries.popitem(last=False)
+                self.total -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def read(self, path):
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+
+# =====================================================
+# THUMBNAILS
+# =====================================================
+class Thumbnails:
+    """Video thumbnails fetched once, resized into a few widths (WebP, when
+    Pillow was built with it, and JPEG) and served from local disk with
+    long-lived immutable cache headers.
+
+    Pages use the ``thumbnail_url(video_id, width)`` and
+    ``thumbnail_srcset(video_id)`` template globals. The format is chosen
+    from the Accept header, so one URL serves WebP or JPEG (``Vary:
+    Accept``). A request for a thumbnail that is not cached yet never
+    waits for the fetch: it queues the video with `warm` and redirects to
+    YouTube's own image for THUMBNAIL_RETRY_AFTER seconds, as does one
+    that cannot be fetched. ``flask warm-thumbnails`` prepares the whole
+    catalog ahead of time.
+
+    Config:
+        THUMBNAIL_DIR           cache directory (default: instance/thumbnails)
+        THUMBNAIL_WIDTHS        widths generated, in pixels
+        THUMBNAIL_MAX_BYTES     disk budget before least recently used files go
+        THUMBNAIL_QUALITY       WebP/JPEG quality
+        THUMBNAIL_WORKER        "thread" (warm in a background thread),
+                                "inline" (warm during the request) or "off"
+        THUMBNAIL_RETRY_AFTER   seconds before a failed fetch is retried
+        THUMBNAIL_MAX_AGE       Cache-Control max-age of served images
+    """
+
+    def __init__(self, app=None, fetcher=None):
+        self.app = None
+        self.fetcher = fetcher or YouTubeFetcher()
+        self._locks_lock = threading.Lock()
+        self._locks = {}  # video id -> [lock, threads using it]
+        self._failed = {}  # video id -> time of the failed fetch
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = None
+        self._pid = os.getpid()
+        self._lru = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("THUMBNAIL_DIR", os.path.join(app.instance_path, "thumbnails"))
+        app.config.setdefault("THUMBNAIL_WIDTHS", (320, 480, 640, 1280))
+        app.config.setdefault("THUMBNAIL_MAX_BYTES", 512 * 1024 * 1024)
+        app.config.setdefault("THUMBNAIL_QUALITY", 80)
+        app.config.setdefault("THUMBNAIL_WORKER", "thread")
+        app.config.setdefault("THUMBNAIL_RETRY_AFTER", 300)
+        app.config.setdefault("THUMBNAIL_MAX_AGE", 365 * 24 * 3600)
+        app.extensions["thumbnails"] = self
+        self.app = app
+        self._lru = None
+        app.add_template_global(self.url, "thumbnail_url")
+        app.add_template_global(self.srcset, "thumbnail_srcset")
+
+    @property
+    def lru(self):
+        config = self.app.config
+        if self._lru is None or self._lru.root != config["THUMBNAIL_DIR"]:
+            self._lru = _DiskLRU(config["THUMBNAIL_DIR"], config["THUMBNAIL_MAX_BYTES"])
+        return self._lru
+
+    # ---- template helpers ------------------------------------------
+    def url(self, video_id, width=480):
+        return url_for("main.thumbnail", video_id=video_id, width=width)
+
+    def srcset(self, video_id):
+        """``srcset`` value listing every width."""
+        return ", ".join(f"{self.url(video_id, width)} {width}w" for width in self.app.config["THUMBNAIL_WIDTHS"])
+
+    # ---- storage ---------------------------------------------------
+    def _path(self, video_id, width=None, fmt="jpg"):
+        directory = os.path.join(self.app.config["THUMBNAIL_DIR"], video_id)
+        if width is None:
+            return os.path.join(directory, "source.jpg")
+        return os.path.join(directory, f"{width}.{fmt}")
+
+    def ensure(self, video_id) -> bool:
+        """Fetch and resize `video_id`'s thumbnail unless every variant is
+        already cached; False if the source could not be fetched."""
+        config = self.app.config
+        wanted = [(w, f) for w in config["THUMBNAIL_WIDTHS"] for f in image_formats()]
+        if all(self.lru.touch(self._path(video_id, w, f)) for w, f in wanted):
+            return True
+
+        # One fetch per video at a time; other videos are fetched and
+        # resized in parallel.
+        with self._generating(video_id):
+            if all(self.lru.touch(self._path(video_id, w, f)) for w, f in wanted):
+                return True  # made while we waited
+            failed = self._failed.get(video_id)
+            if failed is not None and time.time() - failed < config["THUMBNAIL_RETRY_AFTER"]:
+                return False
+            source_path = self._path(video_id)
+            source = self.lru.read(source_path) if self.lru.touch(source_path) else None
+            if source is None:
+                source = self.fetcher(video_id)
+                if not source:
+                    self._remember_failure(video_id)
+                    return False
+                self.lru.put(source_path, source)
+            self._failed.pop(video_id, None)
+
+            try:
+                variants = render_variants(source, config["THUMBNAIL_WIDTHS"], config["THUMBNAIL_QUALITY"])
+            except Exception:
+                logger.exception("Could not resize the thumbnail of %s", video_id)
+                self._remember_failure(video_id)
+                return False
+            for (width, fmt), data in variants.items():
+                self.lru.put(self._path(video_id, width, fmt), data)
+            return True
+
+    @contextmanager
+    def _generating(self, video_id):
+        with self._locks_lock:
+            entry = self._locks.setdefault(video_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[video_id]
+
+    def _remember_failure(self, video_id):
+        if len(self._failed) >= 10000:
+            self._failed.clear()
+        self._failed[video_id] = time.time()
+
+    # ---- serving ---------------------------------------------------
+    def respond(self, video_id, width):
+        if not VIDEO_ID.match(video_id) or width not in self.app.config["THUMBNAIL_WIDTHS"]:
+            abort(404)
+        fmt = "webp" if "webp" in image_formats() and request.accept_mimetypes["image/webp"] else "jpg"
+        path = self._path(video_id, width, fmt)
+
+        if not self.lru.touch(path):
+            if db.session.query(Video.id).filter_by(video_id=video_id).first() is None:
+                abort(404)
+            self.warm(video_id)
+            if not self.lru.touch(path):
+                response = redirect(YOUTUBE_THUMBNAIL.format(video_id=video_id, name="hqdefault"))
+                response.cache_control.public = True
+                response.cache_control.max_age = self.app.config["THUMBNAIL_RETRY_AFTER"]
+                return response
+
+        response = send_file(path, mimetype=MIMETYPES[fmt], conditional=True,
+                             max_age=self.app.config["THUMBNAIL_MAX_AGE"])
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept")
+        return response
+
+    # ---- background warming ----------------------------------------
+    def warm_catalog(self):
+        """Prepare the thumbnails of every video, newest first, in this
+        thread; returns (ready, failed) counts."""
+        ready = failed = 0
+        video_ids = db.session.execute(select(Video.video_id).order_by(Video.id.desc())).scalars().all()
+        for video_id in video_ids:
+            if self.ensure(video_id):
+                ready += 1
+            else:
+                failed += 1
+        return ready, failed
+
+    def warm(self, video_id):
+        """Prepare `video_id`'s thumbnails ahead of the first page view."""
+        mode = self.app.config["THUMBNAIL_WORKER"]
+        if mode == "inline":
+            self.ensure(video_id)
+        elif mode == "thread":
+            try:
+                self._queue.put_nowait(video_id)
+            except queue.Full:
+                return
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # forked gunicorn worker: start its own warmer
+            self._pid = os.getpid()
+            self._thread = None
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="thumbnail-warmer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            video_id = self._queue.get()
+            try:
+                self.ensure(video_id)
+            except Exception:
+                logger.exception("Warming the thumbnail of %s failed", video_id)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,222 @@
+# unique_viewers.py
+import hashlib
+import math
+import threading
+import time
+
+from sqlalchemy import select, update
+
+from leaderboards import insert_missing
+from models import db, VideoViewerSketch
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+# =====================================================
+# SKETCHES
+# =====================================================
+class HyperLogLog:
+    """Approximate distinct count in 2 ** precision one-byte registers
+    (1 KiB and about 3% standard error at the default precision).
+    Merging is a register-wise max, so sketches from every worker combine."""
+
+    def __init__(self, precision=10, registers=None):
+        self.precision = precision
+        size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(size)
+        if len(self.registers) != size:
+            raise ValueError(f"expected {size} registers, got {len(self.registers)}")
+
+    def add(self, value: str):
+        h = _hash64(value)
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+
+class RotatingBloomFilter:
+    """Set membership over a sliding window: members are remembered for
+    between one and two windows. Two generations of `capacity` members
+    each; the older one is dropped when the window passes or the current
+    one fills up. False positives (a new member reported as seen) happen
+    at about `error_rate`."""
+
+    def __init__(self, capacity, error_rate, window):
+        self.capacity = capacity
+        self.window = window
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._added = 0
+        self._started = time.time()
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _contains(array, positions):
+        return all(array[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def add(self, key: str) -> bool:
+        """Add `key`; True if it was not (probably) in the filter yet."""
+        if self._added >= self.capacity or time.time() - self._started >= self.window:
+            self._previous, self._current = self._current, bytearray(len(self._current))
+            self._added = 0
+            self._started = time.time()
+        positions = self._positions(key)
+        if self._contains(self._current, positions):
+            return False
+        for p in positions:
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._added += 1
+        return not self._contains(self._previous, positions)
+
+
+# =====================================================
+# UNIQUE VIEWERS
+# =====================================================
+class UniqueViewers:
+    """Server-side view deduplication and per-video unique-viewer counts,
+    so the session cookie only ever carries the visitor id.
+
+    * `observe(visitor, video_id)` is True the first time a visitor opens
+      a video within VIEW_DEDUP_WINDOW (a rotating Bloom filter per worker)
+    * every visitor is added to the video's HyperLogLog; sketches touched
+      since the last flush are merged into video_viewer_sketches by the
+      view counter flush
+
+    A visitor whose requests land on several workers, or a worker restart,
+    can count one extra view per video and window.
+
+    Config:
+        VIEW_DEDUP_WINDOW      seconds a view is remembered (at least)
+        VIEW_DEDUP_CAPACITY    views remembered per window and worker
+        VIEW_DEDUP_ERROR_RATE  share of first views wrongly taken as repeats
+        UNIQUE_VIEWERS_PRECISION  HyperLogLog precision (registers = 2 ** p)
+    """
+
+    def __init__(self, app=None, view_counter=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._seen = None
+        self._dirty = {}  # video id -> HyperLogLog of viewers since the last flush
+        self._writing = {}  # sketches taken by the flush in progress
+        if app is not None:
+            self.init_app(app, view_counter)
+
+    def init_app(self, app, view_counter=None):
+        app.config.setdefault("VIEW_DEDUP_WINDOW", 24 * 3600)
+        app.config.setdefault("VIEW_DEDUP_CAPACITY", 1_000_000)
+        app.config.setdefault("VIEW_DEDUP_ERROR_RATE", 0.001)
+        app.config.setdefault("UNIQUE_VIEWERS_PRECISION", 10)
+        app.extensions["unique_viewers"] = self
+        self.app = app
+        if view_counter is not None:
+            view_counter.add_flush_hook(self._write_sketches, self._restore_sketches)
+
+    def _filter(self):
+        if self._seen is None:
+            config = self.app.config
+            self._seen = RotatingBloomFilter(
+                config["VIEW_DEDUP_CAPACITY"], config["VIEW_DEDUP_ERROR_RATE"], config["VIEW_DEDUP_WINDOW"]
+            )
+        return self._seen
+
+    def reset(self):
+        """Forget every view seen by this worker (tests, config changes)."""
+        with self._lock:
+            self._seen = None
+            self._dirty = {}
+
+    # ---- recording -------------------------------------------------
+    def observe(self, visitor, video_id) -> bool:
+        """Record that `visitor` opened `video_id`; True if it counts as a
+        new view."""
+        with self._lock:
+            first = self._filter().add(f"{visitor}:{video_id}")
+            if first:
+                sketch = self._dirty.get(video_id)
+                if sketch is None:
+                    sketch = self._dirty[video_id] = HyperLogLog(self.app.config["UNIQUE_VIEWERS_PRECISION"])
+                sketch.add(visitor)
+        return first
+
+    def _write_sketches(self, conn, batch):
+        """View counter flush hook: runs inside the flush transaction, after
+        the view counts were written, so on SQLite the write lock is
+        already held and concurrent merges cannot overwrite each other."""
+        with self._lock:
+            dirty = self._writing = self._dirty
+            self._dirty = {}
+        if not dirty:
+            return
+        table = VideoViewerSketch.__table__
+        precision = self.app.config["UNIQUE_VIEWERS_PRECISION"]
+
+        # Create missing rows empty, skipping any another worker has just
+        # created, then merge into the (locked) stored registers.
+        insert_missing(conn, table, ["video_id"], [
+            {"video_id": video_id, "registers": bytes(HyperLogLog(precision).registers)} for video_id in dirty
+        ])
+        query = select(table.c.video_id, table.c.registers).where(table.c.video_id.in_(dirty))
+        if conn.dialect.name == "postgresql":
+            query = query.with_for_update()
+        for video_id, registers in conn.execute(query).all():
+            merged = HyperLogLog(precision, registers)
+            merged.merge(dirty[video_id])
+            conn.execute(update(table).where(table.c.video_id == video_id)
+                         .values(registers=bytes(merged.registers)))
+
+    def _restore_sketches(self):
+        """The flush failed: merge its sketches back for the next one."""
+        with self._lock:
+            for video_id, sketch in self._writing.items():
+                pending = self._dirty.get(video_id)
+                if pending is None:
+                    self._dirty[video_id] = sketch
+                else:
+                    pending.merge(sketch)
+            self._writing = {}
+
+    # ---- reading ---------------------------------------------------
+    def counts(self, video_ids):
+        """{video id: approximate unique viewers}, including this worker's
+        unflushed viewers, in one query."""
+        video_ids = list(video_ids)
+        if not video_ids:
+            return {}
+        precision = self.app.config["UNIQUE_VIEWERS_PRECISION"]
+        sketches = {video_id: HyperLogLog(precision) for video_id in video_ids}
+        for video_id, registers in db.session.execute(
+            select(VideoViewerSketch.video_id, VideoViewerSketch.registers)
+            .where(VideoViewerSketch.video_id.in_(video_ids))
+        ):
+            sketches[video_id].merge(HyperLogLog(precision, registers))
+        with self._lock:
+            for video_id, sketch in sketches.items():
+                pending = self._dirty.get(video_id)
+                if pending is not None:
+                    sketch.merge(pending)
+        return {video_id: sketch.count() for video_id, sketch in sketches.items()}
+
+    def count(self, video_id) -> int:
+        return self.counts([video_id])[video_id]
@@ -0,0 +1,131 @@
+# video_admin.py
+from datetime import datetime, timedelta
+
+from flask import url_for
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from category_tree import get_category_tree
+from models import Video
+from pagination import approximate_count, keyset_paginate
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# sort name -> (expression, reads the value back off a Video)
+SORTS = {
+    "date_added": (Video.date_added, lambda v: v.date_added),
+    "views": (Video.views, lambda v: v.views),
+    "likes": (func.coalesce(Video.likes_count, 0), lambda v: v.likes_count or 0),
+    "title": (Video.title, lambda v: v.title),
+}
+
+
+def _int_arg(args, name):
+    value = args.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer.")
+
+
+def _date_arg(args, name):
+    value = args.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD).")
+
+
+# =====================================================
+# FILTERS AND SORTING
+# =====================================================
+class VideoListing:
+    """Filter, sort and page size parsed from request args.
+
+    category_id  also matches the category's subcategories
+    uploader_id  videos added by that user
+    date_from / date_to  inclusive YYYY-MM-DD bounds on date_added
+    q            case-insensitive title prefix
+    sort         date_added | views | likes | title
+    order        asc | desc (default: desc, title defaults to asc)
+
+    Raises ValueError with a user-facing message on bad input."""
+
+    def __init__(self, args):
+        self.category_id = _int_arg(args, "category_id")
+        self.uploader_id = _int_arg(args, "uploader_id")
+        self.date_from = _date_arg(args, "date_from")
+        self.date_to = _date_arg(args, "date_to")
+        self.prefix = args.get("q", "").strip()
+
+        self.sort = args.get("sort", "date_added")
+        if self.sort not in SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(SORTS)}.")
+        self.order = args.get("order", "asc" if self.sort == "title" else "desc")
+        if self.order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc.")
+
+        per_page = _int_arg(args, "per_page") or DEFAULT_PER_PAGE
+        self.per_page = max(1, min(per_page, MAX_PER_PAGE))
+
+    def cache_key(self):
+        return ("admin_videos", self.category_id, self.uploader_id,
+                self.date_from, self.date_to, self.prefix.lower())
+
+    def filtered(self):
+        query = Video.query
+        if self.category_id is not None:
+            tree = get_category_tree()
+            ids = [self.category_id] + [c.id for c in tree.descendants(self.category_id)]
+            query = query.filter(Video.category_id.in_(ids))
+        if self.uploader_id is not None:
+            query = query.filter(Video.uploaded_by == self.uploader_id)
+        if self.date_from is not None:
+            query = query.filter(Video.date_added >= self.date_from)
+        if self.date_to is not None:
+            query = query.filter(Video.date_added < self.date_to + timedelta(days=1))
+        if self.prefix:
+            query = query.filter(Video.title.istartswith(self.prefix, autoescape=True))
+        return query
+
+    def page(self, cursor=None):
+        """One page with uploaders joined in (categories come from the
+        cached tree), plus a cached approximate total for the filter."""
+        query = self.filtered()
+        total = approximate_count(self.cache_key(), query.count)
+        expression, read = SORTS[self.sort]
+        return keyset_paginate(
+            query.options(joinedload(Video.uploader)),
+            (expression, Video.id),
+            per_page=self.per_page,
+            cursor=cursor,
+            total=total,
+            descending=self.order == "desc",
+            key_of=lambda video: [read(video), video.id]
+        )
+
+
+def video_to_dict(video, view_count, unique_viewers=None):
+    tree = get_category_tree()
+    category = tree.get(video.category_id)
+    return {
+        "id": video.id,
+        "video_id": video.video_id,
+        "title": video.title,
+        "category": {"id": category.id, "name": category.name} if category else None,
+        "uploader": {"id": video.uploader.id, "username": video.uploader.username} if video.uploader else None,
+        "views": view_count(video),
+        "unique_viewers": unique_viewers,
+        "likes": video.likes_count or 0,
+        "date_added": video.date_added.isoformat() if video.date_added else None,
+        "urls": {
+            "watch": url_for("main.video_page", video_id=video.video_id),
+            "edit": url_for("main.edit_video", video_id=video.id),
+            "delete": url_for("main.delete_video", video_id=video.id),
+        },
+    }
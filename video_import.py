@@ -0,0 +1,230 @@
+# video_import.py
+import csv
+import io
+import json
+import re
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+import search as search_index
+from category_tree import get_category_tree
+from models import db, Video
+from page_cache import mark_catalog_changed
+
+BATCH_SIZE = 500
+# Imports larger than this rebuild every related list once at the end
+# instead of refreshing them video by video.
+RELATED_REFRESH_LIMIT = 100
+
+FORMATS = ("csv", "jsonl")
+LINK_FIELDS = ("youtube_link", "link", "url")
+CATEGORY_FIELDS = ("category", "category_slug")
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    if not url:
+        return None
+    match = re.match(r"(https?://)?(www\.)?youtu\.be/([^?&/]+)", url)
+    if match:
+        return match.group(3)
+
+    parsed = urlparse(url)
+    if parsed.hostname in ("www.youtube.com", "youtube.com", "m.youtube.com"):
+        return parse_qs(parsed.query).get("v", [None])[0]
+    return None
+
+
+# =====================================================
+# READING
+# =====================================================
+def _first(record, names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def read_records(stream, fmt):
+    """(line number, dict) for every record of a CSV (with a header row) or
+    JSONL text stream, read lazily. A malformed JSONL line yields its error
+    message instead of a dict."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, {(k or "").strip().lower(): v for k, v in record.items()}
+    elif fmt == "jsonl":
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}."
+                continue
+            if not isinstance(record, dict):
+                yield number, "Expected a JSON object."
+                continue
+            yield number, {str(k).lower(): v for k, v in record.items()}
+    else:
+        raise ValueError("format must be csv or jsonl.")
+
+
+def detect_format(filename, fmt=None):
+    """`fmt` if given, else csv/jsonl from the file extension."""
+    if fmt:
+        fmt = fmt.strip().lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; use csv or jsonl.")
+        return fmt
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError("Cannot tell the file format; use a .csv or .jsonl file.")
+
+
+def open_text(binary):
+    """Text view of an uploaded (binary) file without reading it all."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+# =====================================================
+# IMPORT
+# =====================================================
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.errors = []  # {"line": n, "error": message}
+
+    def error(self, line, message):
+        self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        return {"imported": self.imported, "duplicates": self.duplicates,
+                "failed": len(self.errors), "errors": self.errors}
+
+
+class VideoImporter:
+    """Adds videos from a stream of records (youtube_link, title,
+    description, category slug) in batched transactions.
+
+    Each batch costs one duplicate lookup (a chunked IN query), one
+    executemany INSERT, one read-back of the new ids and one batched
+    search index write. Subscribers hear about the new videos through a
+    single wake-up of the digest sender at the end."""
+
+    def __init__(self, uploader_id, batch_size=BATCH_SIZE):
+        self.uploader_id = uploader_id
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self._seen = set()  # video ids taken by this file
+        self._new_ids = []
+
+    def run(self, records) -> ImportReport:
+        batch = []
+        line = 0
+        try:
+            for line, record in records:
+                row = self._validate(line, record)
+                if row is not None:
+                    batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._save(batch)
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            self.report.error(line + 1, f"Stopped reading: {e}.")
+        if batch:
+            self._save(batch)
+        self._finish()
+        return self.report
+
+    def _validate(self, line, record):
+        if isinstance(record, str):
+            self.report.error(line, record)
+            return None
+        video_id = extract_video_id(_first(record, LINK_FIELDS))
+        if not video_id:
+            self.report.error(line, "Invalid YouTube link.")
+            return None
+        title = _first(record, ("title",))
+        if not title:
+            self.report.error(line, "Missing title.")
+            return None
+        category_id = None
+        slug = _first(record, CATEGORY_FIELDS)
+        if slug:
+            category = get_category_tree().by_slug.get(slug)
+            if category is None:
+                self.report.error(line, f"Unknown category '{slug}'.")
+                return None
+            category_id = category.id
+        if video_id in self._seen:
+            self.report.duplicates += 1
+            return None
+        self._seen.add(video_id)
+        return line, {
+            "video_id": video_id,
+            "title": title[:300],
+            "description": _first(record, ("description",)) or None,
+            "category_id": category_id,
+            "uploaded_by": self.uploader_id,
+        }
+
+    def _save(self, batch):
+        ids = [row["video_id"] for _, row in batch]
+        existing = set(db.session.execute(select(Video.video_id).where(Video.video_id.in_(ids))).scalars())
+        rows = [row for _, row in batch if row["video_id"] not in existing]
+        self.report.duplicates += len(batch) - len(rows)
+        if not rows:
+            return
+
+        try:
+            db.session.execute(insert(Video), rows)
+            inserted = db.session.execute(
+                select(Video.id, Video.video_id, Video.title, Video.description, Video.category_id)
+                .where(Video.video_id.in_([row["video_id"] for row in rows]))
+            ).all()
+            tree = get_category_tree()
+            search_index.index_documents([
+                (id_, title, description or "", tree.get(category_id).name if category_id else "")
+                for id_, _, title, description, category_id in inserted
+            ])
+            new_ids = [row.id for row in inserted]
+            if len(self._new_ids) + len(new_ids) <= RELATED_REFRESH_LIMIT:
+                for video_id in new_ids:
+                    current_app.extensions["related_videos"].refresh(video_id)
+            mark_catalog_changed()
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            message = f"Not saved: {e.__class__.__name__} in its batch."
+            for line, row in batch:
+                if row["video_id"] not in existing:
+                    self.report.error(line, message)
+            return
+        self._new_ids.extend(new_ids)
+        self.report.imported += len(new_ids)
+
+    def _finish(self):
+        if not self._new_ids:
+            return
+        extensions = current_app.extensions
+        if len(self._new_ids) > RELATED_REFRESH_LIMIT:
+            extensions["related_videos"].rebuild()
+        extensions["outbox"].wake()
+        thumbnails = extensions.get("thumbnails")
+        if thumbnails is not None and current_app.config["THUMBNAIL_WORKER"] == "thread":
+            for video_id in db.session.execute(select(Video.video_id).where(Video.id.in_(self._new_ids[:1000]))).scalars():
+                thumbnails.warm(video_id)
+
+
+def import_videos(stream, fmt, uploader_id, batch_size=BATCH_SIZE) -> ImportReport:
+    """Import a CSV/JSONL text stream; see VideoImporter."""
+    return VideoImporter(uploader_id, batch_size).run(read_records(stream, fmt))
@@ -0,0 +1,202 @@
+# view_counter.py
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, update
+
+from models import db, Video
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# WRITE-BEHIND VIEW COUNTER
+# =====================================================
+class ViewCounter:
+    """Buffers view increments per worker and writes them in batches.
+
+    Each flush is one transaction of atomic
+    ``UPDATE videos SET views = views + :n, last_watched = :ts`` statements,
+    so concurrent workers never lose increments and page views never hold
+    a row lock.
+
+    Config:
+        VIEW_COUNTER_FLUSH_INTERVAL   seconds between background flushes
+                                      (0 writes through on every view)
+        VIEW_COUNTER_FLUSH_THRESHOLD  pending increments that force a flush
+        VIEW_COUNTER_MAX_PENDING      increments kept while the DB is failing;
+                                      anything beyond is dropped and counted
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flush_hooks = []
+        self._failure_hooks = {}  # flush hook -> called when its flush fails
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("VIEW_COUNTER_FLUSH_INTERVAL", 10)
+        app.config.setdefault("VIEW_COUNTER_FLUSH_THRESHOLD", 500)
+        app.config.setdefault("VIEW_COUNTER_MAX_PENDING", 50000)
+        app.extensions["view_counter"] = self
+        self.app = app
+        atexit.unregister(self.flush)  # init_app may run again for a new app
+        atexit.register(self.flush)
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._pending = {}  # video id -> [count, last_watched]
+        self._pending_total = 0
+        self._thread = None
+        self.stats = {
+            "recorded": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+    # ---- recording -------------------------------------------------
+    def record(self, video_id, when=None):
+        """Count one view of `video_id` (the primary key, not the YouTube id)."""
+        self._check_fork()
+        when = when or datetime.utcnow()
+        config = self.app.config
+
+        with self._lock:
+            if self._pending_total >= config["VIEW_COUNTER_MAX_PENDING"]:
+                self.stats["dropped"] += 1
+                return
+            entry = self._pending.setdefault(video_id, [0, when])
+            entry[0] += 1
+            entry[1] = max(entry[1], when)
+            self._pending_total += 1
+            self.stats["recorded"] += 1
+            pending_total = self._pending_total
+
+        if config["VIEW_COUNTER_FLUSH_INTERVAL"] <= 0:
+            self.flush()
+        elif pending_total >= config["VIEW_COUNTER_FLUSH_THRESHOLD"]:
+            self._wakeup.set()
+        self._ensure_thread()
+
+    def pending(self, video_id) -> int:
+        """Increments recorded in this worker but not yet written."""
+        entry = self._pending.get(video_id)
+        return entry[0] if entry else 0
+
+    def view_count(self, video) -> int:
+        """Persisted count plus this worker's pending delta."""
+        return (video.views or 0) + self.pending(video.id)
+
+    # ---- flushing --------------------------------------------------
+    def add_flush_hook(self, hook, on_failure=None):
+        """Call `hook(conn, batch)` inside every flush transaction, where
+        `batch` maps video id -> (count, last_watched). If the transaction
+        then fails, `on_failure()` is called (for hooks that ran) so the
+        hook can put back the in-memory state it took for the write."""
+        if hook not in self._flush_hooks:
+            self._flush_hooks.append(hook)
+        if on_failure is not None:
+            self._failure_hooks[hook] = on_failure
+
+    def flush(self) -> int:
+        """Write every pending increment; returns how many were written."""
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._pending_total = 0
+            if not batch:
+                return 0
+
+            rows = [
+                {"video_pk": video_id, "increment": count, "watched": watched}
+                for video_id, (count, watched) in batch.items()
+            ]
+            statement = update(Video.__table__)\
+                .where(Video.__table__.c.id == bindparam("video_pk"))\
+                .values(
+                    views=func.coalesce(Video.__table__.c.views, 0) + bindparam("increment"),
+                    last_watched=bindparam("watched")
+                )
+
+            started = time.perf_counter()
+            ran = []
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(statement, rows)
+                        for hook in self._flush_hooks:
+                            ran.append(hook)
+                            hook(conn, batch)
+            except Exception:
+                logger.exception("View counter flush failed; re-queueing %d videos", len(batch))
+                self.stats["flush_errors"] += 1
+                self._requeue(batch)
+                for hook in ran:
+                    if hook in self._failure_hooks:
+                        self._failure_hooks[hook]()
+                return 0
+
+            elapsed = time.perf_counter() - started
+            written = sum(count for count, _ in batch.values())
+            self.stats["flushes"] += 1
+            self.stats["flushed"] += written
+            self.stats["last_flush_seconds"] = elapsed
+            self.stats["total_flush_seconds"] += elapsed
+            self.stats["max_flush_seconds"] = max(self.stats["max_flush_seconds"], elapsed)
+            return written
+
+    def _requeue(self, batch):
+        limit = self.app.config["VIEW_COUNTER_MAX_PENDING"]
+        with self._lock:
+            for video_id, (count, watched) in batch.items():
+                room = limit - self._pending_total
+                if room <= 0:
+                    self.stats["dropped"] += count
+                    continue
+                kept = min(count, room)
+                self.stats["dropped"] += count - kept
+                entry = self._pending.setdefault(video_id, [0, watched])
+                entry[0] += kept
+                entry[1] = max(entry[1], watched)
+                self._pending_total += kept
+
+    # ---- background thread -----------------------------------------
+    def _check_fork(self):
+        # gunicorn forks workers after import; each worker gets its own buffer.
+        if self._pid != os.getpid():
+            with self._lock:
+                self._reset_state()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.app.config["VIEW_COUNTER_FLUSH_INTERVAL"] <= 0:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="view-counter-flush", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.app.config["VIEW_COUNTER_FLUSH_INTERVAL"])
+            self._wakeup.clear()
+            self.flush()
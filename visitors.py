@@ -0,0 +1,47 @@
+# visitors.py
+import uuid
+from datetime import date
+
+from flask import session
+
+VISITOR_SESSION_KEY = "vid"
+VISITOR_DAY_KEY = "vday"
+# Re-issue the cookie (pushing its expiry out) at most this often.
+REFRESH_DAYS = 7
+
+
+# =====================================================
+# ANONYMOUS VISITOR IDENTITY
+# =====================================================
+def get_visitor_id(create: bool = True):
+    """Stable anonymous id for the current browser, stored once in the
+    session cookie (32 hex chars, so the cookie never grows). The cookie
+    is re-issued about weekly so active visitors keep their id."""
+    visitor_id = session.get(VISITOR_SESSION_KEY)
+    if visitor_id is None and create:
+        visitor_id = uuid.uuid4().hex
+        session[VISITOR_SESSION_KEY] = visitor_id
+    if visitor_id is not None:
+        today = date.today().toordinal()
+        if today - session.get(VISITOR_DAY_KEY, 0) >= REFRESH_DAYS:
+            session[VISITOR_DAY_KEY] = today
+            session.permanent = True
+    return visitor_id
+
+
+def viewer_key():
+    """Who is watching: the logged-in user, otherwise the anonymous
+    visitor id (created on the first visit)."""
+    if session.get("user_id"):
+        return f"u{session['user_id']}"
+    return get_visitor_id()
+
+
+def drop_legacy_view_flags():
+    """Remove the old per-video ``viewed_<id>`` flags from the session so
+    existing cookies shrink back to a constant size."""
+    stale = [key for key in session if key.startswith("viewed_")]
+    for key in stale:
+        session.pop(key)
+    if stale:
+        session.pop("last_viewed", None)
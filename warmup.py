@@ -0,0 +1,70 @@
+# warmup.py
+import logging
+import threading
+import time
+
+from category_tree import get_category_tree
+from models import db
+import search as search_index
+from thumbnails import image_formats
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# WARM-UP
+# =====================================================
+def _templates(app):
+    for name in app.jinja_env.list_templates(extensions=("html",)):
+        app.jinja_env.get_template(name)
+
+
+def _leaderboards(app):
+    leaderboards = app.extensions.get("leaderboards")
+    if leaderboards is not None:
+        leaderboards.popular()
+
+
+def _assets(app):
+    assets = app.extensions.get("assets")
+    if assets is not None:
+        assets.manifest()
+
+
+STEPS = (
+    ("database", lambda app: db.session.execute(db.text("SELECT 1"))),
+    ("category_tree", lambda app: get_category_tree()),
+    ("search_backend", lambda app: search_index.get_search_backend()),
+    ("leaderboards", _leaderboards),
+    ("image_formats", lambda app: image_formats()),
+    ("assets", _assets),
+    ("templates", _templates),
+)
+
+
+def warm_up(app) -> dict:
+    """Do the work the first requests of a fresh worker would otherwise
+    pay for: open a pooled connection, load the per-process caches and
+    compile every template. Returns {step: seconds}; a failing step is
+    logged and skipped."""
+    timings = {}
+    with app.app_context():
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                step(app)
+            except Exception:
+                logger.exception("Warm-up step %s failed", name)
+                db.session.rollback()
+                continue
+            timings[name] = time.perf_counter() - started
+        db.session.remove()
+    return timings
+
+
+def warm_up_in_background(app) -> threading.Thread:
+    """Run `warm_up(app)` without holding up the worker; requests that
+    arrive first simply warm the caches themselves."""
+    thread = threading.Thread(target=warm_up, args=(app,), name="warm-up", daemon=True)
+    thread.start()
+    return thread